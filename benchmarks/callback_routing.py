@@ -0,0 +1,109 @@
+"""Бенчмарк маршрутизации callback-запросов: F.data-фильтры против таблицы префиксов
+
+Запуск: python benchmarks/callback_routing.py [количество апдейтов]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from bot.handlers.callbacks import CallbackDispatcher
+from bot.utils import callback_data as cb
+
+ROUTES = [value for value in vars(cb).values() if isinstance(value, cb.CallbackRoute)]
+
+# Типичный поток нажатий: лента вакансий и меню встречаются чаще всего
+SAMPLES = (
+    ["next_vacancy"] * 40
+    + [cb.RESPOND.pack(42)] * 15
+    + ["worker:menu", "menu", "employer:menu", "employer:my_vacancies"] * 5
+    + [cb.VACANCY.pack(7), cb.EDIT_VACANCY_FIELD.pack(7, "title"), cb.PIN_DURATION.pack(7, 3)] * 3
+    + ["admin:stats", cb.ADMIN_BLOCK.pack(100), cb.BROADCAST.pack("all")]
+)
+
+
+async def noop(callback: CallbackQuery) -> None:
+    # Имитация разбора callback_data внутри хендлера, как было раньше
+    callback.data.split(":")
+
+
+def build_legacy() -> Dispatcher:
+    """Маршрутизация как до таблицы: по F.data-фильтру на каждый хендлер"""
+    dp = Dispatcher(storage=MemoryStorage())
+    router = Router(name="legacy")
+    for route in ROUTES:
+        if route.fields:
+            router.callback_query.register(noop, F.data.startswith(f"{route.prefix}:"))
+        else:
+            router.callback_query.register(noop, F.data == route.prefix)
+    dp.include_router(router)
+    return dp
+
+
+def build_table() -> Dispatcher:
+    """Маршрутизация через CallbackDispatcher"""
+    dp = Dispatcher(storage=MemoryStorage())
+    table = CallbackDispatcher(name="table")
+
+    async def handler(callback: CallbackQuery) -> None:
+        return None
+
+    for route in ROUTES:
+        table.route(route)(handler)
+    dp.include_router(table.router)
+    return dp
+
+
+def make_updates(count: int) -> list[Update]:
+    rnd = random.Random(1)
+    user = User(id=1, is_bot=False, first_name="bench")
+    message = Message(message_id=1, date=datetime.now(), chat=Chat(id=1, type="private"))
+    return [
+        Update(
+            update_id=i,
+            callback_query=CallbackQuery(
+                id=str(i), from_user=user, chat_instance="bench",
+                message=message, data=rnd.choice(SAMPLES),
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+async def measure(dp: Dispatcher, bot: Bot, updates: list[Update]) -> float:
+    """Среднее время обработки одного апдейта в микросекундах"""
+    for update in updates[:200]:
+        await dp.feed_update(bot, update)
+    started = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / len(updates) * 1_000_000
+
+
+async def main(count: int) -> None:
+    bot = Bot(token="42:BENCHMARK")
+    updates = make_updates(count)
+    try:
+        legacy = await measure(build_legacy(), bot, updates)
+        table = await measure(build_table(), bot, updates)
+    finally:
+        await bot.session.close()
+
+    print(f"Маршрутов: {len(ROUTES)}, апдейтов: {count}")
+    print(f"F.data-фильтры:    {legacy:8.1f} мкс/апдейт")
+    print(f"Таблица префиксов: {table:8.1f} мкс/апдейт")
+    print(f"Ускорение:         {legacy / table:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,215 @@
+"""Локальная заглушка API ЮKassa для нагрузочных тестов платежей
+
+Поддерживает создание (с ключом идемпотентности) и получение платежа
+и отправку webhook payment.succeeded / payment.canceled, в том числе
+повторных, пришедших раньше, чем бот сохранил платёж, и потерянных.
+
+Отдельный запуск (бот с YOOKASSA_API_URL=http://127.0.0.1:8081/v3):
+    python benchmarks/fake_yookassa.py [порт] [URL webhook бота]
+"""
+
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiohttp import ClientSession, web
+
+# Обработчик события в том же процессе (вместо HTTP-запроса на webhook бота)
+Deliver = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class FakeYooKassa:
+    """
+    Заглушка ЮKassa.
+
+    После создания платежа заглушка сама решает его исход и рассылает
+    события: с вероятностью cancel_rate платёж отменяется, с вероятностью
+    duplicate_rate событие отправляется ещё раз одновременно с первым,
+    с вероятностью early_rate - сразу, до ответа на запрос создания,
+    с вероятностью lose_rate - не отправляется вовсе (статус платежа
+    при этом доступен через GET). Неудачная доставка повторяется,
+    как это делает ЮKassa.
+    """
+
+    def __init__(
+        self,
+        deliver: Optional[Deliver] = None,
+        webhook_url: Optional[str] = None,
+        seed: int = 1,
+        cancel_rate: float = 0.1,
+        duplicate_rate: float = 0.3,
+        early_rate: float = 0.2,
+        lose_rate: float = 0.0,
+        settle_delay: float = 0.05,
+        max_deliveries: int = 5,
+    ):
+        self.deliver = deliver
+        self.webhook_url = webhook_url
+        self.cancel_rate = cancel_rate
+        self.duplicate_rate = duplicate_rate
+        self.early_rate = early_rate
+        self.lose_rate = lose_rate
+        self.settle_delay = settle_delay
+        self.max_deliveries = max_deliveries
+        self.payments: Dict[str, Dict[str, Any]] = {}
+        self.outcomes: Dict[str, str] = {}  # ID платежа -> итоговый статус
+        self.delivery_seconds: List[float] = []
+        self.deliveries = 0
+        self.duplicates = 0
+        self.early = 0
+        self.lost = 0
+        self.failed_deliveries = 0
+        self.undelivered = 0
+        self._random = random.Random(seed)
+        self._idempotency: Dict[str, str] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._http: Optional[ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/v3/payments", self._create)
+        self.app.router.add_get("/v3/payments/{payment_id}", self._get)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запуск сервера, возвращает базовый URL API"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/v3"
+
+    async def stop(self) -> None:
+        """Остановка сервера"""
+        await self.drain()
+        if self._http is not None:
+            await self._http.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def drain(self) -> None:
+        """Ожидание доставки всех событий"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+
+    async def _create(self, request: web.Request) -> web.Response:
+        """POST /payments"""
+        key = request.headers.get("Idempotence-Key")
+        if not key:
+            return _error(400, "invalid_request", "Idempotence-Key header is required")
+        if key in self._idempotency:
+            return web.json_response(self.payments[self._idempotency[key]])
+
+        body = await request.json()
+        if not body.get("confirmation", {}).get("return_url"):
+            return _error(400, "invalid_request", "confirmation.return_url is required")
+        payment_id = str(uuid.uuid4())
+        payment = {
+            "id": payment_id,
+            "status": "pending",
+            "paid": False,
+            "amount": body["amount"],
+            "description": body.get("description", ""),
+            "metadata": body.get("metadata", {}),
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "confirmation": {
+                "type": "redirect",
+                "confirmation_url": f"https://yoomoney.ru/checkout/payments/v2/contract?orderId={payment_id}",
+            },
+            "test": True,
+        }
+        self.payments[payment_id] = payment
+        self._idempotency[key] = payment_id
+
+        early = self._random.random() < self.early_rate
+        self.early += early
+        self._spawn(self._settle(payment_id, 0.0 if early else self.settle_delay))
+        if early:
+            # Событие успевает обработаться раньше, чем бот сохранит платёж
+            await asyncio.sleep(0.01)
+        return web.json_response(payment)
+
+    async def _get(self, request: web.Request) -> web.Response:
+        """GET /payments/{id}"""
+        payment = self.payments.get(request.match_info["payment_id"])
+        if payment is None:
+            return _error(404, "not_found", "Payment not found")
+        return web.json_response(payment)
+
+    async def _settle(self, payment_id: str, delay: float) -> None:
+        """Оплата или отмена платежа пользователем и отправка событий"""
+        await asyncio.sleep(delay)
+        payment = self.payments[payment_id]
+        if self._random.random() < self.cancel_rate:
+            payment.update(status="canceled", cancellation_details={"party": "yoo_money", "reason": "expired_on_confirmation"})
+        else:
+            payment.update(status="succeeded", paid=True, captured_at=datetime.utcnow().isoformat() + "Z")
+        self.outcomes[payment_id] = payment["status"]
+        if self._random.random() < self.lose_rate:
+            self.lost += 1
+            return
+
+        event = {"type": "notification", "event": f"payment.{payment['status']}", "object": dict(payment)}
+        copies = 1
+        while self._random.random() < self.duplicate_rate and copies < 3:
+            copies += 1
+        self.duplicates += copies - 1
+        await asyncio.gather(*(self._send(event) for _ in range(copies)))
+
+    async def _send(self, event: Dict[str, Any]) -> None:
+        """Доставка события с повторами при ошибке"""
+        for attempt in range(self.max_deliveries):
+            self.deliveries += 1
+            started = time.perf_counter()
+            try:
+                await self._post(event)
+                self.delivery_seconds.append(time.perf_counter() - started)
+                return
+            except Exception:
+                self.failed_deliveries += 1
+                await asyncio.sleep(0.05 * (attempt + 1))
+        self.undelivered += 1
+
+    async def _post(self, event: Dict[str, Any]) -> None:
+        """Одна попытка доставки"""
+        if self.deliver is not None:
+            await self.deliver(event)
+            return
+        if self._http is None:
+            self._http = ClientSession()
+        async with self._http.post(self.webhook_url, json=event) as response:
+            if response.status != 200:
+                raise RuntimeError(f"webhook HTTP {response.status}")
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def _error(status: int, code: str, description: str) -> web.Response:
+    return web.json_response(
+        {"type": "error", "id": str(uuid.uuid4()), "code": code, "description": description},
+        status=status,
+    )
+
+
+async def main(port: int, webhook_url: str) -> None:
+    fake = FakeYooKassa(webhook_url=webhook_url)
+    url = await fake.start(port=port)
+    print(f"Заглушка ЮKassa: {url}, webhook: {webhook_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 8081,
+        sys.argv[2] if len(sys.argv) > 2 else "http://127.0.0.1:8000/yookassa/webhook",
+    ))
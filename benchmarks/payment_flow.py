@@ -0,0 +1,198 @@
+"""Бенчмарк оплаты: создание платежа и обработка webhook ЮKassa против локальной заглушки
+
+Каждый пользователь покупает одну услугу (подписку или публикацию вакансии).
+Заглушка отменяет часть платежей, дублирует события и присылает их раньше,
+чем бот сохранил платёж, а часть событий теряет - такие платежи проводит
+сверка со статусом в заглушке. События проходят через входящую очередь так же,
+как в webhook-сервере. После прогона проверяется, что каждая оплата
+выдала услугу и уведомление ровно один раз.
+
+Запуск: python benchmarks/payment_flow.py [покупок] [одновременно]
+(по умолчанию - временная SQLite; DATABASE_URL задаёт другую БД)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+if not os.getenv("DATABASE_URL"):
+    _db_path = Path(tempfile.mkdtemp()) / "payment_flow.db"
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+
+from sqlalchemy import func, select
+
+from benchmarks.fake_yookassa import FakeYooKassa
+from bot.config import config
+from bot.database.connection import async_session_maker, close_db, init_db
+from bot.database.models import Notification, Payment, PaymentEvent, User
+from bot.services import payments, yookassa_client
+from bot.services.payment_inbox import inbox
+from bot.services.payment_reconciler import reconciler
+from bot.services.payments import PaymentType, get_payment_amount
+
+PURCHASE_TYPES = [PaymentType.WORKER_SUBSCRIPTION, PaymentType.VACANCY_PUBLICATION]
+FIRST_USER_ID = 10_000_000
+
+
+async def deliver(event: dict) -> None:
+    """Доставка события так же, как маршрут yookassa_webhook"""
+    await inbox.accept(event)
+
+
+async def wait_inbox() -> int:
+    """
+    Ожидание обработки входящей очереди
+
+    Returns:
+        Количество событий, обработка которых окончательно не удалась
+    """
+    while True:
+        async with async_session_maker() as session:
+            counts = dict((await session.execute(
+                select(PaymentEvent.status, func.count()).group_by(PaymentEvent.status)
+            )).all())
+        if not counts.get("pending"):
+            return counts.get("failed", 0)
+        inbox.wake()
+        await asyncio.sleep(0.1)
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def create_users(count: int) -> None:
+    async with async_session_maker() as session:
+        session.add_all(User(telegram_id=FIRST_USER_ID + i) for i in range(count))
+        await session.commit()
+
+
+async def purchase(user_id: int, payment_type: str, slots: asyncio.Semaphore,
+                   latencies: list[float], errors: list[str]) -> None:
+    async with slots:
+        started = time.perf_counter()
+        try:
+            await payments.create_yookassa_payment(payment_type, user_id, get_payment_amount(payment_type))
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {str(e).splitlines()[0]}")
+
+
+async def check(fake: FakeYooKassa, purchases: dict[int, str]) -> dict[str, int]:
+    """Сверка итогов с исходами платежей в заглушке"""
+    outcome_by_user = {
+        int(payment["metadata"]["telegram_id"]): fake.outcomes.get(payment_id)
+        for payment_id, payment in fake.payments.items()
+    }
+    problems = {"double_grants": 0, "missing_grants": 0, "wrong_status": 0, "duplicate_rows": 0, "notifications": 0}
+    now = datetime.utcnow()
+    async with async_session_maker() as session:
+        users = {u.telegram_id: u for u in (await session.execute(select(User))).scalars()}
+        rows = (await session.execute(
+            select(Payment.yookassa_id, func.count(), func.max(Payment.status)).group_by(Payment.yookassa_id)
+        )).all()
+        notified = dict((await session.execute(
+            select(Notification.chat_id, func.count()).group_by(Notification.chat_id)
+        )).all())
+
+    for yookassa_id, count, status in rows:
+        if count > 1:
+            problems["duplicate_rows"] += 1
+        if yookassa_id in fake.outcomes and status != fake.outcomes[yookassa_id]:
+            problems["wrong_status"] += 1
+
+    for user_id, payment_type in purchases.items():
+        paid = outcome_by_user.get(user_id) == "succeeded"
+        user = users[user_id]
+        if payment_type == PaymentType.WORKER_SUBSCRIPTION:
+            until = user.subscription_until
+            granted = 0 if until is None else round((until - now) / timedelta(days=30))
+        else:
+            granted = user.paid_vacancy_credits
+        expected = 1 if paid else 0
+        if granted > expected:
+            problems["double_grants"] += 1
+        elif granted < expected:
+            problems["missing_grants"] += 1
+        if notified.get(user_id, 0) != expected:
+            problems["notifications"] += 1
+    return problems
+
+
+async def main(count: int, parallel: int) -> None:
+    logging.basicConfig(level=logging.CRITICAL)
+    await init_db()
+    await create_users(count)
+
+    await inbox.start()
+    fake = FakeYooKassa(deliver=deliver, lose_rate=0.05)
+    config.payment.api_url = await fake.start()
+    config.payment.shop_id, config.payment.secret_key = "123456", "test_secret"
+    config.payment.return_url = "https://t.me/benchmark_bot"
+
+    rnd = random.Random(1)
+    purchases = {FIRST_USER_ID + i: rnd.choice(PURCHASE_TYPES) for i in range(count)}
+    slots = asyncio.Semaphore(parallel)
+    create_latencies: list[float] = []
+    errors: list[str] = []
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            purchase(user_id, payment_type, slots, create_latencies, errors)
+            for user_id, payment_type in purchases.items()
+        ))
+        await fake.drain()
+        await wait_inbox()
+        # Потерянные события - сверкой (все платежи уже "старше" задержки webhook)
+        reconcile_started = time.perf_counter()
+        reconciled = await reconciler.reconcile(datetime.utcnow() + timedelta(seconds=1))
+        reconcile_seconds = time.perf_counter() - reconcile_started
+        failed_events = await wait_inbox()
+        elapsed = time.perf_counter() - started
+        problems = await check(fake, purchases)
+    finally:
+        await fake.stop()
+        await inbox.stop()
+        await yookassa_client.client.close()
+        await close_db()
+
+    succeeded = sum(1 for status in fake.outcomes.values() if status == "succeeded")
+    print(f"БД: {config.db.url}")
+    print(f"Покупок: {count} (одновременно {parallel}), оплачено: {succeeded}, отменено: {len(fake.outcomes) - succeeded}")
+    print(f"Событий: {fake.deliveries} (дублей {fake.duplicates}, раньше сохранения {fake.early}, "
+          f"неудачных доставок {fake.failed_deliveries}, не доставлено {fake.undelivered}, потеряно {fake.lost})")
+    print(f"Сверка: проверено {reconciler.stats()['checked']}, проведено {reconciled} за {reconcile_seconds:.2f} с")
+    print(f"Пропускная способность: {count / elapsed:8.1f} покупок/с ({elapsed:.2f} с)")
+    print(f"Создание платежа:  p50 {percentile(create_latencies, 0.5) * 1000:7.2f} мс, "
+          f"p99 {percentile(create_latencies, 0.99) * 1000:7.2f} мс")
+    print(f"Ответ на webhook:  p50 {percentile(fake.delivery_seconds, 0.5) * 1000:7.2f} мс, "
+          f"p99 {percentile(fake.delivery_seconds, 0.99) * 1000:7.2f} мс")
+    inbox_stats = inbox.stats()
+    print(f"Обработка очереди: в среднем {inbox_stats['processing_delay_avg_s'] * 1000:7.2f} мс после приёма, "
+          f"максимум {inbox_stats['processing_delay_max_s'] * 1000:7.2f} мс, повторов {inbox_stats['retried']}")
+    if errors:
+        print(f"Ошибок создания: {len(errors)} (например, {errors[0]})")
+    problems["failed_events"] = failed_events
+    print("Проверка: " + ", ".join(f"{name}={value}" for name, value in problems.items()))
+    ok = not errors and not fake.undelivered and not any(problems.values())
+    print("Итог: OK" if ok else "Итог: НАРУШЕНИЯ")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    ))
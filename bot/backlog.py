@@ -0,0 +1,177 @@
+"""Обработка апдейтов, накопившихся пока бот был остановлен"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import TelegramObject, Update
+
+from bot.config import config
+
+logger = logging.getLogger(__name__)
+
+# Максимум апдейтов в одном ответе getUpdates
+BATCH_SIZE = 100
+
+
+async def iter_backlog(bot: Bot, allowed_updates: Optional[List[str]] = None) -> AsyncIterator[List[Update]]:
+    """
+    Неподтверждённые апдейты пачками по 100
+
+    Запрос следующей пачки с offset подтверждает предыдущую, поэтому пачка
+    подтверждается только после того, как вызывающий её обработал: пачка,
+    прерванная сбоем, придёт снова после перезапуска. Последний (пустой)
+    запрос подтверждает всю очередь, и polling начнёт с новых апдейтов.
+    """
+    offset = None
+    while True:
+        batch = await bot.get_updates(
+            offset=offset,
+            limit=BATCH_SIZE,
+            timeout=0,
+            allowed_updates=allowed_updates,
+        )
+        if not batch:
+            return
+        yield batch
+        offset = batch[-1].update_id + 1
+
+
+def _repeat_key(update: Update) -> Tuple[Optional[int], Optional[Tuple[str, str]]]:
+    """Пользователь апдейта и ключ повтора (нажатие кнопки или команда), если он есть"""
+    _, user, _ = UserContextMiddleware.resolve_event_context(update)
+    if user is None:
+        return None, None
+    if update.callback_query and update.callback_query.data:
+        return user.id, ("callback", update.callback_query.data)
+    if update.message and update.message.text and update.message.text.startswith("/"):
+        return user.id, ("command", update.message.text)
+    return user.id, None
+
+
+def collapse_backlog(
+    updates: List[Update],
+    last_keys: Optional[Dict[int, Optional[Tuple[str, str]]]] = None,
+) -> Tuple[List[Update], List[Update]]:
+    """
+    Удаление повторных нажатий из накопившихся апдейтов.
+
+    Подряд идущие (среди апдейтов пользователя) нажатия одной и той же
+    кнопки и одинаковые команды обрабатываются один раз - по первому
+    апдейту серии. Повтор после другого действия пользователя остаётся:
+    next, respond, next - это три разных шага.
+
+    Args:
+        updates: Апдейты в порядке получения
+        last_keys: Последний ключ каждого пользователя; передаётся между
+            пачками, чтобы серия на границе пачек тоже сжималась
+
+    Returns:
+        (оставленные апдейты в исходном порядке, отброшенные повторы)
+    """
+    if last_keys is None:
+        last_keys = {}
+    kept, dropped = [], []
+    for update in updates:
+        user_id, key = _repeat_key(update)
+        if user_id is not None:
+            if key is not None and last_keys.get(user_id) == key:
+                dropped.append(update)
+                continue
+            last_keys[user_id] = key
+        kept.append(update)
+    return kept, dropped
+
+
+async def answer_dropped(bot: Bot, dropped: List[Update]) -> None:
+    """Ответ на отброшенные нажатия, чтобы у пользователя не висели часики на кнопке"""
+    for update in dropped:
+        if update.callback_query is None:
+            continue
+        try:
+            await bot.answer_callback_query(update.callback_query.id)
+        except Exception as e:
+            # Запросы старше нескольких минут Telegram уже не принимает
+            logger.debug(f"Callback query {update.callback_query.id} not answered: {e}")
+
+
+async def process_backlog(dp: Dispatcher, bot: Bot, updates: List[Update], max_parallel: int, **kwargs: Any) -> None:
+    """
+    Обработка накопившихся апдейтов с ограниченной параллельностью
+
+    Задачи создаются в порядке апдейтов, поэтому UserLockMiddleware
+    сохраняет порядок обработки апдейтов каждого пользователя.
+    """
+    slots = asyncio.Semaphore(max_parallel)
+    tasks = []
+
+    async def handle(update: Update):
+        try:
+            await dp.feed_update(bot, update, **kwargs)
+        except Exception as e:
+            logger.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+        finally:
+            slots.release()
+
+    for update in updates:
+        await slots.acquire()
+        tasks.append(asyncio.create_task(handle(update)))
+    await asyncio.gather(*tasks)
+
+
+async def catch_up(dispatcher: Dispatcher, bot: Bot) -> None:
+    """
+    Startup-хук polling: получение, сжатие и обработка накопившихся
+    апдейтов до начала обычного приёма (пачка подтверждается после обработки)
+    """
+    received = processed = 0
+    last_keys: Dict[int, Optional[Tuple[str, str]]] = {}
+    async for batch in iter_backlog(bot, allowed_updates=dispatcher.resolve_used_update_types()):
+        kept, dropped = collapse_backlog(batch, last_keys)
+        await answer_dropped(bot, dropped)
+        await process_backlog(
+            dispatcher, bot, kept,
+            max_parallel=config.concurrency.max_in_flight,
+            **dispatcher.workflow_data,
+        )
+        received += len(batch)
+        processed += len(kept)
+
+    if received:
+        logger.info(f"Накопившиеся апдейты обработаны: {received}, после удаления повторов: {processed}")
+
+
+async def confirm_updates(bot: Bot, last_update_id: int) -> None:
+    """Подтверждение на сервере Telegram всех апдейтов до last_update_id включительно"""
+    try:
+        await bot.get_updates(offset=last_update_id + 1, limit=1, timeout=0)
+    except Exception as e:
+        logger.warning(f"Не удалось подтвердить апдейты: {e}")
+
+
+class OffsetTracker(BaseMiddleware):
+    """
+    Outer-middleware для dp.update: запоминает последний принятый update_id,
+    чтобы при остановке подтвердить его и не обработать апдейт повторно
+    после перезапуска
+    """
+
+    def __init__(self):
+        self.last_update_id: Optional[int] = None
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if self.last_update_id is None or event.update_id > self.last_update_id:
+            self.last_update_id = event.update_id
+        return await handler(event, data)
+
+    async def confirm(self, bot: Bot) -> None:
+        """Shutdown-хук: подтверждение принятых апдейтов"""
+        if self.last_update_id is not None:
+            await confirm_updates(bot, self.last_update_id)
@@ -8,6 +8,10 @@ load_dotenv()
 @dataclass
 class BotConfig:
     token: str
+    webhook_url: str = ""  # Публичный адрес сервера; если задан, апдейты приходят через webhook
+    webhook_secret: str = ""  # Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+    webhook_path: str = "/telegram/webhook"
+    skip_pending_updates: bool = False  # Отбрасывать апдейты, накопившиеся за время остановки
 
 
 @dataclass
@@ -21,6 +25,7 @@ class PaymentConfig:
     secret_key: str
     return_url: str
     webhook_path: str = "/yookassa/webhook"
+    api_url: str = "https://api.yookassa.ru/v3"
 
 
 @dataclass
@@ -55,7 +60,122 @@ class LimitConfig:
 class GeocodingConfig:
     """Конфигурация геокодинга"""
     api_key: str = ""  # API ключ Яндекс.Геокодера
+    api_url: str = "https://geocode-maps.yandex.ru/1.x/"
     web_app_url: str = ""  # URL для Telegram Web App выбора местоположения
+    cache_ttl_days: float = 30.0  # Время жизни найденного адреса в БД
+    not_found_ttl_hours: float = 24.0  # Время жизни "не найдено" в БД
+    memory_ttl_seconds: float = 3600.0  # Время жизни записи в памяти
+    memory_max_size: int = 5000  # Максимум записей в памяти
+    reverse_precision: int = 4  # Знаков после запятой в ключе обратного геокодинга (~11 м)
+    gazetteer_radius_km: float = 30.0  # Дальше от ближайшего города справочника точка не подписывается
+
+
+@dataclass
+class ConcurrencyConfig:
+    """Ограничения параллельной обработки апдейтов"""
+    max_in_flight: int = 25  # Одновременно обрабатываемых апдейтов (меньше пула соединений БД)
+    max_queue: int = 500  # Длина очереди, после которой текстовые апдейты отбрасываются
+    drain_timeout: float = 25.0  # Сколько ждать обработки принятых апдейтов при остановке, с
+
+
+@dataclass
+class ThrottleConfig:
+    """Ограничение частоты действий пользователя (действий за окно в секундах)"""
+    window_seconds: float = 10.0  # Длина скользящего окна
+    default_limit: int = 20  # Прочие сообщения и нажатия
+    feed_limit: int = 10  # Листание ленты вакансий
+    respond_limit: int = 5  # Отклики на вакансии
+    payment_limit: int = 3  # Создание платежей
+    max_tracked_users: int = 10000  # Сколько пользователей хранить в памяти
+
+
+@dataclass
+class CacheConfig:
+    """Кэши в памяти процесса"""
+    user_ttl_seconds: float = 60.0  # Время жизни профиля пользователя
+    user_max_size: int = 10000  # Максимум профилей в кэше
+    vacancy_card_ttl_seconds: float = 3600.0  # Время жизни отрисованной карточки вакансии
+    vacancy_card_max_size: int = 5000  # Максимум карточек в кэше
+
+
+@dataclass
+class ShardingConfig:
+    """Многопроцессный режим (python bot/main.py sharded)"""
+    workers: int = 0  # Число воркеров (0 - по числу ядер)
+    heartbeat_interval: float = 5.0  # Период отметки о работоспособности, с
+    heartbeat_timeout: float = 30.0  # Воркер без отметки дольше этого перезапускается
+    shutdown_timeout: float = 30.0  # Сколько ждать дообработки очереди при остановке
+    terminate_timeout: float = 5.0  # Сколько ждать выхода по SIGTERM перед SIGKILL, с
+
+
+@dataclass
+class OutboxConfig:
+    """Фоновая доставка уведомлений"""
+    poll_interval: float = 1.0  # Период проверки очереди, с
+    batch_size: int = 200  # Уведомлений за один проход
+    chat_batch_size: int = 3  # Уведомлений одного чата за проход
+    max_parallel_chats: int = 10  # Чатов, обрабатываемых одновременно
+    max_attempts: int = 8  # Попыток до окончательной неудачи
+    retry_base_delay: float = 5.0  # Первая пауза перед повтором, с (далее удваивается)
+    retry_max_delay: float = 3600.0  # Максимальная пауза перед повтором, с
+    flush_timeout: float = 10.0  # Сколько ждать доставки при остановке, с
+    failed_retention_days: int = 7  # Сколько хранить недоставленные уведомления
+
+
+@dataclass
+class PaymentInboxConfig:
+    """Входящая очередь webhook ЮKassa"""
+    poll_interval: float = 1.0  # Период проверки очереди, с
+    batch_size: int = 200  # Событий за один проход
+    max_parallel_payments: int = 10  # Платежей, обрабатываемых одновременно
+    max_attempts: int = 10  # Попыток до окончательной неудачи
+    retry_base_delay: float = 5.0  # Первая пауза перед повтором, с (далее удваивается)
+    retry_max_delay: float = 3600.0  # Максимальная пауза перед повтором, с
+    retention_days: int = 7  # Сколько хранить обработанные события (защита от повторов ЮKassa)
+    stop_timeout: float = 10.0  # Сколько ждать обработки при остановке, с
+
+
+@dataclass
+class PaymentReconcilerConfig:
+    """Сверка незавершённых платежей с ЮKassa (на случай потерянного webhook)"""
+    interval: float = 300.0  # Период сверки, с
+    min_age: float = 600.0  # Платёж моложе этого ещё ждёт webhook, с
+    batch_size: int = 100  # Платежей, читаемых из БД за раз
+    max_concurrent: int = 5  # Одновременных запросов статуса
+
+
+@dataclass
+class SenderConfig:
+    """Исходящие сообщения в Telegram"""
+    global_rate: float = 30.0  # Сообщений в секунду на всего бота
+    global_burst: int = 30  # Сообщений подряд без ожидания
+    chat_rate: float = 1.0  # Сообщений в секунду в один чат
+    chat_burst: int = 3  # Сообщений подряд в один чат
+    max_tracked_chats: int = 10000  # Чатов с отдельным учётом частоты
+    max_retries: int = 3  # Повторов отправки после RetryAfter
+    max_retry_wait: float = 60.0  # Более долгий RetryAfter не ждём - ошибка уходит вызывающему
+
+
+@dataclass
+class BroadcastConfig:
+    """Рассылки администратора"""
+    batch_size: int = 100  # Получателей, читаемых из БД за раз (прогресс сохраняется после пачки)
+    concurrency: int = 10  # Одновременных отправок одной рассылки
+    progress_interval: float = 5.0  # Период обновления сообщения с прогрессом, с
+    stop_timeout: float = 10.0  # Сколько ждать сохранения прогресса при остановке, с
+
+
+@dataclass
+class ExternalServiceConfig:
+    """Ограничения вызовов внешнего сервиса (bot/utils/resilience.py)"""
+    timeout: float  # Бюджет времени на вызов, с
+    max_concurrent: int  # Одновременных вызовов
+    queue_timeout: float = 1.0  # Сколько ждать свободного слота, с
+    hedge_after: float | None = None  # Через сколько повторить идемпотентный запрос параллельно, с
+    window_seconds: float = 30.0  # Окно подсчёта доли ошибок
+    min_calls: int = 10  # При меньшем числе вызовов в окне автомат не размыкается
+    error_rate: float = 0.5  # Доля ошибок, после которой вызовы отклоняются сразу
+    open_seconds: float = 30.0  # Через сколько пропустить пробный вызов
 
 
 @dataclass
@@ -67,6 +187,18 @@ class Config:
     prices: PriceConfig
     limits: LimitConfig
     geocoding: GeocodingConfig
+    concurrency: ConcurrencyConfig
+    throttle: ThrottleConfig
+    cache: CacheConfig
+    sharding: ShardingConfig
+    outbox: OutboxConfig
+    payment_inbox: PaymentInboxConfig
+    payment_reconciler: PaymentReconcilerConfig
+    sender: SenderConfig
+    broadcast: BroadcastConfig
+    geocoder_api: ExternalServiceConfig
+    yookassa_api: ExternalServiceConfig
+    yookassa_reconcile_api: ExternalServiceConfig
 
 
 def load_config() -> Config:
@@ -79,6 +211,9 @@ def load_config() -> Config:
     return Config(
         bot=BotConfig(
             token=os.getenv("BOT_TOKEN", ""),
+            webhook_url=os.getenv("TELEGRAM_WEBHOOK_URL", ""),
+            webhook_secret=os.getenv("TELEGRAM_WEBHOOK_SECRET", ""),
+            skip_pending_updates=os.getenv("SKIP_PENDING_UPDATES", "").lower() in ("1", "true", "yes"),
         ),
         db=DatabaseConfig(
             url=db_url,
@@ -87,6 +222,7 @@ def load_config() -> Config:
             shop_id=os.getenv("YOOKASSA_SHOP_ID", ""),
             secret_key=os.getenv("YOOKASSA_SECRET_KEY", ""),
             return_url=os.getenv("YOOKASSA_RETURN_URL", ""),
+            api_url=os.getenv("YOOKASSA_API_URL", "https://api.yookassa.ru/v3"),
         ),
         admin=AdminConfig(
             admin_id=int(os.getenv("ADMIN_ID", "411655143")),
@@ -97,6 +233,59 @@ def load_config() -> Config:
         geocoding=GeocodingConfig(
             api_key=os.getenv("YANDEX_GEOCODER_API_KEY", ""),
             web_app_url=os.getenv("WEB_APP_URL", "https://naumrabota.ru/web_apps/location_picker.html"),
+            api_url=os.getenv("YANDEX_GEOCODER_API_URL", "https://geocode-maps.yandex.ru/1.x/"),
+        ),
+        concurrency=ConcurrencyConfig(
+            max_in_flight=int(os.getenv("MAX_IN_FLIGHT_UPDATES", "25")),
+            max_queue=int(os.getenv("MAX_QUEUED_UPDATES", "500")),
+            drain_timeout=float(os.getenv("DRAIN_TIMEOUT", "25")),
+        ),
+        throttle=ThrottleConfig(
+            window_seconds=float(os.getenv("THROTTLE_WINDOW_SECONDS", "10")),
+            default_limit=int(os.getenv("THROTTLE_DEFAULT_LIMIT", "20")),
+            feed_limit=int(os.getenv("THROTTLE_FEED_LIMIT", "10")),
+            respond_limit=int(os.getenv("THROTTLE_RESPOND_LIMIT", "5")),
+            payment_limit=int(os.getenv("THROTTLE_PAYMENT_LIMIT", "3")),
+        ),
+        cache=CacheConfig(
+            user_ttl_seconds=float(os.getenv("USER_CACHE_TTL", "60")),
+            user_max_size=int(os.getenv("USER_CACHE_SIZE", "10000")),
+            vacancy_card_ttl_seconds=float(os.getenv("VACANCY_CARD_CACHE_TTL", "3600")),
+            vacancy_card_max_size=int(os.getenv("VACANCY_CARD_CACHE_SIZE", "5000")),
+        ),
+        sharding=ShardingConfig(
+            workers=int(os.getenv("SHARD_WORKERS", "0")),
+        ),
+        outbox=OutboxConfig(
+            poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", "1")),
+            batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "200")),
+            chat_batch_size=int(os.getenv("OUTBOX_CHAT_BATCH_SIZE", "3")),
+            max_parallel_chats=int(os.getenv("OUTBOX_MAX_PARALLEL_CHATS", "10")),
+            max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8")),
+            failed_retention_days=int(os.getenv("OUTBOX_FAILED_RETENTION_DAYS", "7")),
+        ),
+        payment_inbox=PaymentInboxConfig(),
+        payment_reconciler=PaymentReconcilerConfig(
+            interval=float(os.getenv("PAYMENT_RECONCILE_INTERVAL", "300")),
+        ),
+        sender=SenderConfig(
+            global_rate=float(os.getenv("SEND_RATE_LIMIT", "30")),
+        ),
+        broadcast=BroadcastConfig(),
+        geocoder_api=ExternalServiceConfig(
+            timeout=float(os.getenv("GEOCODER_TIMEOUT", "3")),
+            max_concurrent=20,
+            hedge_after=1.0,
+        ),
+        yookassa_api=ExternalServiceConfig(
+            timeout=float(os.getenv("YOOKASSA_TIMEOUT", "15")),
+            max_concurrent=10,
+        ),
+        # Сверка платежей - отдельные слоты и автомат, чтобы не мешать оплатам пользователей
+        yookassa_reconcile_api=ExternalServiceConfig(
+            timeout=float(os.getenv("YOOKASSA_TIMEOUT", "15")),
+            max_concurrent=5,
+            queue_timeout=30.0,
         ),
     )
 
@@ -1,5 +1,5 @@
 from bot.database.connection import async_session_maker, engine, init_db
-from bot.database.models import User, Vacancy, Payment, AdminLog
+from bot.database.models import User, Vacancy, Payment, AdminLog, Notification, BroadcastJob, GeocodeCache
 
 __all__ = [
     'async_session_maker',
@@ -9,4 +9,7 @@ __all__ = [
     'Vacancy',
     'Payment',
     'AdminLog',
+    'Notification',
+    'BroadcastJob',
+    'GeocodeCache',
 ]
@@ -1,10 +1,15 @@
 """Подключение к базе данных"""
 
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 from bot.config import config
 from bot.database.models import Base
 
+logger = logging.getLogger(__name__)
 
 # Создание асинхронного движка
 # Для SQLite не используем параметры пула
@@ -27,10 +32,48 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def _add_missing_columns(connection: Connection):
+    """
+    Добавление в существующие таблицы новых колонок моделей: nullable
+    или со server_default (create_all создаёт только отсутствующие таблицы)
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=connection.dialect)}"
+            if column.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+            elif not column.nullable:
+                logger.warning(f"Колонку {table.name}.{column.name} нужно добавить вручную")
+                continue
+            connection.execute(text(ddl))
+            logger.info(f"Добавлена колонка {table.name}.{column.name}")
+
+
+def _add_missing_indexes(connection: Connection):
+    """Создание в существующих таблицах новых индексов моделей"""
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                logger.info(f"Создан индекс {index.name}")
+
+
 async def init_db():
-    """Инициализация базы данных - создание всех таблиц"""
+    """Инициализация базы данных - создание всех таблиц, новых колонок и индексов"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_add_missing_indexes)
 
 
 async def close_db():
@@ -1,12 +1,26 @@
 """CRUD операции с базой данных"""
 
 from datetime import datetime, date, timedelta
-from typing import Optional, Sequence
-from sqlalchemy import select, func, and_, or_
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import select, update, delete, func, and_, or_, case
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database.models import User, Vacancy, Payment, AdminLog
+from bot.database.models import (
+    User, Vacancy, Payment, PaymentEvent, AdminLog, Notification, BroadcastJob, GeocodeCache
+)
 from bot.config import config
+from bot.utils import blocklist
+from bot.utils import user_cache
+from bot.utils.user_cache import UserProfile
+
+
+async def _save(session: AsyncSession, commit: bool) -> None:
+    """Коммит или, если изменение входит в транзакцию вызывающего, только flush"""
+    if commit:
+        await session.commit()
+    else:
+        await session.flush()
 
 
 # ============== USERS ==============
@@ -19,12 +33,42 @@ async def get_user(session: AsyncSession, telegram_id: int) -> Optional[User]:
     return result.scalar_one_or_none()
 
 
+async def _get_user_for_update(session: AsyncSession, user_id: int) -> Optional[User]:
+    """Пользователь с блокировкой строки до конца транзакции (SELECT ... FOR UPDATE)"""
+    result = await session.execute(
+        select(User).where(User.telegram_id == user_id).with_for_update()
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_user_profile(session: AsyncSession, telegram_id: int) -> Optional[UserProfile]:
+    """
+    Получение профиля пользователя через кэш (без запроса к БД при попадании).
+    
+    Подписка и счётчики (daily_views, free_vacancies_left) в профиль не
+    входят: их меняют и другие процессы (оплата в webhook-сервере), поэтому
+    они всегда читаются из БД.
+    """
+    profile = user_cache.users.get(telegram_id)
+    if profile is not None:
+        return profile
+    
+    epoch = user_cache.users.epoch
+    user = await get_user(session, telegram_id)
+    if not user:
+        return None
+    profile = UserProfile.from_user(user)
+    user_cache.users.put(telegram_id, profile, epoch)
+    return profile
+
+
 async def create_user(session: AsyncSession, telegram_id: int) -> User:
     """Создание нового пользователя"""
     user = User(telegram_id=telegram_id)
     session.add(user)
     await session.commit()
     await session.refresh(user)
+    user_cache.invalidate(telegram_id)
     return user
 
 
@@ -49,6 +93,9 @@ async def update_user(session: AsyncSession, telegram_id: int, **kwargs) -> Opti
     
     await session.commit()
     await session.refresh(user)
+    user_cache.invalidate(telegram_id)
+    if "is_blocked" in kwargs:
+        blocklist.set_blocked(user.telegram_id, user.is_blocked)
     return user
 
 
@@ -94,6 +141,40 @@ async def get_active_subscriptions_count(session: AsyncSession) -> int:
     return result.scalar() or 0
 
 
+async def mark_user_unreachable(session: AsyncSession, telegram_id: int) -> bool:
+    """
+    Отметка о недоступности пользователя (бот заблокирован или чат не найден)
+    
+    Returns:
+        True если пользователь был доступен
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.telegram_id == telegram_id, User.unreachable_since.is_(None))
+        .values(unreachable_since=datetime.utcnow())
+    )
+    await session.commit()
+    user_cache.invalidate(telegram_id)
+    return result.rowcount > 0
+
+
+async def mark_user_reachable(session: AsyncSession, telegram_id: int) -> bool:
+    """
+    Снятие отметки о недоступности (пользователь снова написал боту)
+    
+    Returns:
+        True если пользователь был недоступен
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.telegram_id == telegram_id, User.unreachable_since.is_not(None))
+        .values(unreachable_since=None)
+    )
+    await session.commit()
+    user_cache.invalidate(telegram_id)
+    return result.rowcount > 0
+
+
 # ============== VACANCIES ==============
 
 async def create_vacancy(session: AsyncSession, employer_id: int, **kwargs) -> Vacancy:
@@ -105,6 +186,42 @@ async def create_vacancy(session: AsyncSession, employer_id: int, **kwargs) -> V
     return vacancy
 
 
+async def create_vacancy_with_credit(session: AsyncSession, employer_id: int, **kwargs) -> Optional[Vacancy]:
+    """
+    Создание вакансии со списанием одной публикации с баланса работодателя
+    
+    Сначала тратятся бесплатные публикации месяца (в новом месяце их число
+    восстанавливается тем же запросом), затем оплаченные. Списание - один
+    условный UPDATE в транзакции вместе с созданием вакансии: одновременные
+    публикации не потратят одну публикацию дважды, а вакансия без списания
+    не появится.
+    
+    Returns:
+        Вакансия или None, если публикаций не осталось
+    """
+    month = date.today().replace(day=1)
+    new_month = or_(User.vacancies_reset_date.is_(None), User.vacancies_reset_date < month)
+    free = case((new_month, config.limits.free_vacancies_per_month), else_=User.free_vacancies_left)
+    result = await session.execute(
+        update(User)
+        .where(User.telegram_id == employer_id, or_(free > 0, User.paid_vacancy_credits > 0))
+        .values(
+            free_vacancies_left=case((free > 0, free - 1), else_=free),
+            paid_vacancy_credits=case((free > 0, User.paid_vacancy_credits), else_=User.paid_vacancy_credits - 1),
+            vacancies_reset_date=month,
+        )
+    )
+    if not result.rowcount:
+        await session.rollback()
+        return None
+    
+    vacancy = Vacancy(employer_id=employer_id, **kwargs)
+    session.add(vacancy)
+    await session.commit()
+    await session.refresh(vacancy)
+    return vacancy
+
+
 async def get_vacancy(session: AsyncSession, vacancy_id: int) -> Optional[Vacancy]:
     """Получение вакансии по ID"""
     result = await session.execute(
@@ -138,8 +255,10 @@ async def get_active_vacancies(session: AsyncSession) -> Sequence[Vacancy]:
     return result.scalars().all()
 
 
-async def update_vacancy(session: AsyncSession, vacancy_id: int, **kwargs) -> Optional[Vacancy]:
-    """Обновление вакансии"""
+async def update_vacancy(
+    session: AsyncSession, vacancy_id: int, commit: bool = True, **kwargs
+) -> Optional[Vacancy]:
+    """Обновление вакансии (с новой версией, чтобы кэш карточек перерисовал её)"""
     vacancy = await get_vacancy(session, vacancy_id)
     if not vacancy:
         return None
@@ -147,8 +266,9 @@ async def update_vacancy(session: AsyncSession, vacancy_id: int, **kwargs) -> Op
     for key, value in kwargs.items():
         if hasattr(vacancy, key):
             setattr(vacancy, key, value)
+    vacancy.version = Vacancy.version + 1
     
-    await session.commit()
+    await _save(session, commit)
     await session.refresh(vacancy)
     return vacancy
 
@@ -164,16 +284,19 @@ async def delete_vacancy(session: AsyncSession, vacancy_id: int) -> bool:
     return True
 
 
-async def boost_vacancy(session: AsyncSession, vacancy_id: int) -> Optional[Vacancy]:
+async def boost_vacancy(session: AsyncSession, vacancy_id: int, commit: bool = True) -> Optional[Vacancy]:
     """Поднятие вакансии"""
-    return await update_vacancy(session, vacancy_id, is_boosted=True)
+    return await update_vacancy(session, vacancy_id, commit=commit, is_boosted=True)
 
 
-async def pin_vacancy(session: AsyncSession, vacancy_id: int, days: int) -> Optional[Vacancy]:
+async def pin_vacancy(
+    session: AsyncSession, vacancy_id: int, days: int, commit: bool = True
+) -> Optional[Vacancy]:
     """Закрепление вакансии на указанное количество дней"""
     pinned_until = datetime.utcnow() + timedelta(days=days)
     return await update_vacancy(
         session, vacancy_id,
+        commit=commit,
         is_pinned=True,
         pinned_until=pinned_until
     )
@@ -307,6 +430,84 @@ async def mark_payment_canceled(session: AsyncSession, payment_id: int) -> Optio
     return payment
 
 
+async def settle_yookassa_payment(
+    session: AsyncSession,
+    yookassa_id: str,
+    status: str,
+    user_id: int,
+    payment_type: str,
+    amount: int,
+    vacancy_id: Optional[int] = None
+) -> Optional[Payment]:
+    """
+    Перевод платежа ЮKassa из pending в итоговый статус (без коммита).
+    
+    Статус меняется одним UPDATE ... WHERE status = 'pending': из одновременных
+    обработок одного события его меняет только одна, а строка остаётся
+    заблокированной до конца её транзакции. Если платежа ещё нет (webhook
+    пришёл раньше, чем бот сохранил платёж), запись создаётся сразу
+    в итоговом статусе.
+    
+    Returns:
+        Платёж, если статус изменила эта транзакция; None - платёж уже обработан
+    """
+    for attempt in range(2):
+        result = await session.execute(
+            update(Payment)
+            .where(Payment.yookassa_id == yookassa_id, Payment.status == "pending")
+            .values(status=status)
+        )
+        if result.rowcount:
+            return await get_payment_by_yookassa_id(session, yookassa_id)
+        if await get_payment_by_yookassa_id(session, yookassa_id) is not None:
+            return None
+        
+        payment = Payment(
+            user_id=user_id,
+            vacancy_id=vacancy_id,
+            payment_type=payment_type,
+            amount=amount,
+            yookassa_id=yookassa_id,
+            status=status
+        )
+        session.add(payment)
+        try:
+            await session.flush()
+            return payment
+        except IntegrityError:
+            # Запись одновременно создана другой транзакцией - повтор сравнения
+            await session.rollback()
+            if attempt:
+                raise
+    return None
+
+
+async def get_stale_pending_payments(
+    session: AsyncSession,
+    created_before: datetime,
+    after_id: int,
+    limit: int
+) -> Sequence[Payment]:
+    """
+    Незавершённые платежи ЮKassa, созданные раньше created_before
+    
+    Пачка по ключу (id > after_id) читается по индексу (status, id),
+    поэтому не зависит от общего числа платежей.
+    """
+    result = await session.execute(
+        select(Payment)
+        .where(
+            Payment.status == "pending",
+            Payment.id > after_id,
+            Payment.yookassa_id.is_not(None),
+            Payment.created_at < created_before,
+        )
+        .order_by(Payment.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
 async def get_payment_by_provider_id(session: AsyncSession, provider_payment_id: str) -> Optional[Payment]:
     """Получение платежа по ID провайдера"""
     result = await session.execute(
@@ -355,6 +556,116 @@ async def get_all_payments(
     return result.scalars().all()
 
 
+# ============== PAYMENT EVENTS (INBOX) ==============
+
+async def add_payment_event(session: AsyncSession, yookassa_id: str, event: str, payload: str) -> bool:
+    """
+    Сохранение события webhook во входящую очередь
+    
+    Returns:
+        True если событие новое; False - такое событие уже было принято
+    """
+    session.add(PaymentEvent(yookassa_id=yookassa_id, event=event, payload=payload))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        return False
+    return True
+
+
+async def get_pending_payment_events(session: AsyncSession, limit: int) -> Sequence[PaymentEvent]:
+    """
+    Получение готовых к обработке событий в порядке приёма
+    
+    От каждого платежа - только первое необработанное событие и только если
+    его время пришло: повторы одного платежа не задерживают остальные.
+    """
+    heads = (
+        select(
+            PaymentEvent.id,
+            func.row_number()
+            .over(partition_by=PaymentEvent.yookassa_id, order_by=PaymentEvent.id)
+            .label("position"),
+        )
+        .where(PaymentEvent.status == "pending")
+        .subquery()
+    )
+    result = await session.execute(
+        select(PaymentEvent)
+        .join(heads, PaymentEvent.id == heads.c.id)
+        .where(heads.c.position == 1, PaymentEvent.next_attempt_at <= datetime.utcnow())
+        .order_by(PaymentEvent.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def complete_payment_event(session: AsyncSession, event_id: int) -> None:
+    """Отметка об обработке события"""
+    await session.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.id == event_id)
+        .values(status="done", processed_at=datetime.utcnow())
+    )
+    await session.commit()
+
+
+async def reschedule_payment_event(
+    session: AsyncSession,
+    event_id: int,
+    next_attempt_at: datetime,
+    error: str,
+) -> None:
+    """Перенос события на повторную попытку"""
+    await session.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.id == event_id)
+        .values(next_attempt_at=next_attempt_at, last_error=error, attempts=PaymentEvent.attempts + 1)
+    )
+    await session.commit()
+
+
+async def fail_payment_event(session: AsyncSession, event_id: int, error: str) -> None:
+    """Окончательная неудача обработки события"""
+    await session.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.id == event_id)
+        .values(status="failed", attempts=PaymentEvent.attempts + 1, last_error=error)
+    )
+    await session.commit()
+
+
+async def retry_failed_payment_event(session: AsyncSession, yookassa_id: str, event: str, payload: str) -> bool:
+    """
+    Возврат окончательно не обработанного события в очередь (с новым объектом платежа)
+    
+    Returns:
+        True если событие было в статусе failed и снова ждёт обработки
+    """
+    result = await session.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.yookassa_id == yookassa_id, PaymentEvent.event == event, PaymentEvent.status == "failed")
+        .values(status="pending", attempts=0, next_attempt_at=datetime.utcnow(), payload=payload)
+    )
+    await session.commit()
+    return bool(result.rowcount)
+
+
+async def delete_processed_payment_events(session: AsyncSession, before: datetime) -> int:
+    """
+    Удаление обработанных событий, принятых раньше before
+    
+    Returns:
+        Количество удалённых событий
+    """
+    result = await session.execute(
+        delete(PaymentEvent).where(PaymentEvent.status == "done", PaymentEvent.received_at < before)
+    )
+    await session.commit()
+    return result.rowcount
+
+
 # ============== LIMITS ==============
 
 async def check_and_update_daily_views(session: AsyncSession, user_id: int) -> tuple[bool, int]:
@@ -392,7 +703,7 @@ async def check_and_update_daily_views(session: AsyncSession, user_id: int) -> t
 async def check_vacancy_limit(session: AsyncSession, user_id: int) -> tuple[bool, int]:
     """
     Проверка лимита вакансий работодателя.
-    Возвращает (has_free, remaining_free)
+    Возвращает (can_publish, remaining) - remaining включает оплаченные публикации
     """
     user = await get_user(session, user_id)
     if not user:
@@ -408,17 +719,34 @@ async def check_vacancy_limit(session: AsyncSession, user_id: int) -> tuple[bool
         user.vacancies_reset_date = first_of_month
         await session.commit()
     
-    return user.free_vacancies_left > 0, user.free_vacancies_left
+    remaining = user.free_vacancies_left + user.paid_vacancy_credits
+    return remaining > 0, remaining
 
 
-async def grant_free_vacancies(session: AsyncSession, user_id: int, count: int) -> Optional[User]:
+async def grant_free_vacancies(
+    session: AsyncSession, user_id: int, count: int, commit: bool = True
+) -> Optional[User]:
     """Выдача бесплатных вакансий работодателю"""
-    user = await get_user(session, user_id)
+    user = await _get_user_for_update(session, user_id)
     if not user:
         return None
     
     user.free_vacancies_left += count
-    await session.commit()
+    await _save(session, commit)
+    await session.refresh(user)
+    return user
+
+
+async def grant_vacancy_credits(
+    session: AsyncSession, user_id: int, count: int, commit: bool = True
+) -> Optional[User]:
+    """Начисление оплаченных публикаций вакансий (не сгорают при смене месяца)"""
+    user = await _get_user_for_update(session, user_id)
+    if not user:
+        return None
+    
+    user.paid_vacancy_credits += count
+    await _save(session, commit)
     await session.refresh(user)
     return user
 
@@ -433,19 +761,13 @@ async def get_user_payments(session: AsyncSession, user_id: int) -> Sequence[Pay
     return result.scalars().all()
 
 
-async def decrement_free_vacancies(session: AsyncSession, user_id: int) -> None:
-    """Уменьшение счетчика бесплатных вакансий"""
-    user = await get_user(session, user_id)
-    if user and user.free_vacancies_left > 0:
-        user.free_vacancies_left -= 1
-        await session.commit()
-
-
 # ============== SUBSCRIPTIONS ==============
 
-async def grant_subscription(session: AsyncSession, user_id: int, days: int) -> Optional[User]:
+async def grant_subscription(
+    session: AsyncSession, user_id: int, days: int, commit: bool = True
+) -> Optional[User]:
     """Выдача подписки пользователю"""
-    user = await get_user(session, user_id)
+    user = await _get_user_for_update(session, user_id)
     if not user:
         return None
     
@@ -457,7 +779,7 @@ async def grant_subscription(session: AsyncSession, user_id: int, days: int) ->
         # Новая подписка
         user.subscription_until = now + timedelta(days=days)
     
-    await session.commit()
+    await _save(session, commit)
     await session.refresh(user)
     return user
 
@@ -508,6 +830,14 @@ async def unblock_user(session: AsyncSession, user_id: int) -> Optional[User]:
     return await update_user(session, user_id, is_blocked=False)
 
 
+async def get_blocked_user_ids(session: AsyncSession) -> Sequence[int]:
+    """Получение telegram_id всех заблокированных пользователей"""
+    result = await session.execute(
+        select(User.telegram_id).where(User.is_blocked == True)
+    )
+    return result.scalars().all()
+
+
 async def get_today_responses_count(session: AsyncSession) -> int:
     """Получение количества откликов за сегодня"""
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -517,3 +847,273 @@ async def get_today_responses_count(session: AsyncSession) -> int:
         )
     )
     return result.scalar() or 0
+
+
+# ============== NOTIFICATIONS ==============
+
+async def create_notification(
+    session: AsyncSession,
+    chat_id: int,
+    text: str,
+    photo_id: Optional[str] = None,
+    reply_markup: Optional[str] = None,
+    commit: bool = True,
+) -> Notification:
+    """Постановка уведомления в outbox"""
+    notification = Notification(
+        chat_id=chat_id,
+        text=text,
+        photo_id=photo_id,
+        reply_markup=reply_markup,
+    )
+    session.add(notification)
+    await _save(session, commit)
+    return notification
+
+
+async def get_pending_notifications(
+    session: AsyncSession,
+    limit: int,
+    per_chat: int,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Sequence[Notification]:
+    """
+    Получение готовых к отправке уведомлений в порядке постановки
+    
+    От каждого чата - не больше per_chat первых уведомлений и только если
+    время первого пришло: длинная очередь одного чата или ожидающие повтора
+    уведомления не занимают пачку остальных чатов.
+    
+    Args:
+        per_chat: Уведомлений одного чата в пачке
+        shard: (номер, всего) - только чаты этого воркера в многопроцессном режиме
+    """
+    in_chat = {"partition_by": Notification.chat_id, "order_by": Notification.id}
+    ranked = select(
+        Notification.id,
+        func.row_number().over(**in_chat).label("position"),
+        func.first_value(Notification.next_attempt_at).over(**in_chat).label("head_attempt_at"),
+    ).where(Notification.status == "pending")
+    if shard is not None:
+        index, total = shard
+        ranked = ranked.where(Notification.chat_id % total == index)
+    ranked = ranked.subquery()
+    
+    result = await session.execute(
+        select(Notification)
+        .join(ranked, Notification.id == ranked.c.id)
+        .where(ranked.c.position <= per_chat, ranked.c.head_attempt_at <= datetime.utcnow())
+        .order_by(Notification.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def delete_notification(session: AsyncSession, notification_id: int) -> None:
+    """Удаление доставленного уведомления"""
+    await session.execute(delete(Notification).where(Notification.id == notification_id))
+    await session.commit()
+
+
+async def reschedule_notification(
+    session: AsyncSession,
+    notification_id: int,
+    next_attempt_at: datetime,
+    error: str,
+    count_attempt: bool = True,
+) -> None:
+    """Перенос уведомления на повторную попытку"""
+    values = {"next_attempt_at": next_attempt_at, "last_error": error}
+    if count_attempt:
+        values["attempts"] = Notification.attempts + 1
+    await session.execute(update(Notification).where(Notification.id == notification_id).values(**values))
+    await session.commit()
+
+
+async def delete_failed_notifications(session: AsyncSession, before: datetime) -> int:
+    """
+    Удаление окончательно не доставленных уведомлений, поставленных раньше before
+    
+    Returns:
+        Количество удалённых уведомлений
+    """
+    result = await session.execute(
+        delete(Notification).where(Notification.status == "failed", Notification.created_at < before)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def fail_notification(session: AsyncSession, notification_id: int, error: str) -> None:
+    """Окончательная неудача доставки уведомления"""
+    await session.execute(
+        update(Notification)
+        .where(Notification.id == notification_id)
+        .values(status="failed", attempts=Notification.attempts + 1, last_error=error)
+    )
+    await session.commit()
+
+
+# ============== BROADCASTS ==============
+
+def _broadcast_recipients_filter(role: Optional[str]):
+    """Условие отбора получателей рассылки (без заблокированных и недоступных)"""
+    condition = and_(User.is_blocked == False, User.unreachable_since.is_(None))
+    if role:
+        condition = and_(condition, User.role == role)
+    return condition
+
+
+async def get_broadcast_recipients_count(session: AsyncSession, role: Optional[str] = None) -> int:
+    """Количество получателей рассылки"""
+    result = await session.execute(
+        select(func.count(User.telegram_id)).where(_broadcast_recipients_filter(role))
+    )
+    return result.scalar() or 0
+
+
+async def get_broadcast_recipients(
+    session: AsyncSession,
+    role: Optional[str],
+    after_user_id: int,
+    limit: int,
+) -> Sequence[int]:
+    """
+    Следующая пачка получателей рассылки (keyset по telegram_id)
+    
+    Args:
+        after_user_id: Последний обработанный получатель
+    """
+    result = await session.execute(
+        select(User.telegram_id)
+        .where(_broadcast_recipients_filter(role), User.telegram_id > after_user_id)
+        .order_by(User.telegram_id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def create_broadcast_job(
+    session: AsyncSession,
+    admin_id: int,
+    role: Optional[str],
+    text: str,
+    total: int,
+    progress_chat_id: Optional[int] = None,
+    progress_message_id: Optional[int] = None,
+) -> BroadcastJob:
+    """Создание задания рассылки"""
+    job = BroadcastJob(
+        admin_id=admin_id,
+        role=role,
+        text=text,
+        total=total,
+        progress_chat_id=progress_chat_id,
+        progress_message_id=progress_message_id,
+    )
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+
+async def get_broadcast_job(session: AsyncSession, job_id: int) -> Optional[BroadcastJob]:
+    """Получение задания рассылки по ID"""
+    result = await session.execute(select(BroadcastJob).where(BroadcastJob.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def get_running_broadcast_jobs(
+    session: AsyncSession,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Sequence[BroadcastJob]:
+    """
+    Незавершённые (не на паузе) задания рассылки
+    
+    Args:
+        shard: (номер, всего) - только задания администраторов этого воркера
+    """
+    query = select(BroadcastJob).where(BroadcastJob.status == "running")
+    if shard is not None:
+        index, total = shard
+        query = query.where(BroadcastJob.admin_id % total == index)
+    result = await session.execute(query.order_by(BroadcastJob.id))
+    return result.scalars().all()
+
+
+async def checkpoint_broadcast_job(
+    session: AsyncSession,
+    job_id: int,
+    last_user_id: int,
+    sent: int,
+    failed: int,
+) -> None:
+    """Сохранение прогресса рассылки (sent и failed - прирост с прошлого сохранения)"""
+    await session.execute(
+        update(BroadcastJob)
+        .where(BroadcastJob.id == job_id)
+        .values(
+            last_user_id=last_user_id,
+            sent=BroadcastJob.sent + sent,
+            failed=BroadcastJob.failed + failed,
+        )
+    )
+    await session.commit()
+
+
+async def set_broadcast_job_status(
+    session: AsyncSession,
+    job_id: int,
+    status: str,
+    from_statuses: Sequence[str] = ("running", "paused"),
+) -> Optional[BroadcastJob]:
+    """
+    Смена статуса рассылки
+    
+    Статус меняется, только если текущий - из from_statuses (по умолчанию
+    завершённые и отменённые рассылки не меняют статус).
+    """
+    values = {"status": status}
+    if status in ("done", "cancelled"):
+        values["finished_at"] = datetime.utcnow()
+    await session.execute(
+        update(BroadcastJob)
+        .where(BroadcastJob.id == job_id, BroadcastJob.status.in_(from_statuses))
+        .values(**values)
+    )
+    await session.commit()
+    return await get_broadcast_job(session, job_id)
+
+
+# ============== GEOCODING ==============
+
+async def get_geocode_cache(session: AsyncSession, key: str) -> Optional[GeocodeCache]:
+    """Непросроченный ответ геокодера из кэша"""
+    result = await session.execute(
+        select(GeocodeCache).where(
+            GeocodeCache.key == key,
+            GeocodeCache.expires_at > datetime.utcnow()
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def save_geocode_cache(
+    session: AsyncSession,
+    key: str,
+    expires_at: datetime,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    address: Optional[str] = None,
+    found: bool = True,
+) -> None:
+    """Сохранение (или замена просроченного) ответа геокодера"""
+    await session.merge(GeocodeCache(
+        key=key,
+        latitude=latitude,
+        longitude=longitude,
+        address=address,
+        found=found,
+        expires_at=expires_at,
+    ))
+    await session.commit()
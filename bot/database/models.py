@@ -2,7 +2,7 @@
 
 from datetime import datetime, date
 from typing import Optional
-from sqlalchemy import BigInteger, String, Text, Float, Integer, Boolean, DateTime, Date, ForeignKey, Index
+from sqlalchemy import BigInteger, String, Text, Float, Integer, Boolean, DateTime, Date, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -33,13 +33,17 @@ class User(Base):
     last_view_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     current_index: Mapped[int] = mapped_column(Integer, default=0)
     
-    # Лимиты вакансий для работодателя
+    # Лимиты вакансий для работодателя: бесплатные публикации месяца и оплаченные (не сгорают)
     free_vacancies_left: Mapped[int] = mapped_column(Integer, default=2)
     vacancies_reset_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    paid_vacancy_credits: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     
     # Блокировка
     is_blocked: Mapped[bool] = mapped_column(Boolean, default=False)
     
+    # Пользователь заблокировал бота или удалил аккаунт (сбрасывается, когда он снова пишет боту)
+    unreachable_since: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
     # Даты
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     
@@ -93,6 +97,9 @@ class Vacancy(Base):
     # Статус
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     
+    # Версия (увеличивается при каждом изменении, ключ кэша карточек)
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
+    
     # Даты
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     
@@ -126,6 +133,35 @@ class Payment(Base):
     # Связи
     user: Mapped["User"] = relationship("User", back_populates="payments")
     vacancy: Mapped[Optional["Vacancy"]] = relationship("Vacancy", back_populates="payments")
+    
+    __table_args__ = (
+        # Сверка незавершённых платежей читает только их, а не всю таблицу
+        Index("ix_payments_status_id", "status", "id"),
+    )
+
+
+class PaymentEvent(Base):
+    """Входящее событие webhook ЮKassa (inbox): обрабатывается фоновым обработчиком"""
+    __tablename__ = "payment_events"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    yookassa_id: Mapped[str] = mapped_column(String(100))
+    event: Mapped[str] = mapped_column(String(50))  # payment.succeeded, payment.canceled
+    payload: Mapped[str] = mapped_column(Text)  # JSON объекта платежа из события
+    
+    status: Mapped[str] = mapped_column(String(20), default="pending")  # pending, done, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    received_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # Повторная доставка того же события не создаёт вторую запись
+        UniqueConstraint("yookassa_id", "event", name="uq_payment_events_yookassa_id_event"),
+        Index("ix_payment_events_status_id", "status", "id"),
+    )
 
 
 class AdminLog(Base):
@@ -137,3 +173,62 @@ class AdminLog(Base):
     action: Mapped[str] = mapped_column(String(100))
     details: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class Notification(Base):
+    """Исходящее уведомление (outbox): доставляется фоновым отправителем"""
+    __tablename__ = "notifications"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    
+    text: Mapped[str] = mapped_column(Text)  # Текст сообщения или подпись к фото
+    photo_id: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    reply_markup: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON inline-клавиатуры
+    
+    status: Mapped[str] = mapped_column(String(20), default="pending")  # pending, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_notifications_status_id", "status", "id"),
+    )
+
+
+class BroadcastJob(Base):
+    """Рассылка администратора: выполняется фоном и продолжается после перезапуска"""
+    __tablename__ = "broadcast_jobs"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    admin_id: Mapped[int] = mapped_column(BigInteger)
+    role: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)  # None - всем пользователям
+    text: Mapped[str] = mapped_column(Text)
+    
+    status: Mapped[str] = mapped_column(String(20), default="running")  # running, paused, cancelled, done
+    last_user_id: Mapped[int] = mapped_column(BigInteger, default=0)  # Получатели до него включительно обработаны
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    
+    # Сообщение администратору с прогрессом
+    progress_chat_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    progress_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class GeocodeCache(Base):
+    """Кэш ответов геокодера (прямого и обратного)"""
+    __tablename__ = "geocode_cache"
+    
+    # "address:<нормализованный адрес>" или "point:<широта>,<долгота>"
+    key: Mapped[str] = mapped_column(Text, primary_key=True)
+    latitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    longitude: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    address: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    found: Mapped[bool] = mapped_column(Boolean, default=True)  # False - геокодер ничего не нашёл
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
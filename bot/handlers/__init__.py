@@ -1,3 +1,4 @@
+from bot.handlers.callbacks import router as callbacks_router
 from bot.handlers.start import router as start_router
 from bot.handlers.worker import router as worker_router
 from bot.handlers.employer import router as employer_router
@@ -5,6 +6,7 @@ from bot.handlers.admin import router as admin_router
 from bot.handlers.payments import router as payments_router
 
 __all__ = [
+    'callbacks_router',
     'start_router',
     'worker_router',
     'employer_router',
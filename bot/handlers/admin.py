@@ -1,12 +1,13 @@
 """Хендлеры админ-панели"""
 
-from aiogram import Router, F, Bot
+from aiogram import Router, Bot
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
+from bot.handlers.callbacks import callbacks
 from bot.keyboards.admin import (
     get_admin_menu,
     get_admin_back_keyboard,
@@ -15,12 +16,17 @@ from bot.keyboards.admin import (
     get_subscription_management_keyboard,
     get_broadcast_target_keyboard,
     get_broadcast_confirm_keyboard,
+    get_broadcast_control_keyboard,
     get_vacancy_admin_keyboard,
 )
 from bot.keyboards.worker import get_worker_menu
 from bot.keyboards.employer import get_employer_menu
 from bot.utils import texts
+from bot.utils import callback_data as cb
+from bot.services import broadcast
+from bot.services.broadcast import render_progress
 from bot.services.statistics import get_bot_statistics
+from bot.utils import metrics
 from bot.states.employer_states import AdminBroadcastStates, AdminSearchStates, AdminSubscriptionStates
 from bot.config import config
 
@@ -107,7 +113,16 @@ async def cmd_admin(message: Message):
     )
 
 
-@router.callback_query(F.data == "admin:menu")
+@router.message(Command("metrics"))
+async def cmd_metrics(message: Message):
+    """Команда /metrics: показатели нагрузки бота"""
+    if not is_admin(message.from_user.id):
+        return
+    
+    await message.answer(f"📈 <b>Метрики</b>\n\n{metrics.format_snapshot()}")
+
+
+@callbacks.route(cb.ADMIN_MENU)
 async def show_admin_menu(callback: CallbackQuery, state: FSMContext):
     """Показ главного меню админа"""
     if not is_admin(callback.from_user.id):
@@ -130,7 +145,7 @@ async def show_admin_menu(callback: CallbackQuery, state: FSMContext):
         )
 
 
-@router.callback_query(F.data == "admin:exit")
+@callbacks.route(cb.ADMIN_EXIT)
 async def exit_admin(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
     """Выход из админ-панели"""
     await state.clear()
@@ -157,7 +172,7 @@ async def exit_admin(callback: CallbackQuery, session: AsyncSession, state: FSMC
 
 # ============== Статистика ==============
 
-@router.callback_query(F.data == "admin:stats")
+@callbacks.route(cb.ADMIN_STATS)
 async def show_statistics(callback: CallbackQuery, session: AsyncSession):
     """Показ статистики бота"""
     if not is_admin(callback.from_user.id):
@@ -189,7 +204,7 @@ async def show_statistics(callback: CallbackQuery, session: AsyncSession):
 
 # ============== Управление пользователями ==============
 
-@router.callback_query(F.data == "admin:users")
+@callbacks.route(cb.ADMIN_USERS)
 async def show_users_menu(callback: CallbackQuery):
     """Меню управления пользователями"""
     if not is_admin(callback.from_user.id):
@@ -203,7 +218,7 @@ async def show_users_menu(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data == "admin:list_workers")
+@callbacks.route(cb.ADMIN_LIST_WORKERS)
 async def show_workers_list(callback: CallbackQuery, session: AsyncSession):
     """Показ списка работников"""
     if not is_admin(callback.from_user.id):
@@ -234,7 +249,7 @@ async def show_workers_list(callback: CallbackQuery, session: AsyncSession):
     )
 
 
-@router.callback_query(F.data == "admin:list_employers")
+@callbacks.route(cb.ADMIN_LIST_EMPLOYERS)
 async def show_employers_list(callback: CallbackQuery, session: AsyncSession):
     """Показ списка работодателей"""
     if not is_admin(callback.from_user.id):
@@ -266,7 +281,7 @@ async def show_employers_list(callback: CallbackQuery, session: AsyncSession):
     )
 
 
-@router.callback_query(F.data == "admin:search_user")
+@callbacks.route(cb.ADMIN_SEARCH_USER)
 async def start_search_user(callback: CallbackQuery, state: FSMContext):
     """Начало поиска пользователя"""
     if not is_admin(callback.from_user.id):
@@ -337,14 +352,13 @@ async def process_search_user(message: Message, session: AsyncSession, state: FS
     )
 
 
-@router.callback_query(F.data.startswith("admin:block:"))
-async def block_user(callback: CallbackQuery, session: AsyncSession):
+@callbacks.route(cb.ADMIN_BLOCK)
+async def block_user(callback: CallbackQuery, user_id: int, session: AsyncSession):
     """Блокировка пользователя"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    user_id = int(callback.data.split(":")[2])
     await crud.block_user(session, user_id)
     
     await crud.log_admin_action(
@@ -364,14 +378,13 @@ async def block_user(callback: CallbackQuery, session: AsyncSession):
         )
 
 
-@router.callback_query(F.data.startswith("admin:unblock:"))
-async def unblock_user(callback: CallbackQuery, session: AsyncSession):
+@callbacks.route(cb.ADMIN_UNBLOCK)
+async def unblock_user(callback: CallbackQuery, user_id: int, session: AsyncSession):
     """Разблокировка пользователя"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    user_id = int(callback.data.split(":")[2])
     await crud.unblock_user(session, user_id)
     
     await crud.log_admin_action(
@@ -392,7 +405,7 @@ async def unblock_user(callback: CallbackQuery, session: AsyncSession):
 
 # ============== Управление подписками ==============
 
-@router.callback_query(F.data == "admin:subscriptions")
+@callbacks.route(cb.ADMIN_SUBSCRIPTIONS)
 async def show_subscriptions_menu(callback: CallbackQuery):
     """Меню управления подписками"""
     if not is_admin(callback.from_user.id):
@@ -406,7 +419,7 @@ async def show_subscriptions_menu(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data == "admin:grant_vacancies_menu")
+@callbacks.route(cb.ADMIN_GRANT_VACANCIES_MENU)
 async def start_grant_vacancies_from_menu(callback: CallbackQuery, state: FSMContext):
     """Начало выдачи бесплатных вакансий из меню подписок"""
     if not is_admin(callback.from_user.id):
@@ -421,7 +434,7 @@ async def start_grant_vacancies_from_menu(callback: CallbackQuery, state: FSMCon
     await state.set_state(AdminSubscriptionStates.waiting_for_employer_id)
 
 
-@router.callback_query(F.data == "admin:active_subs")
+@callbacks.route(cb.ADMIN_ACTIVE_SUBS)
 async def show_active_subscriptions(callback: CallbackQuery, session: AsyncSession):
     """Показ списка активных подписок"""
     if not is_admin(callback.from_user.id):
@@ -468,7 +481,7 @@ async def show_active_subscriptions(callback: CallbackQuery, session: AsyncSessi
     )
 
 
-@router.callback_query(F.data == "admin:grant_subscription")
+@callbacks.route(cb.ADMIN_GRANT_SUBSCRIPTION)
 async def start_grant_subscription(callback: CallbackQuery, state: FSMContext):
     """Начало выдачи подписки"""
     if not is_admin(callback.from_user.id):
@@ -614,14 +627,13 @@ async def process_grant_vacancies(message: Message, session: AsyncSession, state
     )
 
 
-@router.callback_query(F.data.startswith("admin:grant_sub:"))
-async def quick_grant_subscription(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(cb.ADMIN_GRANT_SUB)
+async def quick_grant_subscription(callback: CallbackQuery, user_id: int, state: FSMContext):
     """Быстрая выдача подписки из карточки пользователя"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    user_id = int(callback.data.split(":")[2])
     await callback.answer()
     await state.update_data(subscription_user_id=user_id)
     await callback.message.edit_text(
@@ -631,14 +643,13 @@ async def quick_grant_subscription(callback: CallbackQuery, state: FSMContext):
     await state.set_state(AdminSubscriptionStates.waiting_for_days)
 
 
-@router.callback_query(F.data.startswith("admin:grant_vacancies:"))
-async def start_grant_vacancies(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+@callbacks.route(cb.ADMIN_GRANT_VACANCIES)
+async def start_grant_vacancies(callback: CallbackQuery, user_id: int, session: AsyncSession, state: FSMContext):
     """Начало выдачи бесплатных вакансий работодателю"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    user_id = int(callback.data.split(":")[2])
     
     # Проверяем что это работодатель
     user = await crud.get_user(session, user_id)
@@ -655,10 +666,10 @@ async def start_grant_vacancies(callback: CallbackQuery, session: AsyncSession,
     await state.set_state(AdminSubscriptionStates.waiting_for_vacancies_count)
 
 
-@router.callback_query(F.data == "admin:back", AdminSubscriptionStates.waiting_for_user_id)
-@router.callback_query(F.data == "admin:back", AdminSubscriptionStates.waiting_for_days)
-@router.callback_query(F.data == "admin:back", AdminSubscriptionStates.waiting_for_vacancies_count)
-@router.callback_query(F.data == "admin:back", AdminSubscriptionStates.waiting_for_employer_id)
+@callbacks.route(cb.ADMIN_BACK, state=AdminSubscriptionStates.waiting_for_user_id)
+@callbacks.route(cb.ADMIN_BACK, state=AdminSubscriptionStates.waiting_for_days)
+@callbacks.route(cb.ADMIN_BACK, state=AdminSubscriptionStates.waiting_for_vacancies_count)
+@callbacks.route(cb.ADMIN_BACK, state=AdminSubscriptionStates.waiting_for_employer_id)
 async def cancel_subscription_grant(callback: CallbackQuery, state: FSMContext):
     """Отмена выдачи подписки/вакансий"""
     if not is_admin(callback.from_user.id):
@@ -673,14 +684,13 @@ async def cancel_subscription_grant(callback: CallbackQuery, state: FSMContext):
     )
 
 
-@router.callback_query(F.data.startswith("admin:cancel_sub:"))
-async def cancel_subscription(callback: CallbackQuery, session: AsyncSession):
+@callbacks.route(cb.ADMIN_CANCEL_SUB)
+async def cancel_subscription(callback: CallbackQuery, user_id: int, session: AsyncSession):
     """Отмена подписки пользователя"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    user_id = int(callback.data.split(":")[2])
     await crud.cancel_subscription(session, user_id)
     
     await crud.log_admin_action(
@@ -702,7 +712,7 @@ async def cancel_subscription(callback: CallbackQuery, session: AsyncSession):
 
 # ============== Управление вакансиями ==============
 
-@router.callback_query(F.data == "admin:vacancies")
+@callbacks.route(cb.ADMIN_VACANCIES)
 async def show_vacancies_admin(callback: CallbackQuery, session: AsyncSession):
     """Показ вакансий для админа"""
     if not is_admin(callback.from_user.id):
@@ -768,14 +778,13 @@ async def admin_vacancy_details(message: Message, session: AsyncSession):
     )
 
 
-@router.callback_query(F.data.startswith("admin:deactivate_vac:"))
-async def deactivate_vacancy_admin(callback: CallbackQuery, session: AsyncSession):
+@callbacks.route(cb.ADMIN_DEACTIVATE_VACANCY)
+async def deactivate_vacancy_admin(callback: CallbackQuery, vacancy_id: int, session: AsyncSession):
     """Деактивация вакансии админом"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    vacancy_id = int(callback.data.split(":")[2])
     await crud.update_vacancy(session, vacancy_id, is_active=False)
     
     await crud.log_admin_action(
@@ -791,14 +800,13 @@ async def deactivate_vacancy_admin(callback: CallbackQuery, session: AsyncSessio
     )
 
 
-@router.callback_query(F.data.startswith("admin:activate_vac:"))
-async def activate_vacancy_admin(callback: CallbackQuery, session: AsyncSession):
+@callbacks.route(cb.ADMIN_ACTIVATE_VACANCY)
+async def activate_vacancy_admin(callback: CallbackQuery, vacancy_id: int, session: AsyncSession):
     """Активация вакансии админом"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    vacancy_id = int(callback.data.split(":")[2])
     await crud.update_vacancy(session, vacancy_id, is_active=True)
     
     await crud.log_admin_action(
@@ -816,7 +824,7 @@ async def activate_vacancy_admin(callback: CallbackQuery, session: AsyncSession)
 
 # ============== История платежей ==============
 
-@router.callback_query(F.data == "admin:payments")
+@callbacks.route(cb.ADMIN_PAYMENTS)
 async def show_payments_admin(callback: CallbackQuery, session: AsyncSession):
     """Показ истории платежей"""
     if not is_admin(callback.from_user.id):
@@ -844,7 +852,7 @@ async def show_payments_admin(callback: CallbackQuery, session: AsyncSession):
 
 # ============== Логи ==============
 
-@router.callback_query(F.data == "admin:logs")
+@callbacks.route(cb.ADMIN_LOGS)
 async def show_admin_logs(callback: CallbackQuery, session: AsyncSession):
     """Показ логов действий админа"""
     if not is_admin(callback.from_user.id):
@@ -874,7 +882,7 @@ async def show_admin_logs(callback: CallbackQuery, session: AsyncSession):
 
 # ============== Рассылка ==============
 
-@router.callback_query(F.data == "admin:broadcast")
+@callbacks.route(cb.ADMIN_BROADCAST)
 async def start_broadcast(callback: CallbackQuery):
     """Начало рассылки"""
     if not is_admin(callback.from_user.id):
@@ -888,14 +896,13 @@ async def start_broadcast(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data.startswith("broadcast:"))
-async def process_broadcast_target(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(cb.BROADCAST)
+async def process_broadcast_target(callback: CallbackQuery, target: str, state: FSMContext):
     """Обработка выбора получателей"""
     if not is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
     
-    target = callback.data.split(":")[1]
     
     if target == "confirm":
         # Подтверждение отправки
@@ -943,7 +950,7 @@ async def process_broadcast_text(message: Message, session: AsyncSession, state:
 
 
 async def send_broadcast(callback: CallbackQuery, state: FSMContext):
-    """Отправка рассылки"""
+    """Запуск рассылки: задание выполняется фоном, прогресс обновляется в этом сообщении"""
     from bot.database.connection import async_session_maker
     
     data = await state.get_data()
@@ -955,46 +962,64 @@ async def send_broadcast(callback: CallbackQuery, state: FSMContext):
         return
     
     await callback.answer("Отправка началась...")
+    await state.clear()
     
-    # Создаем новую сессию для рассылки
+    role = None if target == "all" else "worker" if target == "workers" else "employer"
     async with async_session_maker() as session:
-        await _do_broadcast(callback, session, target, text, state)
+        total = await crud.get_broadcast_recipients_count(session, role=role)
+        job = await crud.create_broadcast_job(
+            session,
+            admin_id=callback.from_user.id,
+            role=role,
+            text=text,
+            total=total,
+            progress_chat_id=callback.message.chat.id,
+            progress_message_id=callback.message.message_id,
+        )
+    
+    await callback.message.edit_text(
+        render_progress(job),
+        reply_markup=get_broadcast_control_keyboard(job.id, job.status)
+    )
+    broadcast.engine.launch(job.id)
 
 
-async def _do_broadcast(callback: CallbackQuery, session: AsyncSession, target: str, text: str, state: FSMContext):
-    """Выполнение рассылки"""
-    role = None if target == "all" else "worker" if target == "workers" else "employer"
-    users = await crud.get_all_users(session, role=role)
-    
-    sent = 0
-    errors = 0
-    
-    for user in users:
-        if user.is_blocked:
-            continue
-        try:
-            await callback.bot.send_message(user.telegram_id, text)
-            sent += 1
-        except Exception:
-            errors += 1
+@callbacks.route(cb.BROADCAST_JOB)
+async def control_broadcast(callback: CallbackQuery, session: AsyncSession, action: str, job_id: int):
+    """Пауза, продолжение и отмена рассылки"""
+    if not is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
     
-    await crud.log_admin_action(
-        session,
-        callback.from_user.id,
-        "broadcast",
-        f"Рассылка: {target}, отправлено: {sent}, ошибок: {errors}"
-    )
+    if action == "pause":
+        job = await crud.set_broadcast_job_status(session, job_id, "paused")
+        broadcast.engine.halt(job_id)
+    elif action == "cancel":
+        job = await crud.set_broadcast_job_status(session, job_id, "cancelled")
+        broadcast.engine.halt(job_id)
+        if job is not None:
+            await crud.log_admin_action(
+                session,
+                callback.from_user.id,
+                "broadcast",
+                f"Рассылка #{job.id} отменена, отправлено: {job.sent}, ошибок: {job.failed}"
+            )
+    elif action == "resume":
+        job = await crud.set_broadcast_job_status(session, job_id, "running")
+        if job is not None and job.status == "running":
+            broadcast.engine.launch(job_id)
+    else:
+        job = await crud.get_broadcast_job(session, job_id)
     
-    await state.clear()
+    if job is None:
+        await callback.answer("Рассылка не найдена", show_alert=True)
+        return
     
-    # Пытаемся отредактировать, если не получается - отправляем новое сообщение
+    await callback.answer()
     try:
         await callback.message.edit_text(
-            f"✅ Рассылка завершена!\n\n📊 Отправлено: {sent}\n❌ Ошибок: {errors}",
-            reply_markup=get_admin_back_keyboard()
+            render_progress(job),
+            reply_markup=get_broadcast_control_keyboard(job.id, job.status)
         )
     except Exception:
-        await callback.message.answer(
-            f"✅ Рассылка завершена!\n\n📊 Отправлено: {sent}\n❌ Ошибок: {errors}",
-            reply_markup=get_admin_back_keyboard()
-        )
+        pass  # Прогресс не изменился
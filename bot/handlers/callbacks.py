@@ -0,0 +1,101 @@
+"""Маршрутизация callback-запросов по таблице префиксов"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from bot.utils.callback_data import SEPARATOR, CallbackRoute
+
+logger = logging.getLogger(__name__)
+
+# (состояние FSM или None, хендлер)
+_Entry = Tuple[Optional[str], CallableObject]
+
+
+class CallbackDispatcher:
+    """
+    Таблица callback_data -> хендлер.
+
+    Вместо последовательной проверки F.data-фильтров всех роутеров
+    callback_data разбирается один раз и хендлер находится по словарю:
+    сначала точное совпадение (маршруты без полей), затем префикс
+    из одной-двух частей (маршруты с полями). Значения полей
+    передаются в хендлер именованными аргументами.
+    """
+
+    def __init__(self, name: str = "callbacks"):
+        self._exact: Dict[str, List[_Entry]] = {}
+        self._prefixed: Dict[str, Tuple[CallbackRoute, List[_Entry]]] = {}
+        self._max_depth = 1
+        self.router = Router(name=name)
+        self.router.callback_query.register(self._dispatch)
+
+    def route(
+        self,
+        route: CallbackRoute,
+        state: Optional[State] = None,
+    ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+        """
+        Декоратор регистрации хендлера
+
+        Args:
+            route: Схема callback_data
+            state: Состояние FSM, в котором хендлер активен (None - в любом)
+        """
+        def wrapper(handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            entry = (state.state if state is not None else None, CallableObject(handler))
+            if route.fields:
+                _, entries = self._prefixed.setdefault(route.prefix, (route, []))
+                self._max_depth = max(self._max_depth, route.depth)
+            else:
+                entries = self._exact.setdefault(route.prefix, [])
+            # Хендлеры с конкретным состоянием проверяются раньше общих
+            entries.append(entry)
+            entries.sort(key=lambda item: item[0] is None)
+            return handler
+        return wrapper
+
+    def resolve(self, data: str) -> Optional[Tuple[List[_Entry], Dict[str, Any]]]:
+        """
+        Поиск хендлеров и разбор полей callback_data
+
+        Returns:
+            (хендлеры, значения полей) или None если маршрут не найден
+        """
+        entries = self._exact.get(data)
+        if entries is not None:
+            return entries, {}
+
+        parts = data.split(SEPARATOR)
+        for depth in range(min(self._max_depth, len(parts) - 1), 0, -1):
+            found = self._prefixed.get(SEPARATOR.join(parts[:depth]))
+            if found is None:
+                continue
+            route, entries = found
+            try:
+                return entries, route.unpack(parts[depth:])
+            except ValueError:
+                logger.warning(f"Некорректный callback_data: {data!r}")
+                return None
+        return None
+
+    async def _dispatch(self, callback: CallbackQuery, raw_state: Optional[str] = None, **kwargs: Any) -> Any:
+        """Единственный хендлер роутера: находит и вызывает нужный хендлер"""
+        resolved = self.resolve(callback.data) if callback.data else None
+        if resolved is None:
+            raise SkipHandler()
+
+        entries, fields = resolved
+        for state, handler in entries:
+            if state is None or state == raw_state:
+                return await handler.call(callback, raw_state=raw_state, **kwargs, **fields)
+        raise SkipHandler()
+
+
+callbacks = CallbackDispatcher()
+router = callbacks.router
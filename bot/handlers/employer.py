@@ -7,6 +7,7 @@ from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
+from bot.handlers.callbacks import callbacks
 from bot.keyboards.common import get_location_keyboard, get_location_method_keyboard
 from bot.keyboards.employer import (
     get_employer_menu,
@@ -18,6 +19,7 @@ from bot.keyboards.employer import (
     get_paid_services_keyboard,
 )
 from bot.utils import texts
+from bot.utils import callback_data as cb
 from bot.utils.validators import validate_description_length, validate_not_empty
 from bot.utils.message_manager import MessageManager
 from bot.services.geocoding import geocode_address
@@ -30,7 +32,7 @@ router = Router(name="employer")
 
 # ============== Меню работодателя ==============
 
-@router.callback_query(F.data == "employer:menu")
+@callbacks.route(cb.EMPLOYER_MENU)
 async def show_employer_menu(callback: CallbackQuery, state: FSMContext, bot: Bot):
     """Показ меню работодателя"""
     await state.clear()
@@ -66,7 +68,7 @@ async def show_employer_menu(callback: CallbackQuery, state: FSMContext, bot: Bo
 
 # ============== FSM: Создание вакансии ==============
 
-@router.callback_query(F.data == "employer:create_vacancy")
+@callbacks.route(cb.EMPLOYER_CREATE_VACANCY)
 async def start_create_vacancy(callback: CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot):
     """Начало создания вакансии"""
     user_id = callback.from_user.id
@@ -519,47 +521,8 @@ async def process_vacancy_photo(message: Message, session: AsyncSession, state:
     data = await state.get_data()
     user_id = message.from_user.id
     
-    # Проверка оплаты публикации вакансии
-    # Проверяем как через state, так и через БД (на случай если state потерян)
-    is_paid = False
-    
-    # Проверка через state
-    if data.get("pending_vacancy_payment"):
-        payment_id = data.get("pending_payment_id")
-        if payment_id:
-            from bot.database.models import Payment
-            from sqlalchemy import select
-            result = await session.execute(
-                select(Payment).where(Payment.id == payment_id)
-            )
-            payment = result.scalar_one_or_none()
-            if payment and payment.status == "succeeded":
-                is_paid = True
-    
-    # Если не нашли через state, проверяем в БД за последний час
-    if not is_paid:
-        from bot.database.models import Payment
-        from bot.services.payments import PaymentType
-        from sqlalchemy import select, and_
-        from datetime import datetime, timedelta
-        
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        result = await session.execute(
-            select(Payment).where(
-                and_(
-                    Payment.user_id == user_id,
-                    Payment.payment_type == PaymentType.VACANCY_PUBLICATION,
-                    Payment.status == "succeeded",
-                    Payment.created_at >= one_hour_ago
-                )
-            ).order_by(Payment.created_at.desc())
-        )
-        recent_payment = result.scalar_one_or_none()
-        if recent_payment:
-            is_paid = True
-    
-    # Создаем вакансию
-    vacancy = await crud.create_vacancy(
+    # Вакансия создаётся вместе со списанием публикации (бесплатной или оплаченной)
+    vacancy = await crud.create_vacancy_with_credit(
         session,
         employer_id=user_id,
         title=data.get("title"),
@@ -570,10 +533,13 @@ async def process_vacancy_photo(message: Message, session: AsyncSession, state:
         description=data.get("description"),
         photo_id=photo_id,
     )
-    
-    # Уменьшаем счетчик бесплатных вакансий только если не было оплаты
-    if not is_paid:
-        await crud.decrement_free_vacancies(session, user_id)
+    if vacancy is None:
+        # Публикации закончились - после оплаты достаточно отправить фото ещё раз
+        await message.answer(
+            texts.VACANCY_LIMIT_REACHED,
+            reply_markup=get_vacancy_limit_keyboard()
+        )
+        return
     
     await state.clear()
     await message.answer(
@@ -606,7 +572,7 @@ async def process_vacancy_photo_invalid(message: Message, state: FSMContext, bot
 
 # ============== Мои вакансии ==============
 
-@router.callback_query(F.data == "employer:my_vacancies")
+@callbacks.route(cb.EMPLOYER_MY_VACANCIES)
 async def show_my_vacancies(callback: CallbackQuery, session: AsyncSession):
     """Показ списка вакансий работодателя"""
     vacancies = await crud.get_employer_vacancies(session, callback.from_user.id)
@@ -652,17 +618,7 @@ async def show_my_vacancies(callback: CallbackQuery, session: AsyncSession):
 
 async def show_vacancy_details_helper(bot: Bot, user_id: int, vacancy):
     """Вспомогательная функция для показа вакансии"""
-    expires = vacancy.created_at + timedelta(days=config.limits.vacancy_lifetime_days)
-    details_text = texts.VACANCY_DETAILS.format(
-        title=vacancy.title,
-        city=vacancy.city,
-        salary=vacancy.salary,
-        description=vacancy.description,
-        views=vacancy.views_count,
-        responses=vacancy.responses_count,
-        created=vacancy.created_at.strftime("%d.%m.%Y"),
-        expires=expires.strftime("%d.%m.%Y")
-    )
+    details_text = vacancy_cards.get_card(vacancy).details(vacancy.views_count, vacancy.responses_count)
     
     if vacancy.photo_id:
         await bot.send_photo(
@@ -679,10 +635,9 @@ async def show_vacancy_details_helper(bot: Bot, user_id: int, vacancy):
         )
 
 
-@router.callback_query(F.data.startswith("vacancy:"))
-async def show_vacancy_details(callback: CallbackQuery, session: AsyncSession, bot: Bot):
+@callbacks.route(cb.VACANCY)
+async def show_vacancy_details(callback: CallbackQuery, vacancy_id: int, session: AsyncSession, bot: Bot):
     """Показ деталей вакансии"""
-    vacancy_id = int(callback.data.split(":")[1])
     vacancy = await crud.get_vacancy(session, vacancy_id)
     
     await callback.answer()
@@ -698,18 +653,7 @@ async def show_vacancy_details(callback: CallbackQuery, session: AsyncSession, b
         )
         return
     
-    expires = vacancy.created_at + timedelta(days=config.limits.vacancy_lifetime_days)
-    
-    details_text = texts.VACANCY_DETAILS.format(
-        title=vacancy.title,
-        city=vacancy.city,
-        salary=vacancy.salary,
-        description=vacancy.description,
-        views=vacancy.views_count,
-        responses=vacancy.responses_count,
-        created=vacancy.created_at.strftime("%d.%m.%Y"),
-        expires=expires.strftime("%d.%m.%Y")
-    )
+    details_text = vacancy_cards.get_card(vacancy).details(vacancy.views_count, vacancy.responses_count)
     
     # Добавляем статус
     status_parts = []
@@ -742,10 +686,9 @@ async def show_vacancy_details(callback: CallbackQuery, session: AsyncSession, b
 
 # ============== Управление вакансией ==============
 
-@router.callback_query(F.data.startswith("delete_vacancy:"))
-async def delete_vacancy(callback: CallbackQuery, session: AsyncSession):
+@callbacks.route(cb.DELETE_VACANCY)
+async def delete_vacancy(callback: CallbackQuery, vacancy_id: int, session: AsyncSession):
     """Удаление вакансии"""
-    vacancy_id = int(callback.data.split(":")[1])
     await crud.delete_vacancy(session, vacancy_id)
     await callback.answer(texts.VACANCY_DELETED)
     
@@ -770,10 +713,9 @@ async def delete_vacancy(callback: CallbackQuery, session: AsyncSession):
         )
 
 
-@router.callback_query(F.data.startswith("boost_vacancy:"))
-async def boost_vacancy(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(cb.BOOST_VACANCY)
+async def boost_vacancy(callback: CallbackQuery, vacancy_id: int, state: FSMContext):
     """Поднятие вакансии - запрос оплаты"""
-    vacancy_id = int(callback.data.split(":")[1])
     await callback.answer("Переход к оплате...")
     
     # Перенаправляем на оплату
@@ -781,8 +723,8 @@ async def boost_vacancy(callback: CallbackQuery, state: FSMContext):
     from bot.utils import texts
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=texts.BTN_PAY, callback_data=f"pay_boost:{vacancy_id}")],
-        [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data=f"vacancy:{vacancy_id}")],
+        [InlineKeyboardButton(text=texts.BTN_PAY, callback_data=cb.PAY_BOOST.pack(vacancy_id))],
+        [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data=cb.VACANCY.pack(vacancy_id))],
     ])
     
     try:
@@ -802,10 +744,9 @@ async def boost_vacancy(callback: CallbackQuery, state: FSMContext):
         )
 
 
-@router.callback_query(F.data.startswith("pin_vacancy:"))
-async def pin_vacancy(callback: CallbackQuery):
+@callbacks.route(cb.PIN_VACANCY)
+async def pin_vacancy(callback: CallbackQuery, vacancy_id: int):
     """Закрепление вакансии - выбор срока"""
-    vacancy_id = int(callback.data.split(":")[1])
     await callback.answer()
     
     try:
@@ -823,10 +764,9 @@ async def pin_vacancy(callback: CallbackQuery):
 
 # ============== Редактирование вакансии ==============
 
-@router.callback_query(F.data.startswith("edit_vacancy:"))
-async def start_edit_vacancy(callback: CallbackQuery):
+@callbacks.route(cb.EDIT_VACANCY)
+async def start_edit_vacancy(callback: CallbackQuery, vacancy_id: int):
     """Начало редактирования вакансии"""
-    vacancy_id = int(callback.data.split(":")[1])
     await callback.answer()
     
     try:
@@ -842,13 +782,9 @@ async def start_edit_vacancy(callback: CallbackQuery):
         )
 
 
-@router.callback_query(F.data.startswith("edit_vac:"))
-async def edit_vacancy_field(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(cb.EDIT_VACANCY_FIELD)
+async def edit_vacancy_field(callback: CallbackQuery, vacancy_id: int, field: str, state: FSMContext):
     """Редактирование поля вакансии"""
-    parts = callback.data.split(":")
-    vacancy_id = int(parts[1])
-    field = parts[2]
-    
     await callback.answer()
     await state.update_data(editing_vacancy_id=vacancy_id, editing_field=field)
     
@@ -920,10 +856,9 @@ async def edit_vacancy_field(callback: CallbackQuery, state: FSMContext):
         await state.set_state(EmployerEditStates.editing_salary)
 
 
-@router.callback_query(F.data.startswith("cancel_edit_vacancy:"))
-async def cancel_edit_vacancy(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+@callbacks.route(cb.CANCEL_EDIT_VACANCY)
+async def cancel_edit_vacancy(callback: CallbackQuery, vacancy_id: int, session: AsyncSession, state: FSMContext):
     """Отмена редактирования вакансии"""
-    vacancy_id = int(callback.data.split(":")[1])
     await state.clear()
     await callback.answer("Редактирование отменено")
     
@@ -1212,7 +1147,7 @@ async def save_edit_photo(message: Message, session: AsyncSession, state: FSMCon
 
 # ============== Платные услуги ==============
 
-@router.callback_query(F.data == "employer:paid_services")
+@callbacks.route(cb.EMPLOYER_PAID_SERVICES)
 async def show_paid_services(callback: CallbackQuery):
     """Показ информации о платных услугах"""
     await callback.answer()
@@ -1238,7 +1173,7 @@ async def show_paid_services(callback: CallbackQuery):
             pass
 
 
-@router.callback_query(F.data == "employer:my_payments")
+@callbacks.route(cb.EMPLOYER_MY_PAYMENTS)
 async def show_my_payments(callback: CallbackQuery, session: AsyncSession):
     """Показ истории покупок работодателя"""
     await callback.answer()
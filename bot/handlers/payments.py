@@ -1,13 +1,15 @@
 """Хендлеры платежей через ЮKassa"""
 
 import logging
-from aiogram import Router, F, Bot
+from aiogram import Router, Bot
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
+from bot.handlers.callbacks import callbacks
 from bot.utils import texts
+from bot.utils import callback_data as cb
 from bot.services.payments import (
     PaymentType,
     get_payment_amount,
@@ -20,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 # ============== Покупка подписки работника ==============
 
-@router.callback_query(F.data == "buy_subscription")
+@callbacks.route(cb.BUY_SUBSCRIPTION)
 async def buy_subscription(callback: CallbackQuery, session: AsyncSession, bot: Bot):
     """Покупка подписки работника"""
     await callback.answer()
@@ -60,7 +62,7 @@ async def buy_subscription(callback: CallbackQuery, session: AsyncSession, bot:
 
 # ============== Оплата публикации вакансии ==============
 
-@router.callback_query(F.data == "pay_vacancy_publication")
+@callbacks.route(cb.PAY_VACANCY_PUBLICATION)
 async def pay_vacancy_publication(callback: CallbackQuery, session: AsyncSession, state: FSMContext, bot: Bot):
     """Оплата публикации вакансии"""
     await callback.answer()
@@ -77,12 +79,6 @@ async def pay_vacancy_publication(callback: CallbackQuery, session: AsyncSession
             session=session
         )
         
-        # Сохраняем payment_id в state для последующей проверки
-        await state.update_data(
-            pending_payment_id=payment_data['db_payment_id'],
-            pending_vacancy_payment=True
-        )
-        
         # Отправка ссылки
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="💳 Оплатить", url=payment_data['confirmation_url'])],
@@ -104,10 +100,9 @@ async def pay_vacancy_publication(callback: CallbackQuery, session: AsyncSession
 
 # ============== Поднятие вакансии ==============
 
-@router.callback_query(F.data.startswith("pay_boost:"))
-async def pay_boost_vacancy(callback: CallbackQuery, session: AsyncSession, bot: Bot):
+@callbacks.route(cb.PAY_BOOST)
+async def pay_boost_vacancy(callback: CallbackQuery, vacancy_id: int, session: AsyncSession, bot: Bot):
     """Оплата поднятия вакансии"""
-    vacancy_id = int(callback.data.split(":")[1])
     await callback.answer()
     
     user_id = callback.from_user.id
@@ -133,7 +128,7 @@ async def pay_boost_vacancy(callback: CallbackQuery, session: AsyncSession, bot:
         # Отправка ссылки
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="💳 Оплатить", url=payment_data['confirmation_url'])],
-            [InlineKeyboardButton(text="❌ Отмена", callback_data=f"vacancy:{vacancy_id}")]
+            [InlineKeyboardButton(text="❌ Отмена", callback_data=cb.VACANCY.pack(vacancy_id))]
         ])
         
         # Проверяем, есть ли фото в сообщении
@@ -160,13 +155,9 @@ async def pay_boost_vacancy(callback: CallbackQuery, session: AsyncSession, bot:
 
 # ============== Закрепление вакансии ==============
 
-@router.callback_query(F.data.startswith("pin_duration:"))
-async def pay_pin_vacancy(callback: CallbackQuery, session: AsyncSession, bot: Bot):
+@callbacks.route(cb.PIN_DURATION)
+async def pay_pin_vacancy(callback: CallbackQuery, vacancy_id: int, days: int, session: AsyncSession, bot: Bot):
     """Оплата закрепления вакансии"""
-    parts = callback.data.split(":")
-    vacancy_id = int(parts[1])
-    days = int(parts[2])
-    
     await callback.answer()
     
     user_id = callback.from_user.id
@@ -203,7 +194,7 @@ async def pay_pin_vacancy(callback: CallbackQuery, session: AsyncSession, bot: B
         # Отправка ссылки
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="💳 Оплатить", url=payment_data['confirmation_url'])],
-            [InlineKeyboardButton(text="❌ Отмена", callback_data=f"vacancy:{vacancy_id}")]
+            [InlineKeyboardButton(text="❌ Отмена", callback_data=cb.VACANCY.pack(vacancy_id))]
         ])
         
         # Проверяем, есть ли фото в сообщении
@@ -1,16 +1,18 @@
 """Хендлер стартовой логики и выбора роли"""
 
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
+from bot.handlers.callbacks import callbacks
 from bot.keyboards.common import get_role_selection_keyboard
 from bot.keyboards.worker import get_worker_menu
 from bot.keyboards.employer import get_employer_menu
 from bot.utils import texts
+from bot.utils import callback_data as cb
 from bot.utils.message_manager import MessageManager
 from bot.states.worker_states import WorkerStates
 
@@ -25,14 +27,15 @@ async def cmd_start(message: Message, session: AsyncSession, state: FSMContext):
     await MessageManager.clear_all(state)
     
     user_id = message.from_user.id
-    user, is_new = await crud.get_or_create_user(session, user_id)
-    
-    # Проверка блокировки
-    if user.is_blocked:
-        await message.answer("❌ Ваш аккаунт заблокирован. Обратитесь в поддержку.")
+    user = await crud.get_user_profile(session, user_id)
+    if user is None:
+        await crud.create_user(session, user_id)
+    elif user.is_blocked:
+        # Проверка блокировки
+        await message.answer(texts.USER_BLOCKED)
         return
     
-    if is_new or not user.role:
+    if user is None or not user.role:
         # Новый пользователь - выбор роли
         await message.answer(
             texts.WELCOME_MESSAGE,
@@ -60,10 +63,9 @@ async def show_menu_by_role(message: Message, role: str, state: FSMContext):
         )
 
 
-@router.callback_query(F.data.startswith("role:"))
-async def process_role_selection(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+@callbacks.route(cb.ROLE)
+async def process_role_selection(callback: CallbackQuery, role: str, session: AsyncSession, state: FSMContext):
     """Обработка выбора роли"""
-    role = callback.data.split(":")[1]
     user_id = callback.from_user.id
     
     await crud.update_user(session, user_id, role=role)
@@ -75,7 +77,7 @@ async def process_role_selection(callback: CallbackQuery, session: AsyncSession,
     
     if role == "worker":
         # Работник должен заполнить резюме
-        user = await crud.get_user(session, user_id)
+        user = await crud.get_user_profile(session, user_id)
         if user and not user.is_resume_complete():
             await callback.message.edit_text(texts.WORKER_RESUME_START)
             await state.set_state(WorkerStates.waiting_for_name)
@@ -92,7 +94,7 @@ async def process_role_selection(callback: CallbackQuery, session: AsyncSession,
         )
 
 
-@router.callback_query(F.data == "change_role")
+@callbacks.route(cb.CHANGE_ROLE)
 async def process_change_role(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
     """Обработка смены роли"""
     await state.clear()
@@ -102,8 +104,8 @@ async def process_change_role(callback: CallbackQuery, session: AsyncSession, st
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=texts.BTN_WORKER, callback_data="role:worker")],
-        [InlineKeyboardButton(text=texts.BTN_EMPLOYER, callback_data="role:employer")],
+        [InlineKeyboardButton(text=texts.BTN_WORKER, callback_data=cb.ROLE.pack("worker"))],
+        [InlineKeyboardButton(text=texts.BTN_EMPLOYER, callback_data=cb.ROLE.pack("employer"))],
         [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data="menu")],
     ])
     
@@ -113,10 +115,10 @@ async def process_change_role(callback: CallbackQuery, session: AsyncSession, st
     )
 
 
-@router.callback_query(F.data == "menu")
+@callbacks.route(cb.MENU)
 async def process_menu(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
     """Возврат в меню"""
-    user = await crud.get_user(session, callback.from_user.id)
+    user = await crud.get_user_profile(session, callback.from_user.id)
     await callback.answer()
     
     if user and user.role:
@@ -137,22 +139,20 @@ async def process_menu(callback: CallbackQuery, session: AsyncSession, state: FS
         )
 
 
-@router.callback_query(F.data == "oferta")
+@callbacks.route(cb.OFERTA)
 async def process_oferta(callback: CallbackQuery, session: AsyncSession):
     """Показ оферты"""
     await callback.answer()
     from bot.config import config
     from bot.keyboards.common import get_menu_keyboard
     
-    user = await crud.get_user(session, callback.from_user.id)
-    
     await callback.message.answer(
         texts.OFERTA_MESSAGE.format(email=config.admin.support_email),
         reply_markup=get_menu_keyboard()
     )
 
 
-@router.callback_query(F.data == "support")
+@callbacks.route(cb.SUPPORT)
 async def process_support(callback: CallbackQuery, session: AsyncSession):
     """Показ контактов поддержки"""
     await callback.answer()
@@ -175,12 +175,12 @@ async def process_support(callback: CallbackQuery, session: AsyncSession):
     )
 
 
-@router.callback_query(F.data == "cancel")
+@callbacks.route(cb.CANCEL)
 async def process_cancel(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
     """Обработка отмены"""
     await state.clear()
     await MessageManager.clear_all(state)
-    user = await crud.get_user(session, callback.from_user.id)
+    user = await crud.get_user_profile(session, callback.from_user.id)
     await callback.answer("Действие отменено")
     
     if user and user.role == "worker":
@@ -1,16 +1,17 @@
 """Хендлеры для работника"""
 
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, InputMediaPhoto, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import crud
+from bot.handlers.callbacks import callbacks
 from bot.database.models import Vacancy
 from bot.keyboards.common import get_location_keyboard, get_location_method_keyboard
 from bot.keyboards.worker import (
     get_worker_menu,
-    get_vacancy_buttons,
     get_limit_reached_keyboard,
     get_subscription_keyboard,
     get_start_search_keyboard,
@@ -18,12 +19,15 @@ from bot.keyboards.worker import (
     get_no_vacancies_keyboard,
 )
 from bot.utils import texts
+from bot.utils import callback_data as cb
+from bot.utils import vacancy_cards
 from bot.utils.validators import validate_age, validate_resume_length, validate_not_empty
 from bot.utils.message_manager import MessageManager
 from bot.states.worker_states import WorkerStates, WorkerEditStates
 from bot.services.geo import get_nearby_vacancies, calculate_distance
 from bot.services.geocoding import geocode_address
 from bot.services.limits import check_daily_view_limit
+from bot.services import outbox
 from bot.config import config
 
 router = Router(name="worker")
@@ -350,7 +354,7 @@ async def process_photo_invalid(message: Message):
 
 # ============== Редактирование резюме ==============
 
-@router.callback_query(F.data == "worker:edit_resume")
+@callbacks.route(cb.WORKER_EDIT_RESUME)
 async def show_edit_resume(callback: CallbackQuery, session: AsyncSession, bot: Bot):
     """Показ меню редактирования резюме"""
     user = await crud.get_user(session, callback.from_user.id)
@@ -383,7 +387,7 @@ async def show_edit_resume(callback: CallbackQuery, session: AsyncSession, bot:
     )
 
 
-@router.callback_query(F.data == "worker:cancel_edit")
+@callbacks.route(cb.WORKER_CANCEL_EDIT)
 async def cancel_edit_resume(callback: CallbackQuery, session: AsyncSession, bot: Bot, state: FSMContext):
     """Отмена редактирования резюме"""
     data = await state.get_data()
@@ -430,12 +434,11 @@ async def cancel_edit_resume(callback: CallbackQuery, session: AsyncSession, bot
     )
 
 
-@router.callback_query(F.data.startswith("edit_resume:"))
-async def start_edit_field(callback: CallbackQuery, state: FSMContext):
+@callbacks.route(cb.EDIT_RESUME)
+async def start_edit_field(callback: CallbackQuery, field: str, state: FSMContext):
     """Начало редактирования поля резюме"""
     from bot.keyboards.worker import get_cancel_keyboard
     
-    field = callback.data.split(":")[1]
     await callback.answer()
     
     prompts = {
@@ -1092,7 +1095,7 @@ async def edit_photo(message: Message, session: AsyncSession, state: FSMContext,
     )
 
 
-@router.callback_query(F.data == "cancel_edit")
+@callbacks.route(cb.CANCEL_EDIT)
 async def cancel_edit(callback: CallbackQuery, state: FSMContext):
     """Отмена редактирования"""
     await state.clear()
@@ -1102,7 +1105,7 @@ async def cancel_edit(callback: CallbackQuery, state: FSMContext):
 
 # ============== Меню работника ==============
 
-@router.callback_query(F.data == "worker:menu")
+@callbacks.route(cb.WORKER_MENU)
 async def show_worker_menu(callback: CallbackQuery, state: FSMContext):
     """Показ меню работника"""
     await state.clear()
@@ -1129,10 +1132,10 @@ async def show_worker_menu(callback: CallbackQuery, state: FSMContext):
 
 # ============== Просмотр вакансий ==============
 
-@router.callback_query(F.data == "worker:view_vacancies")
+@callbacks.route(cb.WORKER_VIEW_VACANCIES)
 async def start_viewing_vacancies(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
     """Начало просмотра вакансий"""
-    user = await crud.get_user(session, callback.from_user.id)
+    user = await crud.get_user_profile(session, callback.from_user.id)
     await callback.answer()
     
     if not user:
@@ -1150,7 +1153,7 @@ async def start_viewing_vacancies(callback: CallbackQuery, session: AsyncSession
     await show_next_vacancy(callback.message, session, user.telegram_id, edit=True, state=state)
 
 
-@router.callback_query(F.data == "next_vacancy")
+@callbacks.route(cb.NEXT_VACANCY)
 async def next_vacancy(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
     """Показ следующей вакансии"""
     await callback.answer()
@@ -1233,14 +1236,25 @@ async def show_next_vacancy(
     if vacancy.is_boosted:
         await crud.reset_vacancy_boost(session, vacancy.id)
     
-    # Формируем сообщение
-    vacancy_text = texts.VACANCY_VIEW_TEMPLATE.format(
-        title=vacancy.title,
-        city=vacancy.city,
-        distance=distance,
-        salary=vacancy.salary,
-        description=vacancy.description
-    )
+    # Формируем сообщение (неизменные части карточки - из кэша)
+    card = vacancy_cards.get_card(vacancy)
+    
+    # Листание ленты: фото, подпись и кнопки меняются в той же карточке одним запросом
+    if edit and message.photo:
+        try:
+            await message.edit_media(
+                InputMediaPhoto(media=vacancy.photo_id, caption=card.caption(distance)),
+                reply_markup=card.buttons
+            )
+            vacancy_cards.record_edit()
+            return
+        except TelegramBadRequest as e:
+            if "message is not modified" in e.message:
+                # Та же вакансия (единственная в радиусе)
+                vacancy_cards.record_edit()
+                return
+            # Сообщение слишком старое или уже удалено - отправляем новое
+            vacancy_cards.record_edit_fallback()
     
     # Отправляем фото с текстом
     try:
@@ -1252,9 +1266,10 @@ async def show_next_vacancy(
     
     sent_message = await message.answer_photo(
         photo=vacancy.photo_id,
-        caption=vacancy_text,
-        reply_markup=get_vacancy_buttons(vacancy.id)
+        caption=card.caption(distance),
+        reply_markup=card.buttons
     )
+    vacancy_cards.record_send(api_calls=2 if edit else 1)
     
     # Явно помечаем сообщение как вакансию (не удалять)
     if state:
@@ -1263,10 +1278,9 @@ async def show_next_vacancy(
 
 # ============== Отклик на вакансию ==============
 
-@router.callback_query(F.data.startswith("respond:"))
-async def respond_to_vacancy(callback: CallbackQuery, session: AsyncSession, bot: Bot, state: FSMContext):
+@callbacks.route(cb.RESPOND)
+async def respond_to_vacancy(callback: CallbackQuery, vacancy_id: int, session: AsyncSession, bot: Bot, state: FSMContext):
     """Отклик на вакансию"""
-    vacancy_id = int(callback.data.split(":")[1])
     user = await crud.get_user(session, callback.from_user.id)
     vacancy = await crud.get_vacancy(session, vacancy_id)
     
@@ -1295,25 +1309,23 @@ async def respond_to_vacancy(callback: CallbackQuery, session: AsyncSession, bot
         resume=user.resume
     )
     
-    # Отправляем работодателю
-    try:
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-        
-        chat_keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(
-                text=texts.BTN_OPEN_CHAT,
-                url=f"tg://user?id={user.telegram_id}"
-            )]
-        ])
-        
-        await bot.send_photo(
-            vacancy.employer_id,
-            photo=user.photo_id,
-            caption=response_text,
-            reply_markup=chat_keyboard
-        )
-    except Exception as e:
-        pass  # Работодатель мог заблокировать бота
+    # Уведомление работодателю доставит outbox, работник не ждёт отправки
+    from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+    
+    chat_keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(
+            text=texts.BTN_OPEN_CHAT,
+            url=f"tg://user?id={user.telegram_id}"
+        )]
+    ])
+    
+    await outbox.enqueue(
+        session,
+        vacancy.employer_id,
+        response_text,
+        photo_id=user.photo_id,
+        reply_markup=chat_keyboard,
+    )
     
     # Уведомляем работника
     response_sent_message = await callback.message.answer(texts.RESPONSE_SENT)
@@ -1328,9 +1340,10 @@ async def respond_to_vacancy(callback: CallbackQuery, session: AsyncSession, bot
 
 # ============== Подписка ==============
 
-@router.callback_query(F.data == "worker:subscription")
+@callbacks.route(cb.WORKER_SUBSCRIPTION)
 async def show_subscription(callback: CallbackQuery, session: AsyncSession):
     """Показ информации о подписке"""
+    # Подписку могла только что выдать оплата в другом процессе - читаем из БД
     user = await crud.get_user(session, callback.from_user.id)
     await callback.answer()
     
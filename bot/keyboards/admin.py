@@ -2,6 +2,7 @@
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from bot.utils import texts
+from bot.utils import callback_data as cb
 
 
 def get_admin_menu() -> InlineKeyboardMarkup:
@@ -31,16 +32,16 @@ def get_user_management_keyboard(user_id: int, is_blocked: bool, user_role: str
     
     if user_role == "employer":
         # Для работодателей: выдача бесплатных вакансий
-        buttons.append([InlineKeyboardButton(text="📋 Выдать бесплатные вакансии", callback_data=f"admin:grant_vacancies:{user_id}")])
+        buttons.append([InlineKeyboardButton(text="📋 Выдать бесплатные вакансии", callback_data=cb.ADMIN_GRANT_VACANCIES.pack(user_id))])
     else:
         # Для работников: выдача подписки
-        buttons.append([InlineKeyboardButton(text="💳 Выдать подписку", callback_data=f"admin:grant_sub:{user_id}")])
-        buttons.append([InlineKeyboardButton(text="❌ Отменить подписку", callback_data=f"admin:cancel_sub:{user_id}")])
+        buttons.append([InlineKeyboardButton(text="💳 Выдать подписку", callback_data=cb.ADMIN_GRANT_SUB.pack(user_id))])
+        buttons.append([InlineKeyboardButton(text="❌ Отменить подписку", callback_data=cb.ADMIN_CANCEL_SUB.pack(user_id))])
     
     if is_blocked:
-        buttons.append([InlineKeyboardButton(text="✅ Разблокировать", callback_data=f"admin:unblock:{user_id}")])
+        buttons.append([InlineKeyboardButton(text="✅ Разблокировать", callback_data=cb.ADMIN_UNBLOCK.pack(user_id))])
     else:
-        buttons.append([InlineKeyboardButton(text="🚫 Заблокировать", callback_data=f"admin:block:{user_id}")])
+        buttons.append([InlineKeyboardButton(text="🚫 Заблокировать", callback_data=cb.ADMIN_BLOCK.pack(user_id))])
     
     buttons.append([InlineKeyboardButton(text=texts.BTN_BACK, callback_data="admin:users")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -69,9 +70,9 @@ def get_subscription_management_keyboard() -> InlineKeyboardMarkup:
 def get_broadcast_target_keyboard() -> InlineKeyboardMarkup:
     """Выбор получателей рассылки"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="👥 Всем пользователям", callback_data="broadcast:all")],
-        [InlineKeyboardButton(text="👤 Только работникам", callback_data="broadcast:workers")],
-        [InlineKeyboardButton(text="🧑‍💼 Только работодателям", callback_data="broadcast:employers")],
+        [InlineKeyboardButton(text="👥 Всем пользователям", callback_data=cb.BROADCAST.pack("all"))],
+        [InlineKeyboardButton(text="👤 Только работникам", callback_data=cb.BROADCAST.pack("workers"))],
+        [InlineKeyboardButton(text="🧑‍💼 Только работодателям", callback_data=cb.BROADCAST.pack("employers"))],
         [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data="admin:menu")],
     ])
 
@@ -79,21 +80,39 @@ def get_broadcast_target_keyboard() -> InlineKeyboardMarkup:
 def get_broadcast_confirm_keyboard() -> InlineKeyboardMarkup:
     """Подтверждение рассылки"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="✅ Отправить", callback_data="broadcast:confirm")],
+        [InlineKeyboardButton(text="✅ Отправить", callback_data=cb.BROADCAST.pack("confirm"))],
         [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data="admin:menu")],
     ])
 
 
+def get_broadcast_control_keyboard(job_id: int, status: str) -> InlineKeyboardMarkup:
+    """Управление идущей рассылкой"""
+    buttons = []
+    
+    if status == "running":
+        buttons.append([InlineKeyboardButton(text="⏸ Пауза", callback_data=cb.BROADCAST_JOB.pack("pause", job_id))])
+    elif status == "paused":
+        buttons.append([InlineKeyboardButton(text="▶️ Продолжить", callback_data=cb.BROADCAST_JOB.pack("resume", job_id))])
+    
+    if status in ("running", "paused"):
+        buttons.append([InlineKeyboardButton(text="🔄 Обновить", callback_data=cb.BROADCAST_JOB.pack("refresh", job_id))])
+        buttons.append([InlineKeyboardButton(text="⛔ Отменить", callback_data=cb.BROADCAST_JOB.pack("cancel", job_id))])
+    
+    buttons.append([InlineKeyboardButton(text=texts.BTN_BACK, callback_data="admin:menu")])
+    
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 def get_vacancy_admin_keyboard(vacancy_id: int, is_active: bool) -> InlineKeyboardMarkup:
     """Клавиатура администрирования вакансии"""
     buttons = []
     
     if is_active:
-        buttons.append([InlineKeyboardButton(text="🚫 Деактивировать", callback_data=f"admin:deactivate_vac:{vacancy_id}")])
+        buttons.append([InlineKeyboardButton(text="🚫 Деактивировать", callback_data=cb.ADMIN_DEACTIVATE_VACANCY.pack(vacancy_id))])
     else:
-        buttons.append([InlineKeyboardButton(text="✅ Активировать", callback_data=f"admin:activate_vac:{vacancy_id}")])
+        buttons.append([InlineKeyboardButton(text="✅ Активировать", callback_data=cb.ADMIN_ACTIVATE_VACANCY.pack(vacancy_id))])
     
-    buttons.append([InlineKeyboardButton(text="🗑 Удалить полностью", callback_data=f"admin:delete_vac:{vacancy_id}")])
+    buttons.append([InlineKeyboardButton(text="🗑 Удалить полностью", callback_data=cb.ADMIN_DELETE_VACANCY.pack(vacancy_id))])
     buttons.append([InlineKeyboardButton(text=texts.BTN_BACK, callback_data="admin:vacancies")])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
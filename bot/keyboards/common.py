@@ -2,14 +2,15 @@
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, WebAppInfo
 from bot.utils import texts
+from bot.utils import callback_data as cb
 from bot.config import config
 
 
 def get_role_selection_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора роли"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text=texts.BTN_WORKER, callback_data="role:worker")],
-        [InlineKeyboardButton(text=texts.BTN_EMPLOYER, callback_data="role:employer")],
+        [InlineKeyboardButton(text=texts.BTN_WORKER, callback_data=cb.ROLE.pack("worker"))],
+        [InlineKeyboardButton(text=texts.BTN_EMPLOYER, callback_data=cb.ROLE.pack("employer"))],
     ])
 
 
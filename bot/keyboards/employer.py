@@ -3,6 +3,7 @@
 from typing import Sequence
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from bot.utils import texts
+from bot.utils import callback_data as cb
 from bot.database.models import Vacancy
 
 
@@ -30,7 +31,7 @@ def get_my_vacancies_keyboard(vacancies: Sequence[Vacancy]) -> InlineKeyboardMar
         # Добавляем ID вакансии в текст
         text = f"{status}{pin}{boost} ID:{vacancy.id} {vacancy.title[:25]}"
         buttons.append([
-            InlineKeyboardButton(text=text, callback_data=f"vacancy:{vacancy.id}")
+            InlineKeyboardButton(text=text, callback_data=cb.VACANCY.pack(vacancy.id))
         ])
     
     buttons.append([InlineKeyboardButton(text=texts.BTN_BACK, callback_data="employer:menu")])
@@ -42,12 +43,12 @@ def get_vacancy_management_keyboard(vacancy_id: int, is_active: bool) -> InlineK
     buttons = []
     
     if is_active:
-        buttons.append([InlineKeyboardButton(text=texts.BTN_EDIT, callback_data=f"edit_vacancy:{vacancy_id}")])
+        buttons.append([InlineKeyboardButton(text=texts.BTN_EDIT, callback_data=cb.EDIT_VACANCY.pack(vacancy_id))])
         buttons.append([
-            InlineKeyboardButton(text=texts.BTN_BOOST, callback_data=f"boost_vacancy:{vacancy_id}"),
-            InlineKeyboardButton(text=texts.BTN_PIN, callback_data=f"pin_vacancy:{vacancy_id}"),
+            InlineKeyboardButton(text=texts.BTN_BOOST, callback_data=cb.BOOST_VACANCY.pack(vacancy_id)),
+            InlineKeyboardButton(text=texts.BTN_PIN, callback_data=cb.PIN_VACANCY.pack(vacancy_id)),
         ])
-        buttons.append([InlineKeyboardButton(text=texts.BTN_DELETE, callback_data=f"delete_vacancy:{vacancy_id}")])
+        buttons.append([InlineKeyboardButton(text=texts.BTN_DELETE, callback_data=cb.DELETE_VACANCY.pack(vacancy_id))])
     
     buttons.append([InlineKeyboardButton(text=texts.BTN_BACK, callback_data="employer:my_vacancies")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -56,10 +57,10 @@ def get_vacancy_management_keyboard(vacancy_id: int, is_active: bool) -> InlineK
 def get_pin_duration_keyboard(vacancy_id: int) -> InlineKeyboardMarkup:
     """Клавиатура выбора срока закрепления"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="1 день - 100 ₽", callback_data=f"pin_duration:{vacancy_id}:1")],
-        [InlineKeyboardButton(text="3 дня - 250 ₽", callback_data=f"pin_duration:{vacancy_id}:3")],
-        [InlineKeyboardButton(text="7 дней - 500 ₽", callback_data=f"pin_duration:{vacancy_id}:7")],
-        [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data=f"vacancy:{vacancy_id}")],
+        [InlineKeyboardButton(text="1 день - 100 ₽", callback_data=cb.PIN_DURATION.pack(vacancy_id, 1))],
+        [InlineKeyboardButton(text="3 дня - 250 ₽", callback_data=cb.PIN_DURATION.pack(vacancy_id, 3))],
+        [InlineKeyboardButton(text="7 дней - 500 ₽", callback_data=cb.PIN_DURATION.pack(vacancy_id, 7))],
+        [InlineKeyboardButton(text=texts.BTN_CANCEL, callback_data=cb.VACANCY.pack(vacancy_id))],
     ])
 
 
@@ -74,20 +75,20 @@ def get_vacancy_limit_keyboard() -> InlineKeyboardMarkup:
 def get_vacancy_edit_keyboard(vacancy_id: int) -> InlineKeyboardMarkup:
     """Клавиатура редактирования вакансии"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📌 Название", callback_data=f"edit_vac:{vacancy_id}:title")],
-        [InlineKeyboardButton(text="🏙 Город", callback_data=f"edit_vac:{vacancy_id}:city")],
-        [InlineKeyboardButton(text="📍 Геопозиция", callback_data=f"edit_vac:{vacancy_id}:location")],
-        [InlineKeyboardButton(text="💰 Зарплата", callback_data=f"edit_vac:{vacancy_id}:salary")],
-        [InlineKeyboardButton(text="📝 Описание", callback_data=f"edit_vac:{vacancy_id}:description")],
-        [InlineKeyboardButton(text="📷 Фото", callback_data=f"edit_vac:{vacancy_id}:photo")],
-        [InlineKeyboardButton(text=texts.BTN_BACK, callback_data=f"vacancy:{vacancy_id}")],
+        [InlineKeyboardButton(text="📌 Название", callback_data=cb.EDIT_VACANCY_FIELD.pack(vacancy_id, "title"))],
+        [InlineKeyboardButton(text="🏙 Город", callback_data=cb.EDIT_VACANCY_FIELD.pack(vacancy_id, "city"))],
+        [InlineKeyboardButton(text="📍 Геопозиция", callback_data=cb.EDIT_VACANCY_FIELD.pack(vacancy_id, "location"))],
+        [InlineKeyboardButton(text="💰 Зарплата", callback_data=cb.EDIT_VACANCY_FIELD.pack(vacancy_id, "salary"))],
+        [InlineKeyboardButton(text="📝 Описание", callback_data=cb.EDIT_VACANCY_FIELD.pack(vacancy_id, "description"))],
+        [InlineKeyboardButton(text="📷 Фото", callback_data=cb.EDIT_VACANCY_FIELD.pack(vacancy_id, "photo"))],
+        [InlineKeyboardButton(text=texts.BTN_BACK, callback_data=cb.VACANCY.pack(vacancy_id))],
     ])
 
 
 def get_cancel_edit_vacancy_keyboard(vacancy_id: int) -> InlineKeyboardMarkup:
     """Клавиатура с кнопкой отмены редактирования вакансии"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="❌ Отмена", callback_data=f"cancel_edit_vacancy:{vacancy_id}")],
+        [InlineKeyboardButton(text="❌ Отмена", callback_data=cb.CANCEL_EDIT_VACANCY.pack(vacancy_id))],
     ])
 
 
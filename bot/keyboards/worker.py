@@ -2,6 +2,7 @@
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from bot.utils import texts
+from bot.utils import callback_data as cb
 
 
 def get_worker_menu() -> InlineKeyboardMarkup:
@@ -22,7 +23,7 @@ def get_vacancy_buttons(vacancy_id: int) -> InlineKeyboardMarkup:
     """Кнопки под вакансией"""
     return InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text=texts.BTN_RESPOND, callback_data=f"respond:{vacancy_id}"),
+            InlineKeyboardButton(text=texts.BTN_RESPOND, callback_data=cb.RESPOND.pack(vacancy_id)),
             InlineKeyboardButton(text=texts.BTN_NEXT, callback_data="next_vacancy"),
         ],
         [InlineKeyboardButton(text=texts.BTN_MENU, callback_data="worker:menu")],
@@ -55,12 +56,12 @@ def get_start_search_keyboard() -> InlineKeyboardMarkup:
 def get_resume_edit_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура редактирования резюме"""
     return InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📛 Имя", callback_data="edit_resume:name")],
-        [InlineKeyboardButton(text="🎂 Возраст", callback_data="edit_resume:age")],
-        [InlineKeyboardButton(text="🏙 Город", callback_data="edit_resume:city")],
-        [InlineKeyboardButton(text="📍 Геопозиция", callback_data="edit_resume:location")],
-        [InlineKeyboardButton(text="📝 Резюме", callback_data="edit_resume:resume")],
-        [InlineKeyboardButton(text="📷 Фото", callback_data="edit_resume:photo")],
+        [InlineKeyboardButton(text="📛 Имя", callback_data=cb.EDIT_RESUME.pack("name"))],
+        [InlineKeyboardButton(text="🎂 Возраст", callback_data=cb.EDIT_RESUME.pack("age"))],
+        [InlineKeyboardButton(text="🏙 Город", callback_data=cb.EDIT_RESUME.pack("city"))],
+        [InlineKeyboardButton(text="📍 Геопозиция", callback_data=cb.EDIT_RESUME.pack("location"))],
+        [InlineKeyboardButton(text="📝 Резюме", callback_data=cb.EDIT_RESUME.pack("resume"))],
+        [InlineKeyboardButton(text="📷 Фото", callback_data=cb.EDIT_RESUME.pack("photo"))],
         [InlineKeyboardButton(text=texts.BTN_BACK, callback_data="worker:menu")],
     ])
 
@@ -3,6 +3,7 @@
 import asyncio
 import logging
 import sys
+import time
 from pathlib import Path
 
 # Добавляем корневую директорию проекта в PYTHONPATH
@@ -14,17 +15,28 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from bot.backlog import OffsetTracker, catch_up
 from bot.config import config
-from bot.database.connection import init_db, close_db
+from bot.database import crud
+from bot.database.connection import async_session_maker, init_db, close_db
+from bot.middlewares.blocklist_middleware import BlocklistMiddleware
+from bot.middlewares.concurrency_middleware import ConcurrencyMiddleware
 from bot.middlewares.db_middleware import DatabaseMiddleware
 from bot.middlewares.message_cleanup_middleware import MessageCleanupMiddleware
+from bot.middlewares.reachability_middleware import ReachabilityMiddleware
+from bot.middlewares.throttling_middleware import ThrottlingMiddleware
+from bot.middlewares.user_lock_middleware import UserLockMiddleware
 from bot.handlers import (
+    callbacks_router,
     start_router,
     worker_router,
     employer_router,
     admin_router,
     payments_router,
 )
+from bot.services import broadcast, geocoding, outbox, payments, reachability, yookassa_client
+from bot.utils import blocklist, metrics, send_scheduler, user_cache, vacancy_cards
+from bot.utils.concurrency import UpdateLimiter, UserSerializer
 
 # Настройка логирования
 logging.basicConfig(
@@ -39,65 +51,186 @@ async def on_startup(bot: Bot):
     logger.info("Инициализация базы данных...")
     await init_db()
     logger.info("База данных инициализирована")
+    
+    async with async_session_maker() as session:
+        blocklist.load(await crud.get_blocked_user_ids(session))
+    logger.info(f"Загружено заблокированных пользователей: {blocklist.stats()['blocked_users']}")
+
+
+async def drain_updates(limiter: UpdateLimiter, serializer: UserSerializer):
+    """
+    Первый шаг остановки: приём апдейтов уже прекращён, дожидаемся
+    обработки принятых (не дольше drain_timeout), чтобы не обрывать
+    хендлеры посреди транзакции
+    """
+    if limiter.idle and not serializer.active_users:
+        return
+    
+    logger.info(f"Ожидание обработки апдейтов: {limiter.in_flight} в работе, {limiter.queue_depth} в очереди")
+    deadline = time.monotonic() + config.concurrency.drain_timeout
+    while not limiter.idle or serializer.active_users:
+        if time.monotonic() >= deadline:
+            logger.warning(
+                f"Апдейты не обработаны за {config.concurrency.drain_timeout} с: "
+                f"{limiter.in_flight} в работе, {limiter.queue_depth} в очереди"
+            )
+            return
+        await asyncio.sleep(0.1)
+    logger.info("Все принятые апдейты обработаны")
 
 
 async def on_shutdown(bot: Bot):
-    """Действия при остановке бота"""
+    """Действия при остановке бота (последний шаг - после остальных shutdown-хуков)"""
     logger.info("Завершение работы...")
     await close_db()
     logger.info("Соединение с БД закрыто")
 
 
-async def main():
-    """Главная функция запуска бота"""
-    # Проверка токена
-    if not config.bot.token:
-        logger.error("BOT_TOKEN не установлен! Проверьте .env файл")
-        return
-    
-    # Создание бота
+def create_bot() -> Bot:
+    """Создание экземпляра бота (все отправки идут через планировщик лимитов)"""
     bot = Bot(
         token=config.bot.token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    
-    # Создание диспетчера
+    bot.session.middleware(send_scheduler.scheduler)
+    bot.session.middleware(reachability.tracker)
+    return bot
+
+
+def create_dispatcher() -> Dispatcher:
+    """Создание диспетчера с middleware, роутерами и хуками (общий для polling и webhook)"""
     dp = Dispatcher(storage=MemoryStorage())
     
-    # Регистрация middleware
+    # Заблокированные пользователи отсекаются до любой обработки
+    blocklist_middleware = BlocklistMiddleware()
+    dp.update.outer_middleware(blocklist_middleware)
+    metrics.register("blocklist", blocklist_middleware.stats)
+    
+    # Апдейты одного пользователя обрабатываются по очереди
+    serializer = UserSerializer()
+    dp.update.outer_middleware(UserLockMiddleware(serializer))
+    metrics.register("user_locks", serializer.stats)
+    
+    # Ограничение параллельной обработки апдейтов
+    limiter = UpdateLimiter(
+        max_in_flight=config.concurrency.max_in_flight,
+        max_queue=config.concurrency.max_queue,
+    )
+    dp.update.outer_middleware(ConcurrencyMiddleware(limiter))
+    metrics.register("updates", limiter.stats)
+    
+    # Регистрация middleware (ограничение частоты - до открытия сессии БД)
+    throttling = ThrottlingMiddleware(config.throttle)
+    dp.message.middleware(throttling)
+    dp.callback_query.middleware(throttling)
+    metrics.register("throttling", throttling.stats)
+    metrics.register("user_cache", user_cache.users.stats)
+    metrics.register("vacancy_cards", vacancy_cards.stats)
     dp.message.middleware(DatabaseMiddleware())
     dp.callback_query.middleware(DatabaseMiddleware())
+    reachability_middleware = ReachabilityMiddleware(reachability.tracker)
+    dp.message.middleware(reachability_middleware)
+    dp.callback_query.middleware(reachability_middleware)
+    metrics.register("reachability", reachability.tracker.stats)
     dp.message.middleware(MessageCleanupMiddleware())
     dp.callback_query.middleware(MessageCleanupMiddleware())
     
-    # Регистрация роутеров
+    # Регистрация роутеров (все callback-запросы идут через таблицу callbacks_router)
+    dp.include_router(callbacks_router)
     dp.include_router(start_router)
     dp.include_router(worker_router)
     dp.include_router(employer_router)
     dp.include_router(admin_router)
     dp.include_router(payments_router)
     
-    # Регистрация startup/shutdown хуков
+    # Передаются в startup/shutdown хуки
+    dp["limiter"] = limiter
+    dp["serializer"] = serializer
+    
+    # Регистрация startup/shutdown хуков (при остановке: дообработка апдейтов,
+    # затем фоновые очереди, закрытие БД - последним)
     dp.startup.register(on_startup)
+    dp.startup.register(outbox.sender.start)
+    dp.startup.register(broadcast.engine.start)
+    dp.shutdown.register(drain_updates)
+    dp.shutdown.register(broadcast.engine.stop)
+    dp.shutdown.register(outbox.sender.stop)
+    dp.shutdown.register(geocoding.close_http_session)
+    dp.shutdown.register(yookassa_client.client.close)
     dp.shutdown.register(on_shutdown)
+    metrics.register("outbox", outbox.sender.stats)
+    metrics.register("sender", send_scheduler.scheduler.stats)
+    metrics.register("broadcast", broadcast.engine.stats)
+    metrics.register("geocoding", geocoding.stats)
+    metrics.register("geocoder_api", geocoding.api.stats)
+    metrics.register("yookassa_api", payments.api.stats)
+    metrics.register("yookassa_client", yookassa_client.client.stats)
+    
+    return dp
+
+
+async def main():
+    """Главная функция запуска бота"""
+    # Проверка токена
+    if not config.bot.token:
+        logger.error("BOT_TOKEN не установлен! Проверьте .env файл")
+        return
+    
+    bot = create_bot()
+    dp = create_dispatcher()
+    
+    # Апдейты, накопившиеся за время остановки, обрабатываются до начала polling,
+    # а принятые при остановке - подтверждаются, чтобы не обработать их повторно
+    offsets = OffsetTracker()
+    dp.update.outer_middleware(offsets)
+    dp.shutdown.register(offsets.confirm)
+    if not config.bot.skip_pending_updates:
+        dp.startup.register(catch_up)
     
     logger.info("Запуск бота...")
     
     try:
         # Удаление вебхука и запуск polling
-        await bot.delete_webhook(drop_pending_updates=True)
+        await bot.delete_webhook(drop_pending_updates=config.bot.skip_pending_updates)
         await dp.start_polling(bot)
     finally:
         await bot.session.close()
 
 
+async def main_sharded():
+    """Многопроцессный запуск: приёмник апдейтов и воркеры по пользователям"""
+    if not config.bot.token:
+        logger.error("BOT_TOKEN не установлен! Проверьте .env файл")
+        return
+    
+    from bot.sharding import run_sharded
+    
+    bot = create_bot()
+    # Диспетчер нужен только чтобы узнать используемые типы апдейтов
+    allowed_updates = create_dispatcher().resolve_used_update_types()
+    
+    logger.info("Запуск бота в многопроцессном режиме...")
+    
+    try:
+        await bot.delete_webhook(drop_pending_updates=config.bot.skip_pending_updates)
+        await run_sharded(bot, allowed_updates=allowed_updates)
+    finally:
+        await bot.session.close()
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == 'webhook':
-        # Запуск только webhook сервера
+        # Запуск webhook сервера (ЮKassa, а при заданном TELEGRAM_WEBHOOK_URL - и апдейты Telegram)
         from bot.webhook import app
         import uvicorn
         logger.info("Запуск webhook сервера...")
         uvicorn.run(app, host="0.0.0.0", port=8000)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'sharded':
+        # Приёмник апдейтов и воркеры по числу ядер
+        try:
+            asyncio.run(main_sharded())
+        except KeyboardInterrupt:
+            pass
     else:
         # Запуск бота
         asyncio.run(main())
@@ -1,3 +1,15 @@
+from bot.middlewares.blocklist_middleware import BlocklistMiddleware
+from bot.middlewares.concurrency_middleware import ConcurrencyMiddleware
 from bot.middlewares.db_middleware import DatabaseMiddleware
+from bot.middlewares.reachability_middleware import ReachabilityMiddleware
+from bot.middlewares.throttling_middleware import ThrottlingMiddleware
+from bot.middlewares.user_lock_middleware import UserLockMiddleware
 
-__all__ = ['DatabaseMiddleware']
+__all__ = [
+    'BlocklistMiddleware',
+    'ConcurrencyMiddleware',
+    'DatabaseMiddleware',
+    'ReachabilityMiddleware',
+    'ThrottlingMiddleware',
+    'UserLockMiddleware',
+]
@@ -0,0 +1,47 @@
+"""Middleware отсечения заблокированных пользователей"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+
+from bot.config import config
+from bot.utils import blocklist
+from bot.utils import texts
+
+logger = logging.getLogger(__name__)
+
+
+class BlocklistMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для dp.update: апдейты заблокированных пользователей
+    отбрасываются до хендлеров и без запросов к БД
+    """
+
+    def __init__(self):
+        self.rejected = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        if user is None or not blocklist.is_blocked(user.id) or user.id == config.admin.admin_id:
+            return await handler(event, data)
+
+        self.rejected += 1
+        if isinstance(event, Update):
+            try:
+                if event.callback_query:
+                    await event.callback_query.answer(texts.USER_BLOCKED, show_alert=True)
+                elif event.message and event.message.text and event.message.text.startswith("/"):
+                    await event.message.answer(texts.USER_BLOCKED)
+            except Exception as e:
+                logger.debug(f"Не удалось уведомить заблокированного {user.id}: {e}")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {**blocklist.stats(), "rejected_updates": self.rejected}
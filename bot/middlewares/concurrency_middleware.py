@@ -0,0 +1,63 @@
+"""Middleware ограничения числа одновременно обрабатываемых апдейтов"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from bot.utils import callback_data as cb
+from bot.utils.concurrency import Priority, UpdateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def get_update_priority(update: Update) -> int:
+    """Определение приоритета апдейта"""
+    if update.pre_checkout_query:
+        return Priority.PAYMENT
+
+    if update.callback_query:
+        if cb.head(update.callback_query.data or "") in cb.PAYMENT_PREFIXES:
+            return Priority.PAYMENT
+        return Priority.CALLBACK
+
+    message = update.message
+    if message:
+        if message.successful_payment:
+            return Priority.PAYMENT
+        if message.text and message.text.startswith("/"):
+            return Priority.COMMAND
+
+    return Priority.TEXT
+
+
+class ConcurrencyMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для dp.update: не даёт обрабатывать одновременно
+    больше апдейтов, чем выдержит пул соединений БД
+    """
+
+    def __init__(self, limiter: UpdateLimiter):
+        self.limiter = limiter
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        priority = get_update_priority(event)
+        if not await self.limiter.acquire(priority):
+            logger.warning(
+                f"Апдейт {event.update_id} отброшен: очередь {self.limiter.queue_depth} "
+                f"(приоритет {priority})"
+            )
+            return None
+
+        processed = False
+        try:
+            result = await handler(event, data)
+            processed = True
+            return result
+        finally:
+            self.limiter.release(processed)
@@ -0,0 +1,36 @@
+"""Middleware снятия отметки о недоступности пользователя"""
+
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database import crud
+from bot.services.reachability import ReachabilityTracker
+
+
+class ReachabilityMiddleware(BaseMiddleware):
+    """
+    Пользователь, написавший боту или нажавший кнопку, снова доступен.
+
+    Регистрируется после DatabaseMiddleware; профиль берётся из кэша,
+    поэтому для доступных пользователей запросов к БД нет.
+    """
+
+    def __init__(self, tracker: ReachabilityTracker):
+        self.tracker = tracker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        session: AsyncSession = data.get("session")
+        if user is not None and session is not None:
+            profile = await crud.get_user_profile(session, user.id)
+            if profile is not None and not profile.reachable:
+                if await crud.mark_user_reachable(session, user.id):
+                    self.tracker.reachable_again()
+        return await handler(event, data)
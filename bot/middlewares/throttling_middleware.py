@@ -0,0 +1,80 @@
+"""Middleware ограничения частоты действий пользователя"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, CallbackQuery, User
+
+from bot.config import ThrottleConfig
+from bot.utils import callback_data as cb
+from bot.utils import texts
+from bot.utils.concurrency import SlidingWindowLimiter
+
+logger = logging.getLogger(__name__)
+
+# callback_data листания ленты вакансий
+FEED_CALLBACKS = frozenset((cb.NEXT_VACANCY.pack(), cb.WORKER_VIEW_VACANCIES.pack()))
+
+
+def get_action(event: TelegramObject) -> str:
+    """Определение вида действия для выбора лимита"""
+    if not isinstance(event, CallbackQuery) or not event.data:
+        return "default"
+    if event.data in FEED_CALLBACKS:
+        return "feed"
+    prefix = cb.head(event.data)
+    if prefix == cb.RESPOND.prefix:
+        return "respond"
+    if prefix in cb.PAYMENT_PREFIXES:
+        return "payment"
+    return "default"
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Middleware ограничения частоты действий по скользящему окну.
+
+    Регистрируется раньше DatabaseMiddleware, поэтому отклонённые
+    апдейты не открывают сессию БД.
+    """
+
+    def __init__(self, settings: ThrottleConfig):
+        self.limiters = {
+            action: SlidingWindowLimiter(limit, settings.window_seconds, settings.max_tracked_users)
+            for action, limit in (
+                ("default", settings.default_limit),
+                ("feed", settings.feed_limit),
+                ("respond", settings.respond_limit),
+                ("payment", settings.payment_limit),
+            )
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        action = get_action(event)
+        if self.limiters[action].hit(user.id):
+            return await handler(event, data)
+
+        logger.info(f"Пользователь {user.id} ограничен по частоте ({action})")
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer(texts.THROTTLED)
+            except Exception:
+                pass
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            f"{action}_{key}": value
+            for action, limiter in self.limiters.items()
+            for key, value in limiter.stats().items()
+        }
@@ -0,0 +1,56 @@
+"""Middleware последовательной обработки апдейтов одного пользователя"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware, Bot
+from aiogram.types import TelegramObject, Update, User
+
+from bot.utils.concurrency import UserSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class UserLockMiddleware(BaseMiddleware):
+    """
+    Outer-middleware для dp.update: апдейты пользователя обрабатываются
+    по одному, повторные нажатия той же кнопки отбрасываются.
+
+    Регистрируется раньше ConcurrencyMiddleware, чтобы ожидающие своей
+    очереди апдейты не занимали общие слоты обработки.
+    """
+
+    def __init__(self, serializer: UserSerializer):
+        self.serializer = serializer
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        callback = event.callback_query if isinstance(event, Update) else None
+        key = callback.data if callback else None
+
+        queue = self.serializer.enter(user.id, key)
+        if queue is None:
+            logger.debug(f"Повторный callback {key!r} от {user.id} отброшен")
+            bot: Bot = data["bot"]
+            try:
+                await bot.answer_callback_query(callback.id)
+            except Exception:
+                pass
+            return None
+
+        try:
+            async with queue.lock:
+                # Состояние FSM могло измениться, пока апдейт ждал очереди
+                state = data.get("state")
+                if state is not None:
+                    data["raw_state"] = await state.get_state()
+                return await handler(event, data)
+        finally:
+            self.serializer.leave(user.id, queue, key)
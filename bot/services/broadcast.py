@@ -0,0 +1,243 @@
+"""Рассылки администратора: фоновое выполнение с сохранением прогресса"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import BroadcastJob
+from bot.keyboards.admin import get_broadcast_control_keyboard
+from bot.services.reachability import is_unreachable_error
+from bot.utils import texts
+from bot.utils.send_scheduler import Lane, send_lane
+
+logger = logging.getLogger(__name__)
+
+
+def render_progress(job: BroadcastJob) -> str:
+    """Текст сообщения с прогрессом рассылки"""
+    if job.status == "done":
+        return texts.ADMIN_BROADCAST_DONE.format(sent=job.sent, errors=job.failed)
+    return texts.ADMIN_BROADCAST_PROGRESS.format(
+        job_id=job.id,
+        status=texts.BROADCAST_STATUSES.get(job.status, job.status),
+        processed=job.sent + job.failed,
+        total=job.total,
+        sent=job.sent,
+        errors=job.failed,
+    )
+
+
+class BroadcastEngine:
+    """
+    Выполнение рассылок в фоне.
+
+    Получатели читаются пачками по telegram_id (keyset), внутри пачки
+    отправляются параллельно (не больше concurrency) через планировщик
+    отправки по полосе рассылок. После каждой завершённой отправки в БД
+    сохраняется последний получатель, до которого все отправки завершены,
+    поэтому после паузы или перезапуска рассылка продолжается с места
+    остановки. При штатной остановке новые отправки не начинаются, а
+    начатые дожидаются сохранения прогресса (не дольше stop_timeout).
+    """
+
+    def __init__(self):
+        self.shard: Optional[Tuple[int, int]] = None  # (номер, всего) в многопроцессном режиме
+        self._bot: Optional[Bot] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._halted: Set[int] = set()  # Рассылки, поставленные на паузу или отменённые
+        self._relaunch: Set[int] = set()  # Продолженные, пока прежняя задача ещё завершалась
+        self._stopping = False
+
+        # Метрики
+        self._sent = 0
+        self._failed = 0
+        self._unreachable = 0
+
+    async def start(self, bot: Bot) -> None:
+        """Startup-хук: продолжение рассылок, прерванных остановкой"""
+        self._bot = bot
+        self._stopping = False
+        async with async_session_maker() as session:
+            jobs = await crud.get_running_broadcast_jobs(session, self.shard)
+        for job in jobs:
+            logger.info(f"Продолжение рассылки #{job.id} после получателя {job.last_user_id}")
+            self.launch(job.id)
+
+    async def stop(self) -> None:
+        """Shutdown-хук: остановка с сохранением прогресса (рассылки продолжатся после запуска)"""
+        self._stopping = True
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(list(self._tasks.values()), timeout=config.broadcast.stop_timeout)
+        if pending:
+            # Дальше закрываются очереди и БД - задачи не должны работать под ними
+            logger.warning(f"Рассылки не остановились за {config.broadcast.stop_timeout} с, прерываются")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def launch(self, job_id: int) -> None:
+        """Запуск (или продолжение) рассылки в фоне"""
+        self._halted.discard(job_id)
+        if job_id in self._tasks:
+            # Задача могла уже выйти из цикла после паузы - она перезапустится при завершении
+            self._relaunch.add(job_id)
+            return
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    def halt(self, job_id: int) -> None:
+        """Прекращение новых отправок рассылки (после паузы или отмены в БД)"""
+        self._halted.add(job_id)
+        self._relaunch.discard(job_id)
+
+    async def _run(self, job_id: int) -> None:
+        """Задача рассылки"""
+        try:
+            with send_lane(Lane.BULK):
+                await self._process(job_id)
+        except Exception as e:
+            logger.error(f"Broadcast #{job_id} error: {e}", exc_info=True)
+        finally:
+            self._tasks.pop(job_id, None)
+            if job_id in self._relaunch:
+                self._relaunch.discard(job_id)
+                if not self._stopping:
+                    self.launch(job_id)
+
+    async def _process(self, job_id: int) -> None:
+        """Обработка пачек получателей до завершения, паузы или остановки"""
+        slots = asyncio.Semaphore(config.broadcast.concurrency)
+        progress_at = time.monotonic()
+
+        while not self._stopping:
+            async with async_session_maker() as session:
+                job = await crud.get_broadcast_job(session, job_id)
+                if job is None or job.status != "running":
+                    break
+                recipients = await crud.get_broadcast_recipients(
+                    session, job.role, job.last_user_id, config.broadcast.batch_size
+                )
+            if not recipients:
+                async with async_session_maker() as session:
+                    job = await crud.set_broadcast_job_status(session, job_id, "done", ("running",))
+                    if job is None or job.status != "done":
+                        break  # Поставлена на паузу или отменена после чтения
+                    await crud.log_admin_action(
+                        session,
+                        job.admin_id,
+                        "broadcast",
+                        f"Рассылка #{job.id}: {job.role or 'all'}, отправлено: {job.sent}, ошибок: {job.failed}"
+                    )
+                logger.info(f"Рассылка #{job_id} завершена: отправлено {job.sent}, ошибок {job.failed}")
+                break
+
+            if not await self._send_batch(job_id, recipients, job.text, slots):
+                break
+
+            if time.monotonic() - progress_at >= config.broadcast.progress_interval:
+                progress_at = time.monotonic()
+                await self.show_progress(job_id)
+
+        await self.show_progress(job_id)
+
+    async def _send_batch(
+        self,
+        job_id: int,
+        recipients: Sequence[int],
+        text: str,
+        slots: asyncio.Semaphore,
+    ) -> int:
+        """
+        Отправка пачки получателям по порядку с сохранением прогресса
+
+        Отправки завершаются не по порядку, поэтому сохраняется последний
+        получатель, до которого завершены все отправки: после сбоя повторно
+        получат сообщение не больше concurrency получателей.
+
+        Returns:
+            Количество начатых отправок (всегда начало пачки)
+        """
+        results: List[Optional[bool]] = []
+        saved = 0  # Получателей начала пачки, учтённых в прогрессе
+        checkpoint = asyncio.Lock()
+
+        async def send(position: int, user_id: int) -> None:
+            nonlocal saved
+            results[position] = await self._send(user_id, text, slots)
+            async with checkpoint:
+                done = saved
+                while done < len(results) and results[done] is not None:
+                    done += 1
+                if done == saved:
+                    return
+                sent = sum(results[saved:done])
+                async with async_session_maker() as session:
+                    await crud.checkpoint_broadcast_job(
+                        session, job_id, recipients[done - 1], sent, done - saved - sent
+                    )
+                saved = done
+
+        tasks = []
+        for user_id in recipients:
+            if self._stopping or job_id in self._halted:
+                break
+            await slots.acquire()
+            results.append(None)
+            tasks.append(asyncio.create_task(send(len(results) - 1, user_id)))
+        await asyncio.gather(*tasks)
+        return len(tasks)
+
+    async def _send(self, user_id: int, text: str, slots: asyncio.Semaphore) -> bool:
+        """Отправка одному получателю"""
+        try:
+            await self._bot.send_message(user_id, text)
+            self._sent += 1
+            return True
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Бот заблокирован или чат не существует - получатель отмечен недоступным
+            if is_unreachable_error(e):
+                self._unreachable += 1
+            self._failed += 1
+            return False
+        except Exception as e:
+            logger.warning(f"Broadcast message to {user_id} failed: {e}")
+            self._failed += 1
+            return False
+        finally:
+            slots.release()
+
+    async def show_progress(self, job_id: int) -> None:
+        """Обновление сообщения администратора с прогрессом"""
+        async with async_session_maker() as session:
+            job = await crud.get_broadcast_job(session, job_id)
+        if job is None or job.progress_message_id is None:
+            return
+        try:
+            await self._bot.edit_message_text(
+                render_progress(job),
+                chat_id=job.progress_chat_id,
+                message_id=job.progress_message_id,
+                reply_markup=get_broadcast_control_keyboard(job.id, job.status),
+            )
+        except Exception:
+            pass  # Текст не изменился или сообщение удалено
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "active_jobs": len(self._tasks),
+            "sent": self._sent,
+            "failed": self._failed,
+            "unreachable": self._unreachable,
+        }
+
+
+# Рассылки текущего процесса
+engine = BroadcastEngine()
@@ -0,0 +1,155 @@
+"""Офлайн-справочник населённых пунктов: геокодинг на уровне города без обращения к API"""
+
+import math
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from bot.services.geo import calculate_distance
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "settlements.tsv"
+
+# Слова, которые не мешают считать ввод названием города ("г. Казань", "Казань, Россия")
+_CITY_PREFIXES = ("город ", "г. ", "г.", "г ")
+_COUNTRY = {"россия", "рф", "российская федерация"}
+
+
+def normalize_name(text: str) -> str:
+    """Название для поиска: без регистра, "ё", дефисов и лишних пробелов"""
+    text = text.lower().replace("ё", "е").replace("-", " ")
+    return " ".join(text.split()).strip(" ,.")
+
+
+@dataclass(frozen=True)
+class Settlement:
+    """Населённый пункт справочника"""
+    name: str
+    region: str
+    latitude: float
+    longitude: float
+    population: int  # Тыс. жителей
+
+    @property
+    def point(self) -> Tuple[float, float]:
+        return (self.latitude, self.longitude)
+
+    @property
+    def address(self) -> str:
+        """Адрес для обратного геокодинга"""
+        if self.region == self.name:
+            return f"Россия, {self.name}"
+        return f"Россия, {self.region}, {self.name}"
+
+
+class Gazetteer:
+    """
+    Поиск населённого пункта по названию и ближайшего к точке.
+
+    Названия (и другие имена: "спб", "питер") хранятся в словаре,
+    при совпадении названий выигрывает крупный город. Координаты хранятся
+    в массивах, для поиска ближайшего точки разложены по сетке ячеек
+    в 1 градус: проверяются только ячейки в пределах радиуса.
+    """
+
+    def __init__(self, rows: List[Tuple[Settlement, List[str]]]):
+        rows = sorted(rows, key=lambda row: -row[0].population)
+        self.settlements = [settlement for settlement, _ in rows]
+        self._latitudes = array("d", (s.latitude for s in self.settlements))
+        self._longitudes = array("d", (s.longitude for s in self.settlements))
+        self._names: Dict[str, int] = {}
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+
+        for index, (settlement, aliases) in enumerate(rows):
+            for name in (settlement.name, *aliases):
+                # Порядок по убыванию населения: одноимённый крупный город не перезаписывается
+                self._names.setdefault(normalize_name(name), index)
+            cell = (math.floor(settlement.latitude), math.floor(settlement.longitude))
+            self._grid.setdefault(cell, []).append(index)
+
+    @classmethod
+    def load(cls, path: Path = DATA_PATH) -> "Gazetteer":
+        """Загрузка справочника из TSV (название, регион, широта, долгота, население, другие имена)"""
+        rows = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, region, lat, lon, population, aliases = line.rstrip("\n").split("\t")
+                settlement = Settlement(name, region, float(lat), float(lon), int(population))
+                rows.append((settlement, [alias for alias in aliases.split(",") if alias]))
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.settlements)
+
+    def _by_name(self, text: str) -> Optional[Settlement]:
+        """Населённый пункт по точному названию (с "г." / "город" или без)"""
+        name = normalize_name(text)
+        for prefix in _CITY_PREFIXES:
+            if name.startswith(prefix):
+                name = name[len(prefix):].lstrip()
+                break
+        index = self._names.get(name)
+        return None if index is None else self.settlements[index]
+
+    def find(self, query: str) -> Optional[Settlement]:
+        """
+        Населённый пункт, если весь ввод - его название
+
+        Допускаются страна и регион через запятую ("Химки, Московская обл.").
+        Адреса с улицей не подходят: для них нужен точный геокодинг.
+        """
+        parts = [part for part in query.split(",") if normalize_name(part) not in _COUNTRY]
+        if not parts or len(parts) > 2:
+            return None
+        for position, part in enumerate(parts):
+            settlement = self._by_name(part)
+            if settlement is None:
+                continue
+            rest = parts[1 - position] if len(parts) == 2 else None
+            if rest is None or self._is_region(settlement, rest):
+                return settlement
+        return None
+
+    def find_in_address(self, query: str) -> Optional[Settlement]:
+        """Населённый пункт, упомянутый в адресе отдельной частью ("Казань, ул. Баумана, 1")"""
+        for part in query.split(","):
+            settlement = self._by_name(part)
+            if settlement is not None:
+                return settlement
+        return None
+
+    @staticmethod
+    def _is_region(settlement: Settlement, text: str) -> bool:
+        """Совпадает ли текст с регионом населённого пункта ("московская обл" - "Московская область")"""
+        words = normalize_name(text).split()
+        region = normalize_name(settlement.region).split()
+        if not words:
+            return False
+        return all(any(part.startswith(word.rstrip(".")) for part in region) for word in words)
+
+    def nearest(self, lat: float, lon: float, max_distance_km: float) -> Optional[Tuple[Settlement, float]]:
+        """
+        Ближайший населённый пункт не дальше max_distance_km
+
+        Returns:
+            (населённый пункт, расстояние в км) или None
+        """
+        lat_span = max_distance_km / 111.0
+        lon_span = max_distance_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        best_index = -1
+        best_distance = max_distance_km
+        for cell_lat in range(math.floor(lat - lat_span), math.floor(lat + lat_span) + 1):
+            for cell_lon in range(math.floor(lon - lon_span), math.floor(lon + lon_span) + 1):
+                for index in self._grid.get((cell_lat, cell_lon), ()):
+                    distance = calculate_distance(lat, lon, self._latitudes[index], self._longitudes[index])
+                    if distance <= best_distance:
+                        best_index, best_distance = index, distance
+        if best_index < 0:
+            return None
+        return self.settlements[best_index], best_distance
+
+
+# Справочник загружается один раз при импорте (около 200 записей)
+settlements = Gazetteer.load()
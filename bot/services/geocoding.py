@@ -1,141 +1,317 @@
-"""Сервис геокодинга - преобразование адреса в координаты через Яндекс.Геокодер API"""
+"""Сервис геокодинга - преобразование адреса в координаты через справочник городов и Яндекс.Геокодер API"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 import aiohttp
-from typing import Optional, Tuple
+
 from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import GeocodeCache
+from bot.services.gazetteer import settlements
+from bot.utils.cache import TTLCache
+from bot.utils.resilience import ExternalService, ServiceUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Ответ "не найдено" в кэше памяти (TTLCache.get возвращает None при промахе)
+_NOT_FOUND = object()
+
+
+class GeocoderError(Exception):
+    """Геокодер недоступен или ответил ошибкой (такие ответы не кэшируются)"""
+
+
+# Общая сессия с пулом соединений (TCP+TLS не устанавливается заново на каждый запрос)
+_http: Optional[aiohttp.ClientSession] = None
+
+# Бюджет времени, автомат отключения и ограничение параллельности запросов к API
+api = ExternalService("geocoder_api", config.geocoder_api)
+
+# Первый уровень кэша; второй - таблица geocode_cache
+_memory = TTLCache(
+    max_size=config.geocoding.memory_max_size,
+    ttl=config.geocoding.memory_ttl_seconds,
+)
+
+# Выполняющиеся запросы по ключу кэша: одинаковые запросы ждут один ответ
+_inflight: Dict[str, asyncio.Task] = {}
+
+# Метрики
+_db_hits = 0
+_api_requests = 0
+_coalesced = 0
+_not_found = 0
+_errors = 0
+_gazetteer_hits = 0
+_gazetteer_fallbacks = 0
+
+
+def _get_http() -> aiohttp.ClientSession:
+    """Общая HTTP-сессия (создаётся при первом запросе)"""
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(
+            # С запасом на повторные (хеджированные) запросы
+            connector=aiohttp.TCPConnector(limit=config.geocoder_api.max_concurrent * 2, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=config.geocoder_api.timeout),
+        )
+    return _http
+
+
+async def close_http_session() -> None:
+    """Shutdown-хук: закрытие пула соединений с геокодером"""
+    global _http
+    if _http is not None and not _http.closed:
+        await _http.close()
+    _http = None
+
+
+def normalize_address(address: str) -> str:
+    """Адрес для ключа кэша: без регистра, лишних пробелов и знаков по краям"""
+    return " ".join(address.lower().replace("ё", "е").split()).strip(" ,.")
+
+
+async def _request(geocode: str, **params: Any) -> Optional[Dict[str, Any]]:
+    """
+    Запрос к API геокодера
+
+    Returns:
+        GeoObject первого результата или None, если ничего не найдено
+
+    Raises:
+        GeocoderError: Сетевая ошибка, таймаут, ответ не 200 или API отключено автоматом
+    """
+    params.update({
+        "apikey": config.geocoding.api_key,
+        "geocode": geocode,
+        "format": "json",
+        "results": 1,
+        "lang": "ru_RU",
+    })
+    try:
+        data = await api.call(lambda: _get(params))
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, ServiceUnavailable) as e:
+        raise GeocoderError(str(e) or type(e).__name__) from e
+
+    try:
+        return data["response"]["GeoObjectCollection"]["featureMember"][0]["GeoObject"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+async def _get(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Одна попытка запроса к API"""
+    global _api_requests
+    _api_requests += 1
+    async with _get_http().get(config.geocoding.api_url, params=params) as response:
+        if response.status != 200:
+            raise GeocoderError(f"HTTP {response.status}")
+        return await response.json()
+
+
+def _parse_point(geo_object: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Координаты из GeoObject (формат pos: "долгота широта")"""
+    try:
+        lon, lat = map(float, geo_object["Point"]["pos"].split())
+    except (KeyError, TypeError, ValueError):
+        return None
+    # Валидация координат
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        return None
+    return (lat, lon)
+
+
+def _parse_address(geo_object: Dict[str, Any]) -> Optional[str]:
+    """Адрес из GeoObject"""
+    try:
+        return geo_object["metaDataProperty"]["GeocoderMetaData"]["text"]
+    except (KeyError, TypeError):
+        return None
+
+
+async def _lookup(
+    key: str,
+    fetch: Callable[[], Awaitable[Optional[Any]]],
+    from_row: Callable[[GeocodeCache], Any],
+    to_row: Callable[[Any], Dict[str, Any]],
+) -> Optional[Any]:
+    """
+    Ответ из памяти, затем из БД, затем из API (одновременные одинаковые запросы объединяются)
+
+    Raises:
+        GeocoderError: API недоступно, ответа в кэше нет
+    """
+    global _coalesced
+    value = _memory.get(key)
+    if value is not None:
+        return None if value is _NOT_FOUND else value
+
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.create_task(_resolve(key, fetch, from_row, to_row))
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+        # Ошибка считается полученной, даже если все ожидающие отменены
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    else:
+        _coalesced += 1
+    # Отмена одного ожидающего не прерывает запрос остальных
+    return await asyncio.shield(task)
+
+
+async def _resolve(
+    key: str,
+    fetch: Callable[[], Awaitable[Optional[Any]]],
+    from_row: Callable[[GeocodeCache], Any],
+    to_row: Callable[[Any], Dict[str, Any]],
+) -> Optional[Any]:
+    """Поиск ответа в БД или запрос к API с сохранением в оба уровня кэша"""
+    global _db_hits, _not_found, _errors
+    epoch = _memory.epoch
+    try:
+        async with async_session_maker() as session:
+            row = await crud.get_geocode_cache(session, key)
+    except Exception as e:
+        # Без кэша в БД геокодинг продолжает работать через API
+        logger.warning(f"Geocode cache read error: {e}")
+        row = None
+    if row is not None:
+        _db_hits += 1
+        value = from_row(row) if row.found else None
+        _memory.put(key, _NOT_FOUND if value is None else value, epoch)
+        return value
+
+    try:
+        value = await fetch()
+    except GeocoderError as e:
+        _errors += 1
+        logger.warning(f"Geocoder request failed for {key!r}: {e}")
+        raise
+
+    if value is None:
+        _not_found += 1
+        expires_at = datetime.utcnow() + timedelta(hours=config.geocoding.not_found_ttl_hours)
+    else:
+        expires_at = datetime.utcnow() + timedelta(days=config.geocoding.cache_ttl_days)
+    _memory.put(key, _NOT_FOUND if value is None else value, epoch)
+    try:
+        async with async_session_maker() as session:
+            if value is None:
+                await crud.save_geocode_cache(session, key, expires_at, found=False)
+            else:
+                await crud.save_geocode_cache(session, key, expires_at, **to_row(value))
+    except Exception as e:
+        logger.warning(f"Geocode cache write error: {e}")
+    return value
 
 
 async def geocode_address(address: str) -> Optional[Tuple[float, float]]:
     """
-    Преобразование адреса в координаты через Яндекс.Геокодер API.
-    
+    Преобразование адреса в координаты.
+
+    Название города определяется по офлайн-справочнику, остальные адреса -
+    через Яндекс.Геокодер API (без ключа или при недоступности API - центр
+    указанного в адресе города).
+
     Args:
         address: Адрес в виде строки (например, "Москва, ул. Ленина, д. 10")
-    
+
     Returns:
         Кортеж (широта, долгота) или None, если адрес не найден
     """
-    if not config.geocoding.api_key:
-        return None
-    
+    global _gazetteer_hits, _gazetteer_fallbacks
     if not address or not address.strip():
         return None
-    
-    url = "https://geocode-maps.yandex.ru/1.x/"
-    
-    params = {
-        "apikey": config.geocoding.api_key,
-        "geocode": address.strip(),
-        "format": "json",
-        "results": 1,
-        "lang": "ru_RU"
-    }
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status != 200:
-                    return None
-                
-                data = await response.json()
-                
-                # Проверяем наличие результатов
-                if "response" not in data:
-                    return None
-                
-                response_data = data["response"]
-                if "GeoObjectCollection" not in response_data:
-                    return None
-                
-                geo_objects = response_data["GeoObjectCollection"]
-                if "featureMember" not in geo_objects or not geo_objects["featureMember"]:
-                    return None
-                
-                # Берем первый результат
-                first_result = geo_objects["featureMember"][0]
-                if "GeoObject" not in first_result:
-                    return None
-                
-                geo_object = first_result["GeoObject"]
-                if "Point" not in geo_object or "pos" not in geo_object["Point"]:
-                    return None
-                
-                # Парсим координаты (формат: "долгота широта")
-                pos_str = geo_object["Point"]["pos"]
-                lon, lat = map(float, pos_str.split())
-                
-                # Валидация координат
-                if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
-                    return None
-                
-                return (lat, lon)
-                
-    except Exception:
-        # В случае любой ошибки возвращаем None
+
+    # Название города - из справочника, без запроса к API
+    settlement = settlements.find(address)
+    if settlement is not None:
+        _gazetteer_hits += 1
+        return settlement.point
+
+    if config.geocoding.api_key:
+        async def fetch() -> Optional[Tuple[float, float]]:
+            geo_object = await _request(address.strip())
+            return _parse_point(geo_object) if geo_object else None
+
+        try:
+            return await _lookup(
+                f"address:{normalize_address(address)}",
+                fetch,
+                lambda row: (row.latitude, row.longitude),
+                lambda point: {"latitude": point[0], "longitude": point[1]},
+            )
+        except GeocoderError:
+            pass
+
+    # API недоступно - центр города из адреса, если он указан
+    settlement = settlements.find_in_address(address)
+    if settlement is None:
         return None
+    _gazetteer_fallbacks += 1
+    return settlement.point
 
 
 async def reverse_geocode(lat: float, lon: float) -> Optional[str]:
     """
     Обратное геокодирование - преобразование координат в адрес.
-    
+
+    Адрес дома определяет API; без ключа, при недоступности API или вдали
+    от домов - ближайший город из справочника.
+
     Args:
         lat: Широта
         lon: Долгота
-    
+
     Returns:
         Адрес в виде строки или None, если не удалось определить
     """
-    if not config.geocoding.api_key:
+    global _gazetteer_fallbacks
+    if config.geocoding.api_key:
+        # Близкие точки (в пределах ~11 м) дают один ключ и один запрос
+        precision = config.geocoding.reverse_precision
+        point_lat, point_lon = round(lat, precision), round(lon, precision)
+
+        async def fetch() -> Optional[str]:
+            geo_object = await _request(f"{point_lon},{point_lat}", kind="house")
+            return _parse_address(geo_object) if geo_object else None
+
+        try:
+            address = await _lookup(
+                f"point:{point_lat:.{precision}f},{point_lon:.{precision}f}",
+                fetch,
+                lambda row: row.address,
+                lambda address: {"address": address},
+            )
+        except GeocoderError:
+            address = None
+        if address is not None:
+            return address
+
+    # Дома рядом нет или API недоступно - ближайший город из справочника
+    nearest = settlements.nearest(lat, lon, config.geocoding.gazetteer_radius_km)
+    if nearest is None:
         return None
-    
-    url = "https://geocode-maps.yandex.ru/1.x/"
-    
-    params = {
-        "apikey": config.geocoding.api_key,
-        "geocode": f"{lon},{lat}",
-        "format": "json",
-        "results": 1,
-        "lang": "ru_RU",
-        "kind": "house"
+    _gazetteer_fallbacks += 1
+    return nearest[0].address
+
+
+def stats() -> Dict[str, Any]:
+    """Показатели для реестра метрик"""
+    memory = _memory.stats()
+    lookups = memory["hits"] + memory["misses"] + _gazetteer_hits
+    return {
+        **{f"memory_{name}": value for name, value in memory.items()},
+        "db_hits": _db_hits,
+        "api_requests": _api_requests,
+        "coalesced": _coalesced,
+        "not_found": _not_found,
+        "errors": _errors,
+        "gazetteer_hits": _gazetteer_hits,
+        "gazetteer_fallbacks": _gazetteer_fallbacks,
+        "in_flight": len(_inflight),
+        "hit_rate": (memory["hits"] + _db_hits + _coalesced + _gazetteer_hits) / lookups if lookups else 0.0,
     }
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status != 200:
-                    return None
-                
-                data = await response.json()
-                
-                if "response" not in data:
-                    return None
-                
-                response_data = data["response"]
-                if "GeoObjectCollection" not in response_data:
-                    return None
-                
-                geo_objects = response_data["GeoObjectCollection"]
-                if "featureMember" not in geo_objects or not geo_objects["featureMember"]:
-                    return None
-                
-                first_result = geo_objects["featureMember"][0]
-                if "GeoObject" not in first_result:
-                    return None
-                
-                geo_object = first_result["GeoObject"]
-                if "metaDataProperty" not in geo_object:
-                    return None
-                
-                meta_data = geo_object["metaDataProperty"]
-                if "GeocoderMetaData" not in meta_data:
-                    return None
-                
-                geocoder_meta = meta_data["GeocoderMetaData"]
-                if "text" not in geocoder_meta:
-                    return None
-                
-                return geocoder_meta["text"]
-                
-    except Exception:
-        return None
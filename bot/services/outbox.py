@@ -0,0 +1,239 @@
+"""Outbox уведомлений: постановка в БД и фоновая доставка с повторами"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import Notification
+from bot.utils.send_scheduler import Lane, send_lane
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxSender:
+    """
+    Фоновый отправитель уведомлений из таблицы notifications.
+
+    Уведомления одного чата доставляются строго по порядку постановки:
+    пока первое ждёт повтора, следующие не отправляются. Разные чаты
+    обрабатываются параллельно (не больше max_parallel_chats).
+    """
+
+    # Период удаления старых недоставленных уведомлений, с
+    PURGE_INTERVAL = 3600.0
+
+    def __init__(self):
+        self.shard: Optional[Tuple[int, int]] = None  # (номер, всего) в многопроцессном режиме
+        self._bot: Optional[Bot] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._purged_at = 0.0
+
+        # Метрики
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+        self._pending = 0
+
+    async def start(self, bot: Bot) -> None:
+        """Startup-хук: запуск фоновой доставки"""
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Shutdown-хук: последняя попытка доставить готовые уведомления и остановка"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=config.outbox.flush_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Outbox не успел доставить уведомления до остановки, они будут отправлены после запуска")
+        self._task = None
+
+    def wake(self) -> None:
+        """Немедленная проверка очереди (после постановки уведомления)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        """Цикл доставки"""
+        with send_lane(Lane.NOTIFICATION):
+            await self._loop()
+
+    async def _loop(self) -> None:
+        """Проходы доставки до остановки"""
+        while True:
+            try:
+                await self._deliver_due()
+                await self._purge()
+            except Exception as e:
+                logger.error(f"Outbox error: {e}", exc_info=True)
+
+            if self._stopping:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=config.outbox.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _deliver_due(self) -> None:
+        """Доставка уведомлений, время которых пришло (чаты, ждущие повтора, отбирает запрос)"""
+        async with async_session_maker() as session:
+            pending = await crud.get_pending_notifications(
+                session, config.outbox.batch_size, config.outbox.chat_batch_size, self.shard
+            )
+        self._pending = len(pending)
+
+        chats = [list(rows) for _, rows in groupby(sorted(pending, key=lambda n: (n.chat_id, n.id)), key=lambda n: n.chat_id)]
+
+        slots = asyncio.Semaphore(config.outbox.max_parallel_chats)
+
+        async def deliver_chat(rows: List[Notification]):
+            async with slots:
+                for notification in rows:
+                    if not await self._deliver(notification):
+                        return
+
+        await asyncio.gather(*(deliver_chat(rows) for rows in chats))
+
+    async def _deliver(self, notification: Notification) -> bool:
+        """
+        Доставка одного уведомления
+
+        Returns:
+            True если уведомление обработано (отправлено или окончательно отброшено)
+        """
+        try:
+            await send_notification(self._bot, notification)
+        except TelegramRetryAfter as e:
+            # Ограничение Telegram - не ошибка уведомления, попытку не считаем
+            await self._reschedule(notification, e.retry_after, str(e), count_attempt=False)
+            return False
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Бот заблокирован или чат не существует - повтор не поможет
+            logger.warning(f"Notification {notification.id} to {notification.chat_id} dropped: {e}")
+            async with async_session_maker() as session:
+                await crud.fail_notification(session, notification.id, str(e))
+            self._failed += 1
+            return True
+        except Exception as e:
+            if notification.attempts + 1 >= config.outbox.max_attempts:
+                logger.error(f"Notification {notification.id} to {notification.chat_id} failed: {e}")
+                async with async_session_maker() as session:
+                    await crud.fail_notification(session, notification.id, str(e))
+                self._failed += 1
+                return True
+            delay = min(config.outbox.retry_base_delay * 2 ** notification.attempts, config.outbox.retry_max_delay)
+            await self._reschedule(notification, delay, str(e))
+            return False
+
+        async with async_session_maker() as session:
+            await crud.delete_notification(session, notification.id)
+        self._sent += 1
+        return True
+
+    async def _purge(self) -> None:
+        """Удаление недоставленных уведомлений старше failed_retention_days (не чаще PURGE_INTERVAL)"""
+        if time.monotonic() - self._purged_at < self.PURGE_INTERVAL:
+            return
+        self._purged_at = time.monotonic()
+        before = datetime.utcnow() - timedelta(days=config.outbox.failed_retention_days)
+        async with async_session_maker() as session:
+            deleted = await crud.delete_failed_notifications(session, before)
+        if deleted:
+            logger.info(f"Удалено недоставленных уведомлений: {deleted}")
+
+    async def _reschedule(self, notification: Notification, delay: float, error: str, count_attempt: bool = True) -> None:
+        """Перенос уведомления на повтор через delay секунд"""
+        async with async_session_maker() as session:
+            await crud.reschedule_notification(
+                session,
+                notification.id,
+                datetime.utcnow() + timedelta(seconds=delay),
+                error,
+                count_attempt=count_attempt,
+            )
+        self._retried += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "pending": self._pending,
+            "sent": self._sent,
+            "retried": self._retried,
+            "failed": self._failed,
+        }
+
+
+async def send_notification(bot: Bot, notification: Notification) -> None:
+    """Отправка уведомления через Telegram API"""
+    reply_markup = None
+    if notification.reply_markup:
+        reply_markup = InlineKeyboardMarkup.model_validate_json(notification.reply_markup)
+
+    if notification.photo_id:
+        await bot.send_photo(
+            notification.chat_id,
+            photo=notification.photo_id,
+            caption=notification.text,
+            reply_markup=reply_markup,
+        )
+    else:
+        await bot.send_message(
+            notification.chat_id,
+            text=notification.text,
+            reply_markup=reply_markup,
+        )
+
+
+async def enqueue(
+    session: AsyncSession,
+    chat_id: int,
+    text: str,
+    photo_id: Optional[str] = None,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    commit: bool = True,
+) -> None:
+    """
+    Постановка уведомления в очередь на доставку
+
+    Args:
+        session: Сессия БД
+        chat_id: Получатель
+        text: Текст сообщения или подпись к фото
+        photo_id: file_id фото (если уведомление с фото)
+        reply_markup: Inline-клавиатура
+        commit: False - уведомление входит в транзакцию вызывающего,
+            который после коммита вызывает sender.wake()
+    """
+    await crud.create_notification(
+        session,
+        chat_id=chat_id,
+        text=text,
+        photo_id=photo_id,
+        reply_markup=reply_markup.model_dump_json(exclude_none=True) if reply_markup else None,
+        commit=commit,
+    )
+    if commit:
+        sender.wake()
+
+
+# Отправитель текущего процесса
+sender = OutboxSender()
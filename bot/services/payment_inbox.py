@@ -0,0 +1,245 @@
+"""Входящая очередь webhook ЮKassa: мгновенный ответ и фоновая обработка с повторами"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import PaymentEvent
+from bot.services.payments import handle_payment_canceled, handle_payment_succeeded
+
+logger = logging.getLogger(__name__)
+
+# Обрабатываемые события ЮKassa (остальные подтверждаются и пропускаются)
+EVENT_HANDLERS: Dict[str, Callable[[dict], Awaitable[None]]] = {
+    "payment.succeeded": handle_payment_succeeded,
+    "payment.canceled": handle_payment_canceled,
+}
+
+
+class PaymentInbox:
+    """
+    Приём и обработка событий webhook ЮKassa.
+
+    Webhook только проверяет событие и сохраняет его в таблицу
+    payment_events (повторная доставка того же события отсекается
+    уникальным ключом), после чего сразу отвечает ЮKassa. Фоновый
+    обработчик разбирает события в порядке приёма: события одного
+    платежа - строго по очереди, разные платежи - параллельно
+    (не больше max_parallel_payments). Ошибка обработки откладывает
+    событие на повтор с растущей паузой.
+    """
+
+    # Период удаления старых обработанных событий, с
+    PURGE_INTERVAL = 3600.0
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._purged_at = 0.0
+
+        # Метрики
+        self._accepted = 0
+        self._duplicates = 0
+        self._ignored = 0
+        self._requeued = 0
+        self._ack_count = 0
+        self._ack_total = 0.0
+        self._ack_max = 0.0
+        self._processed = 0
+        self._retried = 0
+        self._failed = 0
+        self._pending = 0
+        self._lag = 0.0
+        self._processing_total = 0.0
+        self._processing_max = 0.0
+
+    async def accept(self, event: Any) -> bool:
+        """
+        Приём события webhook
+
+        Returns:
+            True если событие поставлено в очередь; False - повтор
+            уже принятого события или событие, которое бот не обрабатывает
+
+        Raises:
+            ValueError: Тело запроса не похоже на событие ЮKassa
+        """
+        started = time.perf_counter()
+        if not isinstance(event, dict) or not isinstance(event.get("object"), dict):
+            raise ValueError("В событии нет объекта платежа")
+        event_type = event.get("event")
+        payment_obj = event["object"]
+        yookassa_id = payment_obj.get("id")
+        if not isinstance(event_type, str) or not isinstance(yookassa_id, str) or not yookassa_id:
+            raise ValueError("В событии нет типа или ID платежа")
+
+        if event_type not in EVENT_HANDLERS:
+            self._ignored += 1
+            return False
+
+        async with async_session_maker() as session:
+            queued = await crud.add_payment_event(session, yookassa_id, event_type, json.dumps(payment_obj))
+        if queued:
+            self._accepted += 1
+            self.wake()
+        else:
+            self._duplicates += 1
+
+        elapsed = time.perf_counter() - started
+        self._ack_count += 1
+        self._ack_total += elapsed
+        self._ack_max = max(self._ack_max, elapsed)
+        return queued
+
+    async def retry_failed(self, event: Dict[str, Any]) -> bool:
+        """
+        Повторная постановка события, обработка которого окончательно не удалась
+
+        Повтор из accept такое событие отбрасывает как уже принятое, а платёж
+        остаётся в pending; сверка возвращает его в очередь этим методом.
+
+        Returns:
+            True если событие снова ждёт обработки
+        """
+        payment_obj = event["object"]
+        async with async_session_maker() as session:
+            queued = await crud.retry_failed_payment_event(
+                session, payment_obj["id"], event["event"], json.dumps(payment_obj)
+            )
+        if queued:
+            self._requeued += 1
+            self.wake()
+        return queued
+
+    async def start(self) -> None:
+        """Запуск фоновой обработки"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Остановка: последний проход по готовым событиям (остальные обработаются после запуска)"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=config.payment_inbox.stop_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("События ЮKassa не обработаны до остановки, они будут обработаны после запуска")
+        self._task = None
+
+    def wake(self) -> None:
+        """Немедленная проверка очереди (после приёма события)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _loop(self) -> None:
+        """Проходы обработки до остановки"""
+        while True:
+            try:
+                await self._process_due()
+                await self._purge()
+            except Exception as e:
+                logger.error(f"Payment inbox error: {e}", exc_info=True)
+
+            if self._stopping:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=config.payment_inbox.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _process_due(self) -> None:
+        """Обработка первых событий платежей, время которых пришло"""
+        async with async_session_maker() as session:
+            pending = await crud.get_pending_payment_events(session, config.payment_inbox.batch_size)
+        self._pending = len(pending)
+
+        self._lag = (datetime.utcnow() - pending[0].received_at).total_seconds() if pending else 0.0
+        slots = asyncio.Semaphore(config.payment_inbox.max_parallel_payments)
+
+        async def process(event: PaymentEvent) -> bool:
+            async with slots:
+                return await self._process(event)
+
+        # В выборке - по одному событию от платежа; следующие события
+        # обработанных платежей разбираются сразу же следующим проходом
+        if any(await asyncio.gather(*(process(event) for event in pending))):
+            self.wake()
+
+    async def _process(self, event: PaymentEvent) -> bool:
+        """
+        Обработка одного события
+
+        Returns:
+            True если событие обработано (успешно или окончательно отброшено)
+        """
+        try:
+            await EVENT_HANDLERS[event.event](json.loads(event.payload))
+        except Exception as e:
+            if event.attempts + 1 >= config.payment_inbox.max_attempts:
+                logger.error(f"Payment event {event.id} ({event.event} {event.yookassa_id}) failed: {e}")
+                async with async_session_maker() as session:
+                    await crud.fail_payment_event(session, event.id, str(e))
+                self._failed += 1
+                return True
+            delay = min(
+                config.payment_inbox.retry_base_delay * 2 ** event.attempts,
+                config.payment_inbox.retry_max_delay,
+            )
+            async with async_session_maker() as session:
+                await crud.reschedule_payment_event(
+                    session, event.id, datetime.utcnow() + timedelta(seconds=delay), str(e)
+                )
+            self._retried += 1
+            return False
+
+        async with async_session_maker() as session:
+            await crud.complete_payment_event(session, event.id)
+        self._processed += 1
+        elapsed = (datetime.utcnow() - event.received_at).total_seconds()
+        self._processing_total += elapsed
+        self._processing_max = max(self._processing_max, elapsed)
+        return True
+
+    async def _purge(self) -> None:
+        """Удаление обработанных событий старше retention_days (не чаще PURGE_INTERVAL)"""
+        if time.monotonic() - self._purged_at < self.PURGE_INTERVAL:
+            return
+        self._purged_at = time.monotonic()
+        before = datetime.utcnow() - timedelta(days=config.payment_inbox.retention_days)
+        async with async_session_maker() as session:
+            deleted = await crud.delete_processed_payment_events(session, before)
+        if deleted:
+            logger.info(f"Удалено обработанных событий ЮKassa: {deleted}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "accepted": self._accepted,
+            "duplicates": self._duplicates,
+            "ignored": self._ignored,
+            "requeued": self._requeued,
+            "ack_latency_avg_s": self._ack_total / self._ack_count if self._ack_count else 0.0,
+            "ack_latency_max_s": self._ack_max,
+            "pending": self._pending,
+            "lag_s": self._lag,
+            "processed": self._processed,
+            "retried": self._retried,
+            "failed": self._failed,
+            "processing_delay_avg_s": self._processing_total / self._processed if self._processed else 0.0,
+            "processing_delay_max_s": self._processing_max,
+        }
+
+
+# Очередь текущего процесса (обрабатывается в процессе webhook-сервера)
+inbox = PaymentInbox()
@@ -0,0 +1,156 @@
+"""Сверка незавершённых платежей с ЮKassa: проведение оплат, по которым не пришёл webhook"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import Payment
+from bot.services.payment_inbox import inbox
+from bot.services.yookassa_client import YooKassaError, client
+from bot.utils.resilience import ExternalService
+
+logger = logging.getLogger(__name__)
+
+# Итоговые статусы ЮKassa -> событие webhook, которым проводится платёж
+FINAL_EVENTS = {
+    "succeeded": "payment.succeeded",
+    "canceled": "payment.canceled",
+}
+
+# Запросы статуса: свои слоты и автомат, отдельные от создания платежей
+# (bot/services/payments.py) - фоновая сверка не отнимает их у пользователей
+api = ExternalService(
+    "yookassa_reconcile",
+    config.yookassa_reconcile_api,
+    is_failure=lambda e: not (isinstance(e, YooKassaError) and e.is_client_error),
+)
+
+
+class PaymentReconciler:
+    """
+    Фоновая сверка платежей, по которым не пришёл webhook.
+
+    Раз в interval незавершённые платежи старше min_age читаются пачками
+    по ключу, их статус запрашивается у ЮKassa (не больше max_concurrent
+    запросов одновременно). Завершённый платёж ставится во входящую
+    очередь как событие webhook и проводится тем же путём, что и оно:
+    если webhook всё же придёт, он будет отброшен как повтор. Событие
+    webhook, обработка которого окончательно не удалась, возвращается
+    в очередь.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self._passes = 0
+        self._checked = 0
+        self._enqueued = 0
+        self._still_pending = 0
+        self._errors = 0
+        self._last_pass_seconds = 0.0
+
+    async def start(self) -> None:
+        """Запуск фоновой сверки"""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Остановка (прерванная сверка безопасна: платежи проводятся идемпотентно)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self) -> None:
+        """Проходы сверки раз в interval"""
+        while True:
+            await asyncio.sleep(config.payment_reconciler.interval)
+            try:
+                await self.reconcile(datetime.utcnow() - timedelta(seconds=config.payment_reconciler.min_age))
+            except Exception as e:
+                logger.error(f"Payment reconciliation error: {e}", exc_info=True)
+
+    async def reconcile(self, created_before: datetime) -> int:
+        """
+        Один проход сверки
+
+        Args:
+            created_before: Сверяются платежи, созданные раньше
+
+        Returns:
+            Количество платежей, поставленных на проведение
+        """
+        started = time.monotonic()
+        slots = asyncio.Semaphore(config.payment_reconciler.max_concurrent)
+        enqueued = 0
+        after_id = 0
+
+        async def check(payment: Payment) -> bool:
+            async with slots:
+                return await self._check(payment)
+
+        while True:
+            async with async_session_maker() as session:
+                batch = await crud.get_stale_pending_payments(
+                    session, created_before, after_id, config.payment_reconciler.batch_size
+                )
+            if not batch:
+                break
+            after_id = batch[-1].id
+            results = await asyncio.gather(*(check(payment) for payment in batch))
+            enqueued += sum(results)
+
+        self._passes += 1
+        self._last_pass_seconds = time.monotonic() - started
+        if enqueued:
+            logger.info(f"Сверка платежей: {enqueued} проведено по статусу ЮKassa")
+        return enqueued
+
+    async def _check(self, payment: Payment) -> bool:
+        """
+        Сверка одного платежа
+
+        Returns:
+            True если платёж поставлен на проведение
+        """
+        self._checked += 1
+        try:
+            payment_obj = await api.call(lambda: client.get_payment(payment.yookassa_id))
+        except Exception as e:
+            self._errors += 1
+            logger.warning(f"Payment {payment.yookassa_id} status check failed: {e}")
+            return False
+
+        event = FINAL_EVENTS.get(payment_obj.get("status"))
+        if event is None:
+            self._still_pending += 1
+            return False
+        final_event = {"event": event, "object": payment_obj}
+        # Событие webhook могло быть принято, но не обработано за все попытки
+        queued = await inbox.accept(final_event) or await inbox.retry_failed(final_event)
+        self._enqueued += queued
+        return queued
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "passes": self._passes,
+            "checked": self._checked,
+            "enqueued": self._enqueued,
+            "still_pending": self._still_pending,
+            "errors": self._errors,
+            "last_pass_s": self._last_pass_seconds,
+        }
+
+
+# Сверка текущего процесса (выполняется в процессе webhook-сервера)
+reconciler = PaymentReconciler()
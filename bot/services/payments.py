@@ -2,17 +2,30 @@
 
 import uuid
 import logging
-import asyncio
 from typing import Optional, Dict
 from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from yookassa import Payment, Configuration
 
 from bot.config import config
 from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.keyboards.employer import get_employer_menu, get_vacancy_management_keyboard
+from bot.keyboards.worker import get_worker_menu
+from bot.services import outbox
+from bot.services.yookassa_client import YooKassaError, client
+from bot.utils.resilience import ExternalService
 
 logger = logging.getLogger(__name__)
 
+# Вызовы API ЮKassa: бюджет времени и автомат отключения
+# (ошибки в самом запросе - не признак недоступности сервиса)
+api = ExternalService(
+    "yookassa_api",
+    config.yookassa_api,
+    is_failure=lambda e: not (isinstance(e, YooKassaError) and e.is_client_error),
+)
+
 
 # Типы платежей
 class PaymentType:
@@ -101,10 +114,6 @@ async def create_yookassa_payment(
             'db_payment_id': int  # ID записи в БД
         }
     """
-    # Инициализация ЮKassa
-    Configuration.account_id = config.payment.shop_id
-    Configuration.secret_key = config.payment.secret_key
-    
     # Подготовка metadata
     metadata = {
         "telegram_id": str(user_id),
@@ -132,36 +141,24 @@ async def create_yookassa_payment(
     }
     
     try:
-        # Payment.create() - синхронный метод, выполняем в отдельном потоке
-        loop = asyncio.get_event_loop()
-        payment = await loop.run_in_executor(None, Payment.create, payment_data)
-        yookassa_id = payment.id
-        confirmation_url = payment.confirmation.confirmation_url
+        payment = await api.call(lambda: client.create_payment(payment_data))
+        yookassa_id = payment["id"]
+        confirmation_url = payment["confirmation"]["confirmation_url"]
         
         # Сохранение в БД
+        fields = dict(
+            user_id=user_id,
+            payment_type=payment_type,
+            amount=amount,
+            vacancy_id=vacancy_id,
+            yookassa_id=yookassa_id
+        )
         if session:
-            db_payment = await crud.create_payment(
-                session=session,
-                user_id=user_id,
-                payment_type=payment_type,
-                amount=amount,
-                vacancy_id=vacancy_id,
-                yookassa_id=yookassa_id
-            )
-            db_payment_id = db_payment.id
+            db_payment_id = await _save_payment(session, fields)
         else:
             # Если сессия не передана, создаем новую
-            from bot.database.connection import async_session_maker
             async with async_session_maker() as new_session:
-                db_payment = await crud.create_payment(
-                    session=new_session,
-                    user_id=user_id,
-                    payment_type=payment_type,
-                    amount=amount,
-                    vacancy_id=vacancy_id,
-                    yookassa_id=yookassa_id
-                )
-                db_payment_id = db_payment.id
+                db_payment_id = await _save_payment(new_session, fields)
         
         logger.info(f"Created YooKassa payment {yookassa_id} for user {user_id}, type {payment_type}")
         
@@ -175,6 +172,18 @@ async def create_yookassa_payment(
         raise
 
 
+async def _save_payment(session: AsyncSession, fields: Dict) -> int:
+    """Запись о платеже ЮKassa; если webhook успел создать её раньше - ID существующей"""
+    try:
+        payment = await crud.create_payment(session=session, **fields)
+    except IntegrityError:
+        await session.rollback()
+        payment = await crud.get_payment_by_yookassa_id(session, fields["yookassa_id"])
+        if payment is None:
+            raise
+    return payment.id
+
+
 async def process_successful_payment(
     session: AsyncSession,
     payment_type: str,
@@ -229,3 +238,127 @@ async def process_successful_payment(
             await crud.pin_vacancy(session, vacancy_id, days=7)
     
     return True
+
+
+def _payment_fields(payment_obj: dict) -> dict:
+    """Поля записи о платеже из объекта ЮKassa (на случай, если webhook пришёл раньше сохранения)"""
+    metadata = payment_obj.get('metadata', {})
+    return {
+        'user_id': int(metadata.get('telegram_id', 0)),
+        'payment_type': metadata.get('payment_type', ''),
+        'amount': int(float(payment_obj.get('amount', {}).get('value', 0))),
+        'vacancy_id': int(metadata.get('vacancy_id')) if metadata.get('vacancy_id') else None,
+    }
+
+
+async def handle_payment_succeeded(payment_obj: dict):
+    """
+    Обработка успешного платежа.
+    
+    Смена статуса, активация услуги и уведомление (строка outbox) - одна
+    транзакция: повторное или одновременное событие не меняет статус
+    и ничего не выдаёт, а сбой посередине откатывает всё целиком.
+    Отправитель outbox будится только после коммита.
+    """
+    yookassa_id = payment_obj.get('id')
+    fields = _payment_fields(payment_obj)
+    telegram_id = fields['user_id']
+    
+    if not telegram_id:
+        logger.error(f"No telegram_id in metadata for payment {yookassa_id}")
+        return
+    
+    async with async_session_maker() as session:
+        try:
+            payment = await crud.settle_yookassa_payment(session, yookassa_id, 'succeeded', **fields)
+            if payment is None:
+                await session.rollback()
+                logger.info(f"Payment {yookassa_id} already processed")
+                return
+            
+            await _activate_service(session, payment)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error processing payment {yookassa_id}: {e}", exc_info=True)
+            raise
+    
+    outbox.sender.wake()
+    logger.info(f"Payment {yookassa_id} processed successfully")
+
+
+async def _activate_service(session, payment) -> None:
+    """Активация оплаченной услуги и уведомление в транзакции вызывающего (без коммита)"""
+    payment_type = payment.payment_type
+    telegram_id = payment.user_id
+    
+    if payment_type == PaymentType.WORKER_SUBSCRIPTION:
+        await crud.grant_subscription(session, telegram_id, days=30, commit=False)
+        await outbox.enqueue(
+            session,
+            telegram_id,
+            "✅ Подписка активирована на 30 дней!\n\nТеперь у вас безлимитный просмотр вакансий.",
+            reply_markup=get_worker_menu(),
+            commit=False
+        )
+        
+    elif payment_type == PaymentType.VACANCY_PUBLICATION:
+        # Оплаченная публикация на балансе работодателя (списывается при создании вакансии)
+        await crud.grant_vacancy_credits(session, telegram_id, count=1, commit=False)
+        await outbox.enqueue(
+            session,
+            telegram_id,
+            "✅ Оплата прошла успешно!\n\nТеперь вы можете создать вакансию.",
+            reply_markup=get_employer_menu(),
+            commit=False
+        )
+        
+    elif payment_type == PaymentType.VACANCY_BOOST:
+        if payment.vacancy_id:
+            vacancy = await crud.boost_vacancy(session, payment.vacancy_id, commit=False)
+            if vacancy:
+                await outbox.enqueue(
+                    session,
+                    telegram_id,
+                    f"✅ Вакансия «{vacancy.title}» поднята в начало списка!",
+                    reply_markup=get_vacancy_management_keyboard(payment.vacancy_id, vacancy.is_active),
+                    commit=False
+                )
+        
+    elif payment_type in [PaymentType.VACANCY_PIN_1D, PaymentType.VACANCY_PIN_3D, PaymentType.VACANCY_PIN_7D]:
+        if payment.vacancy_id:
+            days = {
+                PaymentType.VACANCY_PIN_1D: 1,
+                PaymentType.VACANCY_PIN_3D: 3,
+                PaymentType.VACANCY_PIN_7D: 7,
+            }.get(payment_type, 1)
+            vacancy = await crud.pin_vacancy(session, payment.vacancy_id, days=days, commit=False)
+            if vacancy:
+                await outbox.enqueue(
+                    session,
+                    telegram_id,
+                    f"✅ Вакансия «{vacancy.title}» закреплена на {days} дн.!",
+                    reply_markup=get_vacancy_management_keyboard(payment.vacancy_id, vacancy.is_active),
+                    commit=False
+                )
+
+
+async def handle_payment_canceled(payment_obj: dict):
+    """Обработка отмененного платежа (статус меняется только у ещё не завершённого платежа)"""
+    yookassa_id = payment_obj.get('id')
+    fields = _payment_fields(payment_obj)
+    
+    if not fields['user_id']:
+        logger.error(f"No telegram_id in metadata for payment {yookassa_id}")
+        return
+    
+    async with async_session_maker() as session:
+        try:
+            payment = await crud.settle_yookassa_payment(session, yookassa_id, 'canceled', **fields)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error processing canceled payment {yookassa_id}: {e}", exc_info=True)
+            raise
+    if payment is not None:
+        logger.info(f"Payment {yookassa_id} marked as canceled")
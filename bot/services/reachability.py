@@ -0,0 +1,75 @@
+"""Учёт пользователей, до которых бот не может достучаться"""
+
+import logging
+from typing import Any, Dict
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.utils.send_scheduler import SEND_METHODS
+
+logger = logging.getLogger(__name__)
+
+
+def is_unreachable_error(error: Exception) -> bool:
+    """Ошибка означает, что бот заблокирован или чата больше нет"""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    return isinstance(error, TelegramBadRequest) and "chat not found" in error.message.lower()
+
+
+class ReachabilityTracker(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: пользователь, отправка которому завершилась
+    TelegramForbiddenError или "chat not found", отмечается недоступным
+    (users.unreachable_since), и рассылки его больше не выбирают
+    """
+
+    def __init__(self):
+        self._unreachable = 0
+        self._reachable = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        try:
+            return await make_request(bot, method)
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Личные чаты: chat_id совпадает с telegram_id пользователя
+            if isinstance(method, SEND_METHODS) and isinstance(method.chat_id, int) and method.chat_id > 0:
+                if is_unreachable_error(e):
+                    await self.mark_unreachable(method.chat_id)
+            raise
+
+    async def mark_unreachable(self, telegram_id: int) -> None:
+        """Отметка пользователя недоступным"""
+        try:
+            async with async_session_maker() as session:
+                if await crud.mark_user_unreachable(session, telegram_id):
+                    self._unreachable += 1
+                    logger.info(f"Пользователь {telegram_id} недоступен")
+        except Exception as e:
+            logger.warning(f"Не удалось отметить пользователя {telegram_id} недоступным: {e}")
+
+    def reachable_again(self) -> None:
+        """Учёт пользователя, снова написавшего боту"""
+        self._reachable += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "marked_unreachable": self._unreachable,
+            "marked_reachable": self._reachable,
+        }
+
+
+# Учёт текущего процесса (подключается к сессии бота в create_bot)
+tracker = ReachabilityTracker()
@@ -0,0 +1,126 @@
+"""Асинхронный клиент API ЮKassa с постоянным пулом соединений"""
+
+import asyncio
+import uuid
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from bot.config import ExternalServiceConfig, PaymentConfig, config
+
+
+class YooKassaError(Exception):
+    """Ошибка API ЮKassa"""
+
+    def __init__(self, status: int, code: str = "", description: str = ""):
+        super().__init__(f"HTTP {status} {code}: {description}".strip(": "))
+        self.status = status
+        self.code = code
+        self.description = description
+
+    @property
+    def is_client_error(self) -> bool:
+        """Ошибка в самом запросе (сервис при этом работает)"""
+        return self.status in (400, 404)
+
+
+class YooKassaClient:
+    """
+    Клиент API ЮKassa v3.
+
+    Одна HTTP-сессия с keep-alive на весь процесс: соединение с API
+    устанавливается один раз и переиспользуется. Создание платежа
+    отправляется с ключом идемпотентности; ответ 202 (запрос ещё
+    обрабатывается) повторяется с тем же ключом, поэтому платёж
+    не создаётся дважды.
+    """
+
+    # Повторов ответа 202 не больше (как в официальном SDK)
+    MAX_PROCESSING_ATTEMPTS = 3
+
+    def __init__(self, payment: PaymentConfig, limits: ExternalServiceConfig):
+        self.payment = payment
+        self.limits = limits
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Метрики
+        self._requests = 0
+        self._processing_retries = 0
+        self._errors = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """HTTP-сессия (создаётся при первом запросе в event loop процесса)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.payment.shop_id, self.payment.secret_key),
+                connector=aiohttp.TCPConnector(limit=self.limits.max_concurrent, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.limits.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Shutdown-хук: закрытие соединений"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Запрос к API
+
+        Raises:
+            YooKassaError: Ответ с ошибкой
+        """
+        headers = {"Idempotence-Key": idempotency_key} if idempotency_key else None
+        for attempt in range(self.MAX_PROCESSING_ATTEMPTS):
+            self._requests += 1
+            url = f"{self.payment.api_url.rstrip('/')}/{path}"
+            async with self._get_session().request(method, url, json=body, headers=headers) as response:
+                try:
+                    data = await response.json(content_type=None) or {}
+                except ValueError:
+                    data = {}  # Не JSON (например, страница ошибки прокси)
+                if response.status == 200:
+                    return data
+                if response.status == 202 and attempt + 1 < self.MAX_PROCESSING_ATTEMPTS:
+                    # Запрос ещё обрабатывается - повтор с тем же ключом через указанное время
+                    self._processing_retries += 1
+                    await asyncio.sleep(int(data.get("retry_after", 1000)) / 1000)
+                    continue
+                self._errors += 1
+                raise YooKassaError(response.status, data.get("code", ""), data.get("description", ""))
+
+    async def create_payment(self, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Создание платежа
+
+        Args:
+            payload: Тело запроса POST /payments
+            idempotency_key: Ключ идемпотентности (по умолчанию - новый)
+
+        Returns:
+            Объект платежа
+        """
+        return await self._request("POST", "payments", payload, idempotency_key or uuid.uuid4().hex)
+
+    async def get_payment(self, payment_id: str) -> Dict[str, Any]:
+        """Объект платежа по ID ЮKassa"""
+        return await self._request("GET", f"payments/{payment_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "requests": self._requests,
+            "processing_retries": self._processing_retries,
+            "errors": self._errors,
+        }
+
+
+# Клиент процесса (настраивается из конфигурации один раз)
+client = YooKassaClient(config.payment, config.yookassa_api)
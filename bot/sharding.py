@@ -0,0 +1,370 @@
+"""Многопроцессный режим: приёмник апдейтов и воркеры, шардированные по пользователю"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from multiprocessing.context import SpawnProcess
+from multiprocessing.sharedctypes import SynchronizedArray
+from typing import Any, List, Optional, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+
+from bot.backlog import answer_dropped, collapse_backlog, confirm_updates, iter_backlog
+from bot.config import config
+from bot.database.connection import close_db, init_db
+
+logger = logging.getLogger(__name__)
+
+# spawn: каждый воркер создаёт собственные event loop, движок БД и сессию бота
+_mp = multiprocessing.get_context("spawn")
+
+
+# Изменение общего состояния от воркера: (вид, воркер-источник, user_id, ...)
+# ("blocked", источник, user_id, заблокирован) - блокировка пользователя
+# ("user", источник, user_id) - пользователь изменён, профиль в кэше устарел
+WorkerEvent = Tuple[Any, ...]
+
+# Период проверки очередей изменений от воркеров, с
+FORWARD_POLL_INTERVAL = 0.05
+
+# Сколько ждать апдейтов, ещё не записанных в очередь остановленного воркера, с
+QUEUE_DRAIN_TIMEOUT = 0.5
+
+
+def get_shard(update: Update, workers: int) -> int:
+    """
+    Номер воркера для апдейта.
+
+    Все апдейты одного пользователя попадают в один воркер, поэтому
+    сохраняются порядок их обработки и FSM-состояние в памяти воркера.
+    """
+    chat, user, _ = UserContextMiddleware.resolve_event_context(update)
+    if user is not None:
+        return user.id % workers
+    if chat is not None:
+        return chat.id % workers
+    return update.update_id % workers
+
+
+# ============== Воркер ==============
+
+def run_worker(
+    index: int,
+    workers: int,
+    updates: "multiprocessing.Queue",
+    events: "multiprocessing.Queue",
+    heartbeats: SynchronizedArray,
+):
+    """Точка входа процесса-воркера"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s - worker-{index} - %(name)s - %(levelname)s - %(message)s",
+    )
+    # Останавливает воркер приёмник (через None в очереди), а не Ctrl+C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # SIGTERM - штатный выход: очереди успевают дописать начатое
+    signal.signal(signal.SIGTERM, _exit_on_terminate)
+    asyncio.run(_worker_main(index, workers, updates, events, heartbeats))
+
+
+def _exit_on_terminate(signum, frame):
+    """Обработчик SIGTERM в воркере"""
+    raise SystemExit(0)
+
+
+async def _worker_main(
+    index: int,
+    workers: int,
+    updates: "multiprocessing.Queue",
+    events: "multiprocessing.Queue",
+    heartbeats: SynchronizedArray,
+):
+    """Обработка апдейтов из очереди воркера"""
+    from bot.main import create_bot, create_dispatcher
+    from bot.services import broadcast, outbox
+    from bot.utils import blocklist, send_scheduler, user_cache
+
+    # Изменения делает воркер пользователя или администратора - остальным их передаёт приёмник
+    blocklist.publish = lambda user_id, blocked: events.put(("blocked", index, user_id, blocked))
+    user_cache.publish = lambda user_id: events.put(("user", index, user_id))
+
+    # Уведомления чата и рассылки администратора - в воркере, который обрабатывает их апдейты
+    outbox.sender.shard = (index, workers)
+    broadcast.engine.shard = (index, workers)
+    # Общий лимит отправки делится между воркерами
+    send_scheduler.scheduler.set_global_rate(config.sender.global_rate / workers)
+
+    bot = create_bot()
+    dp = create_dispatcher()
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    heartbeat = asyncio.create_task(_heartbeat(index, heartbeats))
+    logger.info(f"Воркер {index} запущен (pid {os.getpid()})")
+
+    try:
+        while True:
+            raw = await loop.run_in_executor(None, updates.get)
+            if raw is None:
+                break
+            if isinstance(raw, tuple):
+                _apply_event(raw)
+                continue
+            update = Update.model_validate(raw, context={"bot": bot})
+            task = asyncio.create_task(_process_update(dp, bot, update))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        heartbeat.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=config.concurrency.drain_timeout)
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+        await bot.session.close()
+        logger.info(f"Воркер {index} остановлен")
+
+
+def _apply_event(event: WorkerEvent) -> None:
+    """Изменение, сделанное в другом воркере"""
+    from bot.utils import blocklist, user_cache
+
+    kind, _, user_id, *rest = event
+    if kind == "blocked":
+        blocklist.apply(user_id, *rest)
+    user_cache.users.invalidate(user_id)
+
+
+async def _process_update(dp: Dispatcher, bot: Bot, update: Update):
+    """Обработка одного апдейта"""
+    try:
+        await dp.feed_update(bot, update)
+    except Exception as e:
+        logger.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+
+
+async def _heartbeat(index: int, heartbeats: SynchronizedArray):
+    """
+    Периодическая отметка о работоспособности.
+
+    Отметка ставится из event loop, поэтому зависший loop тоже
+    обнаруживается приёмником.
+    """
+    while True:
+        heartbeats[index] = time.time()
+        await asyncio.sleep(config.sharding.heartbeat_interval)
+
+
+# ============== Приёмник ==============
+
+class ShardSupervisor:
+    """Запуск, контроль здоровья и перезапуск воркеров"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.queues: List["multiprocessing.Queue"] = [_mp.Queue() for _ in range(workers)]
+        # Изменения общего состояния от каждого воркера - приёмник передаёт их остальным.
+        # Очереди у воркеров свои: убитый посреди записи воркер портит только свою
+        self.events: List["multiprocessing.Queue"] = [_mp.Queue() for _ in range(workers)]
+        self._forwarding_stopped = threading.Event()
+        self.heartbeats: SynchronizedArray = _mp.Array("d", workers)
+        self.processes: List[Optional[SpawnProcess]] = [None] * workers
+        self.restarts = 0
+
+    def start(self, index: int) -> None:
+        """Запуск воркера (очередь переживает перезапуск, апдейты не теряются)"""
+        self.heartbeats[index] = time.time()
+        process = _mp.Process(
+            target=run_worker,
+            args=(index, self.workers, self.queues[index], self.events[index], self.heartbeats),
+            name=f"bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[index] = process
+
+    def start_all(self) -> None:
+        """Запуск всех воркеров"""
+        for index in range(self.workers):
+            self.start(index)
+
+    def dispatch(self, update: Update) -> None:
+        """Передача апдейта воркеру его пользователя"""
+        raw = update.model_dump(mode="json", exclude_none=True)
+        self.queues[get_shard(update, self.workers)].put(raw)
+
+    def forward_events(self) -> None:
+        """Поток приёмника: передача изменений от каждого воркера остальным до stop_forwarding"""
+        while not self._forwarding_stopped.is_set():
+            forwarded = False
+            for events in list(self.events):
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    continue
+                forwarded = True
+                origin = event[1]
+                for index, updates in enumerate(self.queues):
+                    if index != origin:
+                        updates.put(event)
+            if not forwarded:
+                self._forwarding_stopped.wait(FORWARD_POLL_INTERVAL)
+
+    def stop_forwarding(self) -> None:
+        """Остановка потока forward_events"""
+        self._forwarding_stopped.set()
+
+    def check_health(self) -> None:
+        """Перезапуск упавших и зависших воркеров"""
+        deadline = time.time() - config.sharding.heartbeat_timeout
+        for index, process in enumerate(self.processes):
+            if process is not None and process.is_alive() and self.heartbeats[index] >= deadline:
+                continue
+            reason = "завершился" if process is None or not process.is_alive() else "не отвечает"
+            logger.error(f"Воркер {index} {reason}, перезапуск")
+            if process is not None:
+                self._force_stop(index, process)
+            self.restarts += 1
+            self.start(index)
+
+    def _force_stop(self, index: int, process: SpawnProcess) -> None:
+        """
+        Принудительная остановка воркера: SIGTERM, затем SIGKILL
+
+        Воркер мог остановиться посреди чтения или записи очереди (с
+        захваченной блокировкой очереди), поэтому его очереди заменяются
+        новыми, а непрочитанные апдейты переносятся в новую очередь.
+        """
+        if process.is_alive():
+            process.terminate()
+            process.join(config.sharding.terminate_timeout)
+        if process.is_alive():
+            logger.warning(f"Воркер {index} не завершился по SIGTERM, SIGKILL")
+            process.kill()
+            process.join()
+        self._replace_queues(index)
+
+    def _replace_queues(self, index: int) -> None:
+        """Новые очереди воркера вместо тех, что мог испортить остановленный процесс"""
+        stale, fresh = self.queues[index], _mp.Queue()
+        moved = 0
+        try:
+            while True:
+                # Блокировка чтения, захваченная убитым воркером, даёт Empty
+                item = stale.get(timeout=QUEUE_DRAIN_TIMEOUT)
+                if item is not None:  # Команда остановки относилась к старому процессу
+                    fresh.put(item)
+                    moved += 1
+        except queue.Empty:
+            pass
+        # Недописанное в старую очередь не должно задерживать выход приёмника
+        stale.cancel_join_thread()
+        self.queues[index] = fresh
+        self.events[index] = _mp.Queue()
+        logger.info(f"Очереди воркера {index} пересозданы, перенесено апдейтов: {moved}")
+
+    def restart_all(self, timeout: float) -> None:
+        """Поочерёдный мягкий перезапуск воркеров (например, после деплоя)"""
+        for index in range(self.workers):
+            self.stop(index, timeout)
+            self.start(index)
+        logger.info("Воркеры перезапущены")
+
+    def stop(self, index: int, timeout: float) -> None:
+        """Мягкая остановка воркера: он дообрабатывает свою очередь и выходит"""
+        process = self.processes[index]
+        if process is None:
+            return
+        self.queues[index].put(None)
+        process.join(timeout)
+        if process.is_alive():
+            logger.warning(f"Воркер {index} не завершился за {timeout} с, принудительная остановка")
+            self._force_stop(index, process)
+        self.processes[index] = None
+
+    def stop_all(self, timeout: float) -> None:
+        """Мягкая остановка: воркеры дообрабатывают очереди и выходят"""
+        for updates in self.queues:
+            updates.put(None)
+        deadline = time.monotonic() + timeout
+        for index, process in enumerate(self.processes):
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Воркер {index} не завершился за {timeout} с, принудительная остановка")
+                process.terminate()
+                process.join(config.sharding.terminate_timeout)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+
+
+async def run_sharded(bot: Bot, allowed_updates: Optional[List[str]] = None):
+    """
+    Приём апдейтов long polling и распределение по воркерам
+
+    Args:
+        bot: Бот приёмника (используется только для getUpdates)
+        allowed_updates: Типы апдейтов, которые нужны хендлерам
+    """
+    # Таблицы создаются один раз до запуска воркеров
+    await init_db()
+    await close_db()
+
+    workers = config.sharding.workers or os.cpu_count() or 1
+    supervisor = ShardSupervisor(workers)
+    supervisor.start_all()
+    logger.info(f"Запущено воркеров: {workers}")
+
+    loop = asyncio.get_running_loop()
+    restarting = asyncio.Lock()
+
+    async def monitor():
+        while True:
+            await asyncio.sleep(config.sharding.heartbeat_interval)
+            if not restarting.locked():
+                supervisor.check_health()
+
+    async def restart():
+        async with restarting:
+            await loop.run_in_executor(None, supervisor.restart_all, config.sharding.shutdown_timeout)
+
+    # SIGHUP - поочерёдный перезапуск воркеров без остановки приёма апдейтов
+    if hasattr(signal, "SIGHUP"):
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(restart()))
+
+    monitor_task = asyncio.create_task(monitor())
+    forwarder = loop.run_in_executor(None, supervisor.forward_events)
+    last_update_id = None
+    try:
+        # Накопившиеся за время остановки апдейты - без устаревших дублей
+        if not config.bot.skip_pending_updates:
+            # Пачка подтверждается после передачи воркерам
+            received = 0
+            last_keys = {}
+            async for batch in iter_backlog(bot, allowed_updates=allowed_updates):
+                kept, dropped = collapse_backlog(batch, last_keys)
+                await answer_dropped(bot, dropped)
+                for update in kept:
+                    supervisor.dispatch(update)
+                received += len(batch)
+            logger.info(f"Накопившиеся апдейты переданы воркерам: {received}")
+
+        async for update in Dispatcher._listen_updates(bot, allowed_updates=allowed_updates):
+            supervisor.dispatch(update)
+            last_update_id = update.update_id
+    finally:
+        monitor_task.cancel()
+        if last_update_id is not None:
+            await confirm_updates(bot, last_update_id)
+        logger.info("Остановка воркеров...")
+        await loop.run_in_executor(None, supervisor.stop_all, config.sharding.shutdown_timeout)
+        supervisor.stop_forwarding()
+        await forwarder
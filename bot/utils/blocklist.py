@@ -0,0 +1,40 @@
+"""Список заблокированных пользователей в памяти"""
+
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+# telegram_id заблокированных пользователей (зеркало User.is_blocked)
+_blocked: Set[int] = set()
+
+# Передача изменения остальным процессам (в многопроцессном режиме - через приёмник)
+publish: Optional[Callable[[int, bool], None]] = None
+
+
+def load(user_ids: Iterable[int]) -> None:
+    """Заполнение списка при запуске бота"""
+    _blocked.clear()
+    _blocked.update(user_ids)
+
+
+def set_blocked(user_id: int, blocked: bool) -> None:
+    """Обновление списка после изменения User.is_blocked (и в остальных процессах)"""
+    apply(user_id, blocked)
+    if publish is not None:
+        publish(user_id, blocked)
+
+
+def apply(user_id: int, blocked: bool) -> None:
+    """Обновление списка в текущем процессе"""
+    if blocked:
+        _blocked.add(user_id)
+    else:
+        _blocked.discard(user_id)
+
+
+def is_blocked(user_id: int) -> bool:
+    """Проверка блокировки без запроса к БД"""
+    return user_id in _blocked
+
+
+def stats() -> Dict[str, Any]:
+    """Показатели для реестра метрик"""
+    return {"blocked_users": len(_blocked)}
@@ -0,0 +1,74 @@
+"""Кэш в памяти с ограничением размера и временем жизни записей"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кэш с временем жизни записей.
+
+    Каждая инвалидация увеличивает epoch. Значение, прочитанное из БД
+    до инвалидации, не попадает в кэш (put с устаревшим epoch игнорируется),
+    поэтому параллельное чтение не может вернуть в кэш старые данные.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.epoch = 0
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+
+        # Метрики
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Значение из кэша или None"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self._misses += 1
+            return None
+        self._data.move_to_end(key)
+        self._hits += 1
+        return entry[1]
+
+    def put(self, key: Any, value: Any, epoch: int) -> None:
+        """
+        Сохранение значения
+
+        Args:
+            epoch: Значение self.epoch на момент начала чтения из БД
+        """
+        if epoch != self.epoch:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Any) -> None:
+        """Удаление записи после изменения данных"""
+        self.epoch += 1
+        self._invalidations += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Полная очистка"""
+        self.epoch += 1
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._data),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "invalidations": self._invalidations,
+        }
@@ -0,0 +1,134 @@
+"""Типизированная схема callback_data для inline-кнопок"""
+
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+# Разделитель частей callback_data
+SEPARATOR = ":"
+
+
+class CallbackRoute:
+    """
+    Описание одного вида callback_data: префикс и типизированные поля.
+
+    Формат: "<prefix>:<field1>:<field2>...", например "edit_vac:15:title".
+    Маршрут без полей совпадает с callback_data целиком ("admin:menu").
+    """
+
+    __slots__ = ("prefix", "fields")
+
+    def __init__(self, prefix: str, **fields: Callable[[str], Any]):
+        self.prefix = prefix
+        self.fields: Tuple[Tuple[str, Callable[[str], Any]], ...] = tuple(fields.items())
+
+    def __repr__(self) -> str:
+        return f"CallbackRoute({self.prefix!r})"
+
+    @property
+    def depth(self) -> int:
+        """Количество частей префикса"""
+        return self.prefix.count(SEPARATOR) + 1
+
+    def pack(self, *values: Any) -> str:
+        """Сборка callback_data из значений полей"""
+        if len(values) != len(self.fields):
+            raise ValueError(f"{self!r} ожидает {len(self.fields)} значений, получено {len(values)}")
+        if not values:
+            return self.prefix
+        return SEPARATOR.join((self.prefix, *map(str, values)))
+
+    def unpack(self, parts: Sequence[str]) -> Dict[str, Any]:
+        """
+        Разбор значений полей (части после префикса)
+
+        Raises:
+            ValueError: если число частей или типы не совпадают со схемой
+        """
+        if len(parts) != len(self.fields):
+            raise ValueError(f"{self!r}: ожидалось {len(self.fields)} полей, получено {len(parts)}")
+        return {name: cast(value) for (name, cast), value in zip(self.fields, parts)}
+
+
+# ============== Общие ==============
+
+MENU = CallbackRoute("menu")
+CANCEL = CallbackRoute("cancel")
+CHANGE_ROLE = CallbackRoute("change_role")
+OFERTA = CallbackRoute("oferta")
+SUPPORT = CallbackRoute("support")
+ROLE = CallbackRoute("role", role=str)
+
+# ============== Работник ==============
+
+WORKER_MENU = CallbackRoute("worker:menu")
+WORKER_EDIT_RESUME = CallbackRoute("worker:edit_resume")
+WORKER_CANCEL_EDIT = CallbackRoute("worker:cancel_edit")
+WORKER_VIEW_VACANCIES = CallbackRoute("worker:view_vacancies")
+WORKER_SUBSCRIPTION = CallbackRoute("worker:subscription")
+CANCEL_EDIT = CallbackRoute("cancel_edit")
+EDIT_RESUME = CallbackRoute("edit_resume", field=str)
+NEXT_VACANCY = CallbackRoute("next_vacancy")
+RESPOND = CallbackRoute("respond", vacancy_id=int)
+
+# ============== Работодатель ==============
+
+EMPLOYER_MENU = CallbackRoute("employer:menu")
+EMPLOYER_CREATE_VACANCY = CallbackRoute("employer:create_vacancy")
+EMPLOYER_MY_VACANCIES = CallbackRoute("employer:my_vacancies")
+EMPLOYER_PAID_SERVICES = CallbackRoute("employer:paid_services")
+EMPLOYER_MY_PAYMENTS = CallbackRoute("employer:my_payments")
+VACANCY = CallbackRoute("vacancy", vacancy_id=int)
+DELETE_VACANCY = CallbackRoute("delete_vacancy", vacancy_id=int)
+BOOST_VACANCY = CallbackRoute("boost_vacancy", vacancy_id=int)
+PIN_VACANCY = CallbackRoute("pin_vacancy", vacancy_id=int)
+EDIT_VACANCY = CallbackRoute("edit_vacancy", vacancy_id=int)
+EDIT_VACANCY_FIELD = CallbackRoute("edit_vac", vacancy_id=int, field=str)
+CANCEL_EDIT_VACANCY = CallbackRoute("cancel_edit_vacancy", vacancy_id=int)
+
+# ============== Платежи ==============
+
+BUY_SUBSCRIPTION = CallbackRoute("buy_subscription")
+PAY_VACANCY_PUBLICATION = CallbackRoute("pay_vacancy_publication")
+PAY_BOOST = CallbackRoute("pay_boost", vacancy_id=int)
+PIN_DURATION = CallbackRoute("pin_duration", vacancy_id=int, days=int)
+
+# ============== Админ-панель ==============
+
+ADMIN_MENU = CallbackRoute("admin:menu")
+ADMIN_EXIT = CallbackRoute("admin:exit")
+ADMIN_BACK = CallbackRoute("admin:back")
+ADMIN_STATS = CallbackRoute("admin:stats")
+ADMIN_USERS = CallbackRoute("admin:users")
+ADMIN_LIST_WORKERS = CallbackRoute("admin:list_workers")
+ADMIN_LIST_EMPLOYERS = CallbackRoute("admin:list_employers")
+ADMIN_SEARCH_USER = CallbackRoute("admin:search_user")
+ADMIN_SUBSCRIPTIONS = CallbackRoute("admin:subscriptions")
+ADMIN_GRANT_SUBSCRIPTION = CallbackRoute("admin:grant_subscription")
+ADMIN_GRANT_VACANCIES_MENU = CallbackRoute("admin:grant_vacancies_menu")
+ADMIN_ACTIVE_SUBS = CallbackRoute("admin:active_subs")
+ADMIN_VACANCIES = CallbackRoute("admin:vacancies")
+ADMIN_PAYMENTS = CallbackRoute("admin:payments")
+ADMIN_LOGS = CallbackRoute("admin:logs")
+ADMIN_BROADCAST = CallbackRoute("admin:broadcast")
+ADMIN_BLOCK = CallbackRoute("admin:block", user_id=int)
+ADMIN_UNBLOCK = CallbackRoute("admin:unblock", user_id=int)
+ADMIN_GRANT_SUB = CallbackRoute("admin:grant_sub", user_id=int)
+ADMIN_GRANT_VACANCIES = CallbackRoute("admin:grant_vacancies", user_id=int)
+ADMIN_CANCEL_SUB = CallbackRoute("admin:cancel_sub", user_id=int)
+ADMIN_DEACTIVATE_VACANCY = CallbackRoute("admin:deactivate_vac", vacancy_id=int)
+ADMIN_ACTIVATE_VACANCY = CallbackRoute("admin:activate_vac", vacancy_id=int)
+ADMIN_DELETE_VACANCY = CallbackRoute("admin:delete_vac", vacancy_id=int)
+BROADCAST = CallbackRoute("broadcast", target=str)
+BROADCAST_JOB = CallbackRoute("broadcast_job", action=str, job_id=int)
+
+
+# ============== Группы маршрутов ==============
+
+# Первая часть callback_data маршрутов, создающих платёж
+PAYMENT_PREFIXES = frozenset(
+    route.prefix for route in (BUY_SUBSCRIPTION, PAY_VACANCY_PUBLICATION, PAY_BOOST, PIN_DURATION)
+)
+
+
+def head(data: str) -> str:
+    """Первая часть callback_data"""
+    return data.split(SEPARATOR, 1)[0]
@@ -0,0 +1,289 @@
+"""Ограничение параллельности и частоты обработки апдейтов"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+
+class Priority:
+    """Приоритеты апдейтов (меньше - важнее)"""
+    PAYMENT = 0  # Платежи
+    CALLBACK = 1  # Нажатия inline-кнопок
+    COMMAND = 2  # Команды (/start, /admin)
+    TEXT = 3  # Текст шагов FSM и прочие сообщения
+
+
+class UpdateLimiter:
+    """
+    Приоритетный семафор для апдейтов.
+
+    Одновременно обрабатывается не больше max_in_flight апдейтов,
+    остальные ждут в очереди по приоритету. Если очередь длиннее
+    max_queue, апдейты с приоритетом shed_priority и ниже отбрасываются.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, shed_priority: int = Priority.TEXT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.shed_priority = shed_priority
+        self._in_flight = 0
+        self._queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+        # Метрики
+        self._peak_queue = 0
+        self._processed = 0
+        self._shed = 0
+        self._wait_count = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """Количество обрабатываемых сейчас апдейтов"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество апдейтов в очереди"""
+        return self._queued
+
+    async def acquire(self, priority: int) -> bool:
+        """
+        Захват слота обработки
+
+        Returns:
+            False если апдейт отброшен из-за переполнения очереди
+        """
+        if self._in_flight < self.max_in_flight and not self._queued:
+            self._in_flight += 1
+            return True
+
+        if priority >= self.shed_priority and self._queued >= self.max_queue:
+            self._shed += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._queued += 1
+        self._peak_queue = max(self._peak_queue, self._queued)
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Слот уже передан этому апдейту - возвращаем его следующему
+            if future.done() and not future.cancelled():
+                self.release(processed=False)
+            raise
+        finally:
+            self._queued -= 1
+
+        waited = time.monotonic() - started
+        self._wait_count += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return True
+
+    @property
+    def idle(self) -> bool:
+        """Нет ни обрабатываемых, ни ожидающих апдейтов"""
+        return not self._in_flight and not self._queued
+
+    def release(self, processed: bool = True) -> None:
+        """
+        Освобождение слота: передаётся ожидающему с наивысшим приоритетом
+
+        Args:
+            processed: Апдейт обработан до конца (False - прерван или не начат)
+        """
+        if processed:
+            self._processed += 1
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self._queued,
+            "peak_queue_depth": self._peak_queue,
+            "processed": self._processed,
+            "shed": self._shed,
+            "waited": self._wait_count,
+            "wait_avg_s": self._wait_total / self._wait_count if self._wait_count else 0.0,
+            "wait_max_s": self._wait_max,
+        }
+
+
+class UserQueue:
+    """Очередь апдейтов одного пользователя"""
+
+    __slots__ = ("lock", "size", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.size = 0  # Апдейтов в обработке и ожидании
+        self.pending: Set[str] = set()  # Ключи callback-запросов в обработке и ожидании
+
+
+class UserSerializer:
+    """
+    Последовательная обработка апдейтов одного пользователя.
+
+    Апдейты пользователя выполняются строго по одному, поэтому хендлеры
+    не гонятся за current_index и daily_views. Повторное нажатие той же
+    кнопки, пока первое ещё не обработано, отбрасывается (коалесцируется).
+    Очередь пользователя удаляется, как только она опустела, так что
+    память расходуется только на активных пользователей.
+    """
+
+    def __init__(self):
+        self._queues: Dict[int, UserQueue] = {}
+
+        # Метрики
+        self._peak_users = 0
+        self._contended = 0
+        self._coalesced = 0
+
+    @property
+    def active_users(self) -> int:
+        """Количество пользователей с апдейтами в обработке или ожидании"""
+        return len(self._queues)
+
+    def enter(self, user_id: int, key: Optional[str] = None) -> Optional[UserQueue]:
+        """
+        Постановка апдейта в очередь пользователя
+
+        Args:
+            user_id: ID пользователя
+            key: Ключ для коалесцирования (callback_data) или None
+
+        Returns:
+            Очередь пользователя или None, если такой же апдейт уже в очереди
+        """
+        queue = self._queues.get(user_id)
+        if queue is None:
+            queue = self._queues[user_id] = UserQueue()
+            self._peak_users = max(self._peak_users, len(self._queues))
+        elif key is not None and key in queue.pending:
+            self._coalesced += 1
+            return None
+
+        if queue.size:
+            self._contended += 1
+        queue.size += 1
+        if key is not None:
+            queue.pending.add(key)
+        return queue
+
+    def leave(self, user_id: int, queue: UserQueue, key: Optional[str] = None) -> None:
+        """Удаление апдейта из очереди пользователя"""
+        queue.size -= 1
+        if key is not None:
+            queue.pending.discard(key)
+        if not queue.size:
+            self._queues.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "active_users": self.active_users,
+            "peak_active_users": self._peak_users,
+            "contended": self._contended,
+            "coalesced": self._coalesced,
+        }
+
+
+class SlidingWindowLimiter:
+    """
+    Ограничение частоты по скользящему окну.
+
+    Для каждого ключа хранится не больше limit отметок времени, а ключей -
+    не больше max_keys (давно неактивные вытесняются первыми).
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[int, Deque[float]]" = OrderedDict()
+        self._rejected = 0
+
+    def hit(self, key: int) -> bool:
+        """
+        Учёт действия
+
+        Returns:
+            False если лимит в окне исчерпан
+        """
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque(maxlen=self.limit)
+            if len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+
+        if len(hits) >= self.limit and now - hits[0] < self.window:
+            self._rejected += 1
+            return False
+
+        hits.append(now)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "tracked_users": len(self._hits),
+            "rejected": self._rejected,
+        }
+
+
+class TokenBucket:
+    """
+    Маркерная корзина: в среднем rate действий в секунду,
+    подряд - не больше capacity
+    """
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def take(self) -> float:
+        """
+        Попытка взять маркер
+
+        Returns:
+            0 если маркер взят, иначе сколько секунд ждать следующего
+        """
+        now = time.monotonic()
+        if now < self._updated:
+            # Корзина приостановлена (pause)
+            return self._updated - now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Приостановка: маркеры снова начнут копиться через seconds секунд"""
+        resume_at = time.monotonic() + seconds
+        if resume_at > self._updated:
+            self._tokens = 0.0
+            self._updated = resume_at
@@ -0,0 +1,34 @@
+"""Реестр метрик производительности бота"""
+
+from typing import Any, Callable, Dict
+
+# Имя компонента -> функция, возвращающая его текущие показатели
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Регистрация источника метрик
+
+    Args:
+        name: Имя компонента (например, "updates")
+        provider: Функция без аргументов, возвращающая словарь показателей
+    """
+    _providers[name] = provider
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Текущие показатели всех зарегистрированных компонентов"""
+    return {name: provider() for name, provider in _providers.items()}
+
+
+def format_snapshot() -> str:
+    """Текстовое представление метрик для админ-панели"""
+    lines = []
+    for name, values in snapshot().items():
+        lines.append(f"<b>{name}</b>")
+        for key, value in values.items():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            lines.append(f"  {key}: {value}")
+    return "\n".join(lines) if lines else "Метрики не зарегистрированы"
@@ -0,0 +1,233 @@
+"""Защита исходящих вызовов внешних сервисов: бюджет времени, автомат отключения, ограничение параллельности"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from bot.config import ExternalServiceConfig
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ServiceUnavailable(Exception):
+    """Вызов не выполнен: автомат разомкнут, нет свободного слота или превышен бюджет времени"""
+
+
+class CircuitState:
+    """Состояния автомата отключения"""
+    CLOSED = "closed"  # Вызовы проходят
+    OPEN = "open"  # Вызовы сразу отклоняются
+    HALF_OPEN = "half_open"  # Проходит один пробный вызов
+
+
+class ExternalService:
+    """
+    Ограничитель вызовов внешнего сервиса.
+
+    Каждый вызов получает бюджет времени и занимает один из max_concurrent
+    слотов; если свободного слота нет дольше queue_timeout, вызов
+    отклоняется, а не копится за медленным сервисом. Если за последние
+    window_seconds доля ошибок достигла error_rate (при min_calls вызовах
+    и больше), автомат размыкается: open_seconds вызовы отклоняются сразу,
+    затем один пробный вызов решает, замкнуть ли его снова.
+
+    Для идемпотентных запросов задаётся hedge_after: если ответа нет
+    за это время, параллельно отправляется повторный запрос и берётся
+    первый успешный ответ.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        settings: ExternalServiceConfig,
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+    ):
+        self.name = name
+        self.settings = settings
+        self.is_failure = is_failure  # Ошибки клиента (неверный запрос) не размыкают автомат
+        self._slots = asyncio.Semaphore(settings.max_concurrent)
+        self._in_flight = 0
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._window: Deque[Tuple[float, bool]] = deque()
+        self._window_failures = 0
+
+        # Метрики
+        self._calls = 0
+        self._failures = 0
+        self._timeouts = 0
+        self._rejected_open = 0
+        self._rejected_busy = 0
+        self._hedged = 0
+        self._opened = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    async def call(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполнение вызова
+
+        Args:
+            attempt: Функция, запускающая одну попытку (при хеджировании вызывается дважды)
+
+        Raises:
+            ServiceUnavailable: Автомат разомкнут, нет слота или превышен бюджет времени
+        """
+        probe = self._allow()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.settings.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected_busy += 1
+            self._end_probe(probe)
+            raise ServiceUnavailable(f"{self.name}: нет свободных слотов") from None
+        except BaseException:
+            self._end_probe(probe)
+            raise
+
+        self._in_flight += 1
+        self._calls += 1
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self._attempt(attempt), self.settings.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            self._record(False, probe, started)
+            raise ServiceUnavailable(f"{self.name}: нет ответа за {self.settings.timeout} с") from None
+        except asyncio.CancelledError:
+            # Вызывающая задача отменена - о здоровье сервиса это ничего не говорит
+            self._end_probe(probe)
+            raise
+        except Exception as e:
+            self._record(not self.is_failure(e), probe, started)
+            raise
+        else:
+            self._record(True, probe, started)
+            return result
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def _attempt(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Попытка вызова с повторным запросом, если первый задерживается"""
+        first = asyncio.ensure_future(attempt())
+        if self.settings.hedge_after is None:
+            return await first
+
+        tasks: List[asyncio.Future] = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.settings.hedge_after)
+            if not done:
+                self._hedged += 1
+                tasks.append(asyncio.ensure_future(attempt()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _allow(self) -> bool:
+        """
+        Проверка автомата перед вызовом
+
+        Returns:
+            True если вызов пробный
+
+        Raises:
+            ServiceUnavailable: Автомат разомкнут
+        """
+        if self._state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.settings.open_seconds:
+                self._rejected_open += 1
+                raise ServiceUnavailable(f"{self.name}: сервис временно отключён")
+            self._state = CircuitState.HALF_OPEN
+        if self._state == CircuitState.HALF_OPEN:
+            if self._probing:
+                self._rejected_open += 1
+                raise ServiceUnavailable(f"{self.name}: сервис временно отключён")
+            self._probing = True
+            return True
+        return False
+
+    def _end_probe(self, probe: bool) -> None:
+        """Пробный вызов не состоялся - следующий вызов снова станет пробным"""
+        if probe:
+            self._probing = False
+
+    def _record(self, ok: bool, probe: bool, started: float) -> None:
+        """Учёт результата вызова"""
+        now = time.monotonic()
+        latency = now - started
+        self._latency_total += latency
+        self._latency_max = max(self._latency_max, latency)
+        if not ok:
+            self._failures += 1
+
+        if probe:
+            self._probing = False
+            if ok:
+                logger.info(f"{self.name}: сервис снова отвечает, автомат замкнут")
+                self._state = CircuitState.CLOSED
+                self._window.clear()
+                self._window_failures = 0
+            else:
+                self._open(now)
+            return
+
+        self._window.append((now, ok))
+        if not ok:
+            self._window_failures += 1
+        while self._window and self._window[0][0] < now - self.settings.window_seconds:
+            _, old_ok = self._window.popleft()
+            if not old_ok:
+                self._window_failures -= 1
+
+        if (
+            self._state == CircuitState.CLOSED
+            and len(self._window) >= self.settings.min_calls
+            and self._window_failures / len(self._window) >= self.settings.error_rate
+        ):
+            logger.warning(
+                f"{self.name}: ошибок {self._window_failures} из {len(self._window)}, "
+                f"вызовы отклоняются {self.settings.open_seconds} с"
+            )
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        """Размыкание автомата"""
+        self._state = CircuitState.OPEN
+        self._opened_at = now
+        self._opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        return {
+            "state": self._state,
+            "in_flight": self._in_flight,
+            "calls": self._calls,
+            "failures": self._failures,
+            "timeouts": self._timeouts,
+            "rejected_open": self._rejected_open,
+            "rejected_busy": self._rejected_busy,
+            "hedged": self._hedged,
+            "opened": self._opened,
+            "window_error_rate": self._window_failures / len(self._window) if self._window else 0.0,
+            "latency_avg_s": self._latency_total / self._calls if self._calls else 0.0,
+            "latency_max_s": self._latency_max,
+        }
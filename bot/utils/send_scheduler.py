@@ -0,0 +1,215 @@
+"""Планировщик исходящих сообщений: лимиты Telegram на бота и на чат"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage,
+    ForwardMessage,
+    Response,
+    SendAnimation,
+    SendAudio,
+    SendContact,
+    SendDocument,
+    SendLocation,
+    SendMediaGroup,
+    SendMessage,
+    SendPhoto,
+    SendSticker,
+    SendVenue,
+    SendVideo,
+    SendVideoNote,
+    SendVoice,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+
+from bot.config import SenderConfig, config
+from bot.utils.concurrency import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Методы, на которые действуют лимиты Telegram на отправку сообщений
+SEND_METHODS = (
+    SendMessage,
+    SendPhoto,
+    SendMediaGroup,
+    SendDocument,
+    SendVideo,
+    SendAnimation,
+    SendAudio,
+    SendVoice,
+    SendVideoNote,
+    SendSticker,
+    SendLocation,
+    SendVenue,
+    SendContact,
+    CopyMessage,
+    ForwardMessage,
+)
+
+
+class Lane:
+    """Полосы исходящих сообщений (меньше - важнее)"""
+    INTERACTIVE = 0  # Ответы пользователю в хендлерах
+    NOTIFICATION = 1  # Уведомления outbox
+    BULK = 2  # Рассылки
+
+
+LANE_NAMES = {
+    Lane.INTERACTIVE: "interactive",
+    Lane.NOTIFICATION: "notification",
+    Lane.BULK: "bulk",
+}
+
+# Полоса текущей задачи: по умолчанию - ответ пользователю
+_lane: ContextVar[int] = ContextVar("send_lane", default=Lane.INTERACTIVE)
+
+
+@contextmanager
+def send_lane(lane: int) -> Iterator[None]:
+    """Отправка сообщений внутри блока по указанной полосе (наследуется дочерними задачами)"""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Middleware сессии бота, согласующий все отправки с лимитами Telegram.
+
+    Сообщение в чат ждёт маркер корзины этого чата, затем - маркер общей
+    корзины бота. Общие маркеры выдаются по полосам: ответы пользователям
+    раньше уведомлений, уведомления раньше рассылок. После RetryAfter
+    чат приостанавливается, а запрос повторяется автоматически.
+    """
+
+    def __init__(self, settings: SenderConfig):
+        self.settings = settings
+        self._global = TokenBucket(settings.global_rate, settings.global_burst)
+        self._chats: "OrderedDict[Union[int, str], TokenBucket]" = OrderedDict()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._pump: Optional[asyncio.Task] = None
+
+        # Метрики
+        self._queued = {lane: 0 for lane in LANE_NAMES}
+        self._sent = {lane: 0 for lane in LANE_NAMES}
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._retry_after = 0
+
+    def set_global_rate(self, rate: float) -> None:
+        """Изменение общего лимита (в многопроцессном режиме лимит делится между воркерами)"""
+        self._global = TokenBucket(rate, max(1, min(self.settings.global_burst, int(rate))))
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, SEND_METHODS):
+            return await make_request(bot, method)
+
+        lane = _lane.get()
+        for attempt in itertools.count():
+            await self._acquire(method.chat_id, lane)
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self._retry_after += 1
+                self._chat_bucket(method.chat_id).pause(e.retry_after)
+                if attempt >= self.settings.max_retries or e.retry_after > self.settings.max_retry_wait:
+                    raise
+                logger.warning(f"RetryAfter {e.retry_after} с для чата {method.chat_id}, повтор")
+                continue
+            self._sent[lane] += 1
+            return response
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        """Корзина чата (давно неактивные чаты вытесняются первыми)"""
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.settings.chat_rate, self.settings.chat_burst)
+            if len(self._chats) > self.settings.max_tracked_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def _acquire(self, chat_id: Union[int, str], lane: int) -> None:
+        """Ожидание права на отправку в чат"""
+        started = time.monotonic()
+        bucket = self._chat_bucket(chat_id)
+        while True:
+            delay = bucket.take()
+            if not delay:
+                break
+            await asyncio.sleep(delay)
+
+        if self._waiters or self._global.take():
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (lane, next(self._counter), future))
+            self._queued[lane] += 1
+            if self._pump is None or self._pump.done():
+                self._pump = asyncio.create_task(self._release_waiters())
+            try:
+                await future
+            finally:
+                self._queued[lane] -= 1
+
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self._throttled += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    async def _release_waiters(self) -> None:
+        """Выдача общих маркеров ожидающим по приоритету полосы"""
+        while self._waiters:
+            if self._waiters[0][2].done():
+                # Отправка отменена, пока ждала
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._global.take()
+            if delay:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Показатели для реестра метрик"""
+        result: Dict[str, Any] = {}
+        for lane, name in LANE_NAMES.items():
+            result[f"queue_{name}"] = self._queued[lane]
+            result[f"sent_{name}"] = self._sent[lane]
+        sent = sum(self._sent.values())
+        result.update({
+            "global_rate": self._global.rate,
+            "tracked_chats": len(self._chats),
+            "throttled": self._throttled,
+            "wait_avg_s": self._wait_total / self._throttled if self._throttled else 0.0,
+            "wait_max_s": self._wait_max,
+            "retry_after": self._retry_after,
+            "throttled_share": self._throttled / sent if sent else 0.0,
+        })
+        return result
+
+
+# Планировщик текущего процесса (подключается к сессии бота в create_bot)
+scheduler = SendScheduler(config.sender)
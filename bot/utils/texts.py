@@ -232,6 +232,19 @@ ADMIN_BROADCAST_DONE = """✅ Рассылка завершена
 Отправлено: {sent}
 Ошибок: {errors}"""
 
+ADMIN_BROADCAST_PROGRESS = """📢 Рассылка #{job_id}: {status}
+
+Обработано: {processed} из {total}
+Отправлено: {sent}
+Ошибок: {errors}"""
+
+BROADCAST_STATUSES = {
+    "running": "идёт",
+    "paused": "на паузе",
+    "cancelled": "отменена",
+    "done": "завершена",
+}
+
 # Поддержка и оферта
 SUPPORT_MESSAGE = """💬 Поддержка
 
@@ -315,6 +328,10 @@ LOCATION_SAVED = """✅ Местоположение сохранено!"""
 
 ERROR_EMPTY_TEXT = """❌ Текст не может быть пустым!"""
 
+USER_BLOCKED = """❌ Ваш аккаунт заблокирован. Обратитесь в поддержку."""
+
+THROTTLED = """⏳ Слишком часто! Подождите несколько секунд."""
+
 # Кнопки
 BTN_WORKER = "👤 Я ищу работу"
 BTN_EMPLOYER = "🧑‍💼 Я работодатель"
@@ -0,0 +1,56 @@
+"""Кэш часто читаемых полей пользователя"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from bot.config import config
+from bot.database.models import User
+from bot.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class UserProfile:
+    """Снимок полей пользователя, нужных для маршрутизации и меню"""
+    telegram_id: int
+    role: Optional[str]
+    city: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    is_blocked: bool
+    resume_complete: bool
+    reachable: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserProfile":
+        """Снимок из модели User"""
+        return cls(
+            telegram_id=user.telegram_id,
+            role=user.role,
+            city=user.city,
+            latitude=user.latitude,
+            longitude=user.longitude,
+            is_blocked=user.is_blocked,
+            resume_complete=user.is_resume_complete(),
+            reachable=user.unreachable_since is None,
+        )
+
+    def is_resume_complete(self) -> bool:
+        """Проверка заполненности резюме"""
+        return self.resume_complete
+
+
+# Профили пользователей по telegram_id
+users = TTLCache(
+    max_size=config.cache.user_max_size,
+    ttl=config.cache.user_ttl_seconds,
+)
+
+# Передача сброса остальным процессам (в многопроцессном режиме - через приёмник)
+publish: Optional[Callable[[int], None]] = None
+
+
+def invalidate(telegram_id: int) -> None:
+    """Сброс профиля после изменения пользователя в БД (и в остальных процессах)"""
+    users.invalidate(telegram_id)
+    if publish is not None:
+        publish(telegram_id)
@@ -0,0 +1,128 @@
+"""Кэш отрисованных карточек вакансий"""
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict
+
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.config import config
+from bot.database.models import Vacancy
+from bot.keyboards.worker import get_vacancy_buttons
+from bot.utils import texts
+from bot.utils.cache import TTLCache
+
+# Шаблоны делятся по первому полю, которое меняется от показа к показу:
+# расстояние зависит от работника, статистика - от просмотров и откликов
+_VIEW_HEAD, _VIEW_TAIL = texts.VACANCY_VIEW_TEMPLATE.split("{distance:.1f}")
+_DETAILS_HEAD, _DETAILS_TAIL = texts.VACANCY_DETAILS.split("{views}")
+_DETAILS_TAIL = "{views}" + _DETAILS_TAIL
+
+
+@dataclass(frozen=True)
+class VacancyCard:
+    """Отрисованные неизменные части карточки вакансии"""
+    view_head: str
+    view_tail: str
+    details_head: str
+    created: str
+    expires: str
+    buttons: InlineKeyboardMarkup  # Кнопки ленты (общий экземпляр, не изменять)
+
+    def caption(self, distance: float) -> str:
+        """Подпись карточки в ленте работника"""
+        return f"{self.view_head}{distance:.1f}{self.view_tail}"
+
+    def details(self, views: int, responses: int) -> str:
+        """Текст вакансии для работодателя со статистикой"""
+        return self.details_head + _DETAILS_TAIL.format(
+            views=views,
+            responses=responses,
+            created=self.created,
+            expires=self.expires,
+        )
+
+
+def render(vacancy: Vacancy) -> VacancyCard:
+    """Отрисовка карточки вакансии"""
+    fields = {
+        "title": vacancy.title,
+        "city": vacancy.city,
+        "salary": vacancy.salary,
+        "description": vacancy.description,
+    }
+    expires = vacancy.created_at + timedelta(days=config.limits.vacancy_lifetime_days)
+    return VacancyCard(
+        view_head=_VIEW_HEAD.format(**fields),
+        view_tail=_VIEW_TAIL.format(**fields),
+        details_head=_DETAILS_HEAD.format(**fields),
+        created=vacancy.created_at.strftime("%d.%m.%Y"),
+        expires=expires.strftime("%d.%m.%Y"),
+        buttons=get_vacancy_buttons(vacancy.id),
+    )
+
+
+# Карточки по (id, version): изменённая вакансия получает новый ключ
+cards = TTLCache(
+    max_size=config.cache.vacancy_card_max_size,
+    ttl=config.cache.vacancy_card_ttl_seconds,
+)
+
+_renders = 0
+_render_seconds = 0.0
+
+# Показы карточек в ленте: замена на месте (editMessageMedia) или новое сообщение
+_edited = 0
+_sent = 0
+_edit_fallbacks = 0
+_api_calls = 0
+
+
+def get_card(vacancy: Vacancy) -> VacancyCard:
+    """Карточка вакансии из кэша (отрисовывается при первом показе версии)"""
+    global _renders, _render_seconds
+    key = (vacancy.id, vacancy.version)
+    card = cards.get(key)
+    if card is None:
+        started = time.perf_counter()
+        card = render(vacancy)
+        _render_seconds += time.perf_counter() - started
+        _renders += 1
+        cards.put(key, card, cards.epoch)
+    return card
+
+
+def record_edit() -> None:
+    """Учёт карточки, заменённой на месте"""
+    global _edited, _api_calls
+    _edited += 1
+    _api_calls += 1
+
+
+def record_edit_fallback() -> None:
+    """Учёт неудачной замены на месте (запрос тоже считается)"""
+    global _edit_fallbacks, _api_calls
+    _edit_fallbacks += 1
+    _api_calls += 1
+
+
+def record_send(api_calls: int) -> None:
+    """Учёт карточки, отправленной новым сообщением"""
+    global _sent, _api_calls
+    _sent += 1
+    _api_calls += api_calls
+
+
+def stats() -> Dict[str, Any]:
+    """Показатели для реестра метрик"""
+    shown = _edited + _sent
+    return {
+        **cards.stats(),
+        "renders": _renders,
+        "render_avg_us": _render_seconds / _renders * 1e6 if _renders else 0.0,
+        "shown_edited": _edited,
+        "shown_sent": _sent,
+        "edit_fallbacks": _edit_fallbacks,
+        "api_calls_per_card": _api_calls / shown if shown else 0.0,
+    }
@@ -1,195 +1,149 @@
-"""Webhook сервер для обработки уведомлений от ЮKassa"""
+"""Webhook сервер для обработки уведомлений от ЮKassa и апдейтов Telegram"""
 
+import hmac
 import logging
 import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional, Set
 from fastapi import FastAPI, Request, HTTPException
-from yookassa import Configuration
-from aiogram import Bot
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
 
 from bot.config import config
-from bot.database.connection import async_session_maker
-from bot.database import crud
-from bot.services.payments import PaymentType
-from bot.keyboards.worker import get_worker_menu
-from bot.keyboards.employer import get_employer_menu, get_vacancy_management_keyboard
-from bot.utils import texts
-
-app = FastAPI()
+from bot.services import payment_inbox, payment_reconciler, yookassa_client
+from bot.utils import metrics, texts
+
 logger = logging.getLogger(__name__)
 
-# Инициализация ЮKassa
-Configuration.account_id = config.payment.shop_id
-Configuration.secret_key = config.payment.secret_key
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка обработки событий ЮKassa и приёма апдейтов Telegram вместе с сервером"""
+    await payment_inbox.inbox.start()
+    await payment_reconciler.reconciler.start()
+    await start_telegram_webhook()
+    yield
+    # Сначала события ЮKassa: их уведомления ещё успеет отправить outbox
+    await payment_reconciler.reconciler.stop()
+    await payment_inbox.inbox.stop()
+    # Принятые апдейты ещё могут создавать платежи - клиент ЮKassa закрывается
+    # после них: shutdown-хуком диспетчера, а без приёма апдейтов - здесь
+    await stop_telegram_webhook()
+    if dispatcher is None:
+        await yookassa_client.client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+metrics.register("payment_inbox", payment_inbox.inbox.stats)
+metrics.register("payment_reconciler", payment_reconciler.reconciler.stats)
+metrics.register("yookassa_reconcile_api", payment_reconciler.api.stats)
 
 # Глобальный экземпляр бота (будет установлен при запуске)
 bot_instance: Bot = None
 
+# Диспетчер для апдейтов Telegram (только при заданном TELEGRAM_WEBHOOK_URL)
+dispatcher: Optional[Dispatcher] = None
+
+# Апдейты, обрабатываемые в фоне после ответа Telegram
+_update_tasks: Set[asyncio.Task] = set()
+
+# Сервер останавливается: новые апдейты не принимаются (Telegram повторит их позже)
+_draining = False
+
 
 def set_bot_instance(bot: Bot):
-    """Установка экземпляра бота для отправки уведомлений"""
+    """Установка экземпляра бота для обработки апдейтов"""
     global bot_instance
     bot_instance = bot
 
 
-async def send_notification(telegram_id: int, message: str, reply_markup=None):
-    """Отправка уведомления пользователю"""
-    global bot_instance
+async def start_telegram_webhook():
+    """
+    Запуск приёма апдейтов Telegram через webhook
+
+    Raises:
+        RuntimeError: Задан TELEGRAM_WEBHOOK_URL, но не задан TELEGRAM_WEBHOOK_SECRET
+    """
+    global dispatcher
+    if not config.bot.webhook_url or not config.bot.token:
+        return
+    if not config.bot.webhook_secret:
+        # Без секрета любой, кто видит сервер, может прислать апдейт от имени администратора
+        raise RuntimeError("Для приёма апдейтов Telegram через webhook задайте TELEGRAM_WEBHOOK_SECRET")
+    
+    from bot.main import create_bot, create_dispatcher
+    
+    bot = create_bot()
+    set_bot_instance(bot)
+    dispatcher = create_dispatcher()
+    await dispatcher.emit_startup(bot=bot, **dispatcher.workflow_data)
+    
+    await bot.set_webhook(
+        url=config.bot.webhook_url.rstrip("/") + config.bot.webhook_path,
+        secret_token=config.bot.webhook_secret,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logger.info("Webhook Telegram установлен")
+
+
+async def stop_telegram_webhook():
+    """Остановка приёма апдейтов Telegram: дожидаемся обработки принятых апдейтов"""
+    global _draining
+    if dispatcher is None:
+        return
+    
+    _draining = True
+    if _update_tasks:
+        await asyncio.wait(_update_tasks, timeout=config.concurrency.drain_timeout)
+    await dispatcher.emit_shutdown(bot=bot_instance, **dispatcher.workflow_data)
+    await bot_instance.session.close()
+
+
+async def process_update(update: Update):
+    """Обработка апдейта Telegram диспетчером"""
     try:
-        # Если bot_instance не установлен, создаем новый
-        if not bot_instance:
-            if not config.bot.token:
-                logger.error("BOT_TOKEN not set, cannot send notification")
-                return
-            bot_instance = Bot(
-                token=config.bot.token,
-                default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-            )
-        
-        await bot_instance.send_message(
-            chat_id=telegram_id,
-            text=message,
-            reply_markup=reply_markup,
-            parse_mode=ParseMode.HTML
-        )
+        await dispatcher.feed_update(bot_instance, update)
     except Exception as e:
-        logger.error(f"Error sending notification to {telegram_id}: {e}")
+        logger.error(f"Error processing update {update.update_id}: {e}", exc_info=True)
+
+
+@app.post(config.bot.webhook_path)
+async def telegram_webhook(request: Request):
+    """Приём апдейта Telegram: ответ сразу, обработка в фоне"""
+    if dispatcher is None:
+        raise HTTPException(status_code=404)
+    if _draining:
+        raise HTTPException(status_code=503)
+    
+    secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not hmac.compare_digest(secret.encode(), config.bot.webhook_secret.encode()):
+        raise HTTPException(status_code=403)
+    
+    update = Update.model_validate(await request.json(), context={"bot": bot_instance})
+    task = asyncio.create_task(process_update(update))
+    _update_tasks.add(task)
+    task.add_done_callback(_update_tasks.discard)
+    return {"ok": True}
 
 
 @app.post(config.payment.webhook_path)
 async def yookassa_webhook(request: Request):
-    """Обработка webhook от ЮKassa"""
+    """Приём webhook от ЮKassa: событие сохраняется во входящую очередь, ответ - сразу"""
     try:
         event = await request.json()
-        event_type = event.get('event')
-        payment_obj = event.get('object', {})
-        
-        logger.info(f"Received webhook event: {event_type}, payment_id: {payment_obj.get('id')}")
-        
-        if event_type == 'payment.succeeded':
-            await handle_payment_succeeded(payment_obj)
-        elif event_type == 'payment.canceled':
-            await handle_payment_canceled(payment_obj)
-        
-        return {'status': 'ok'}
+        queued = await payment_inbox.inbox.accept(event)
+    except ValueError as e:
+        logger.warning(f"Invalid YooKassa webhook: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Webhook error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
-
-
-async def handle_payment_succeeded(payment_obj: dict):
-    """Обработка успешного платежа"""
-    yookassa_id = payment_obj.get('id')
-    metadata = payment_obj.get('metadata', {})
-    telegram_id = int(metadata.get('telegram_id', 0))
-    amount = float(payment_obj.get('amount', {}).get('value', 0))
-    
-    if not telegram_id:
-        logger.error(f"No telegram_id in metadata for payment {yookassa_id}")
-        return
-    
-    async with async_session_maker() as session:
-        try:
-            # Проверка уникальности
-            existing_payment = await crud.get_payment_by_yookassa_id(session, yookassa_id)
-            if existing_payment and existing_payment.status == 'succeeded':
-                logger.warning(f"Duplicate webhook for payment {yookassa_id}")
-                return
-            
-            # Получение платежа из БД
-            if not existing_payment:
-                # Создаем запись если не найдена (на случай если webhook пришел раньше)
-                payment = await crud.create_payment(
-                    session=session,
-                    user_id=telegram_id,
-                    payment_type=metadata.get('payment_type', ''),
-                    amount=int(amount),
-                    vacancy_id=int(metadata.get('vacancy_id')) if metadata.get('vacancy_id') else None,
-                    yookassa_id=yookassa_id
-                )
-            else:
-                payment = existing_payment
-            
-            # Проверка статуса
-            if payment.status == 'succeeded':
-                logger.info(f"Payment {yookassa_id} already processed")
-                return
-            
-            # Обновление статуса
-            await crud.mark_payment_succeeded(session, payment.id)
-            
-            # Активация услуги
-            payment_type = payment.payment_type
-            
-            if payment_type == PaymentType.WORKER_SUBSCRIPTION:
-                await crud.grant_subscription(session, telegram_id, days=30)
-                await send_notification(
-                    telegram_id,
-                    "✅ Подписка активирована на 30 дней!\n\nТеперь у вас безлимитный просмотр вакансий.",
-                    reply_markup=get_worker_menu()
-                )
-                
-            elif payment_type == PaymentType.VACANCY_PUBLICATION:
-                # Увеличиваем счетчик вакансий работодателя
-                await crud.grant_free_vacancies(session, telegram_id, count=1)
-                await send_notification(
-                    telegram_id,
-                    "✅ Оплата прошла успешно!\n\nТеперь вы можете создать вакансию.",
-                    reply_markup=get_employer_menu()
-                )
-                
-            elif payment_type == PaymentType.VACANCY_BOOST:
-                if payment.vacancy_id:
-                    await crud.boost_vacancy(session, payment.vacancy_id)
-                    vacancy = await crud.get_vacancy(session, payment.vacancy_id)
-                    if vacancy:
-                        await send_notification(
-                            telegram_id,
-                            f"✅ Вакансия «{vacancy.title}» поднята в начало списка!",
-                            reply_markup=get_vacancy_management_keyboard(payment.vacancy_id, vacancy.is_active)
-                        )
-                
-            elif payment_type in [PaymentType.VACANCY_PIN_1D, PaymentType.VACANCY_PIN_3D, PaymentType.VACANCY_PIN_7D]:
-                if payment.vacancy_id:
-                    days = {
-                        PaymentType.VACANCY_PIN_1D: 1,
-                        PaymentType.VACANCY_PIN_3D: 3,
-                        PaymentType.VACANCY_PIN_7D: 7,
-                    }.get(payment_type, 1)
-                    await crud.pin_vacancy(session, payment.vacancy_id, days=days)
-                    vacancy = await crud.get_vacancy(session, payment.vacancy_id)
-                    if vacancy:
-                        await send_notification(
-                            telegram_id,
-                            f"✅ Вакансия «{vacancy.title}» закреплена на {days} дн.!",
-                            reply_markup=get_vacancy_management_keyboard(payment.vacancy_id, vacancy.is_active)
-                        )
-            
-            await session.commit()
-            logger.info(f"Payment {yookassa_id} processed successfully")
-            
-        except Exception as e:
-            await session.rollback()
-            logger.error(f"Error processing payment {yookassa_id}: {e}", exc_info=True)
-            raise
-
-
-async def handle_payment_canceled(payment_obj: dict):
-    """Обработка отмененного платежа"""
-    yookassa_id = payment_obj.get('id')
-    metadata = payment_obj.get('metadata', {})
-    telegram_id = int(metadata.get('telegram_id', 0))
     
-    async with async_session_maker() as session:
-        try:
-            payment = await crud.get_payment_by_yookassa_id(session, yookassa_id)
-            if payment:
-                await crud.mark_payment_canceled(session, payment.id)
-                await session.commit()
-                logger.info(f"Payment {yookassa_id} marked as canceled")
-        except Exception as e:
-            logger.error(f"Error processing canceled payment {yookassa_id}: {e}", exc_info=True)
+    logger.info(
+        f"Received webhook event: {event.get('event')}, payment_id: {event['object'].get('id')}"
+        f"{'' if queued else ' (skipped)'}"
+    )
+    return {'status': 'ok'}
 
 
 @app.get("/yookassa/return")
@@ -0,0 +1,40 @@
+"""Общие фикстуры тестов: отдельная SQLite-база на каждый тест"""
+
+import asyncio
+import os
+import tempfile
+
+# До импорта bot: конфигурация читается при импорте
+_db_dir = tempfile.mkdtemp(prefix="naumrabota-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+import pytest
+
+from bot.database.connection import engine
+from bot.database.models import Base
+
+
+@pytest.fixture
+def run():
+    """
+    Выполнение корутины теста на чистой базе
+
+    Пул соединений сбрасывается после каждого запуска: соединения
+    aiosqlite привязаны к циклу событий, а asyncio.run создаёт новый.
+    """
+    async def reset():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    def runner(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+
+    asyncio.run(reset())
+    return runner
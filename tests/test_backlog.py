@@ -0,0 +1,129 @@
+"""Накопившиеся апдейты: подтверждение после обработки и сжатие повторов"""
+
+import asyncio
+from datetime import datetime
+
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from bot.backlog import answer_dropped, collapse_backlog, iter_backlog
+
+
+def _user(user_id: int) -> User:
+    return User(id=user_id, is_bot=False, first_name="Тест")
+
+
+def _press(update_id: int, user_id: int, data: str) -> Update:
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(id=str(update_id), from_user=_user(user_id), chat_instance="1", data=data),
+    )
+
+
+def _text(update_id: int, user_id: int, text: str) -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id,
+            date=datetime.now(),
+            chat=Chat(id=user_id, type="private"),
+            from_user=_user(user_id),
+            text=text,
+        ),
+    )
+
+
+def _ids(updates):
+    return [update.update_id for update in updates]
+
+
+def test_only_adjacent_repeats_of_a_user_are_collapsed():
+    updates = [
+        _press(1, 1, "next"),
+        _press(2, 2, "next"),  # Другой пользователь не прерывает серию
+        _press(3, 1, "next"),
+        _press(4, 1, "respond:5"),
+        _press(5, 1, "next"),
+        _text(6, 1, "/start"),
+        _text(7, 1, "/start"),
+        _text(8, 1, "Привет"),
+        _text(9, 1, "/start"),
+    ]
+
+    kept, dropped = collapse_backlog(updates)
+
+    assert _ids(kept) == [1, 2, 4, 5, 6, 8, 9]
+    assert _ids(dropped) == [3, 7]
+
+
+def test_run_across_batches_is_collapsed():
+    last_keys = {}
+    collapse_backlog([_press(1, 1, "next")], last_keys)
+
+    kept, dropped = collapse_backlog([_press(2, 1, "next"), _press(3, 1, "menu")], last_keys)
+
+    assert _ids(kept) == [3]
+    assert _ids(dropped) == [2]
+
+
+class FakeBot:
+    """getUpdates по списку апдейтов: offset подтверждает предыдущие"""
+
+    def __init__(self, updates):
+        self.queue = list(updates)
+        self.log = []
+
+    async def get_updates(self, offset=None, limit=100, **kwargs):
+        if offset is not None:
+            self.log.append(("confirm", offset))
+            self.queue = [update for update in self.queue if update.update_id >= offset]
+        return self.queue[:limit]
+
+
+def test_batch_is_confirmed_only_after_processing():
+    bot = FakeBot([_press(update_id, update_id, "next") for update_id in range(1, 251)])
+
+    async def scenario():
+        async for batch in iter_backlog(bot):
+            bot.log.append(("processed", batch[-1].update_id))
+
+    asyncio.run(scenario())
+
+    assert bot.log == [
+        ("processed", 100),
+        ("confirm", 101),
+        ("processed", 200),
+        ("confirm", 201),
+        ("processed", 250),
+        ("confirm", 251),
+    ]
+
+
+def test_interrupted_batch_is_not_confirmed():
+    bot = FakeBot([_press(update_id, update_id, "next") for update_id in range(1, 151)])
+
+    async def scenario():
+        async for batch in iter_backlog(bot):
+            if batch[-1].update_id == 150:
+                raise RuntimeError("Сбой при обработке")
+
+    try:
+        asyncio.run(scenario())
+    except RuntimeError:
+        pass
+
+    # Вторая пачка не подтверждена и придёт снова после перезапуска
+    assert bot.log == [("confirm", 101)]
+    assert _ids(bot.queue) == list(range(101, 151))
+
+
+def test_dropped_presses_are_answered():
+    answered = []
+
+    class AnsweringBot:
+        async def answer_callback_query(self, callback_query_id, **kwargs):
+            answered.append(callback_query_id)
+
+    _, dropped = collapse_backlog([_press(1, 1, "next"), _press(2, 1, "next"), _text(3, 1, "/start"), _text(4, 1, "/start")])
+    asyncio.run(answer_dropped(AnsweringBot(), dropped))
+
+    assert answered == ["2"]
@@ -0,0 +1,115 @@
+"""Рассылки: сохранение прогресса по получателям и остановка"""
+
+import asyncio
+import random
+
+from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.services.broadcast import BroadcastEngine
+
+ADMIN_ID = 1
+RECIPIENTS = list(range(100, 130))
+
+
+class FakeBot:
+    """Бот, запоминающий отправленные сообщения"""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.delivered = []
+        self.on_send = None
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(random.uniform(0, self.delay))
+        self.delivered.append(chat_id)
+        if self.on_send is not None:
+            await self.on_send(len(self.delivered))
+
+
+async def _create_job() -> int:
+    async with async_session_maker() as session:
+        for user_id in RECIPIENTS:
+            await crud.create_user(session, user_id)
+        job = await crud.create_broadcast_job(session, ADMIN_ID, None, "Новость", len(RECIPIENTS))
+    return job.id
+
+
+async def _wait(engine: BroadcastEngine) -> None:
+    while engine._tasks:
+        await asyncio.gather(*engine._tasks.values())
+
+
+def test_pause_mid_batch_resumes_without_repeats(run, monkeypatch):
+    monkeypatch.setattr(config.broadcast, "concurrency", 3)
+    engine = BroadcastEngine()
+    bot = FakeBot()
+
+    async def scenario():
+        job_id = await _create_job()
+        await engine.start(bot)
+
+        async def pause(delivered: int):
+            if delivered == 10:
+                async with async_session_maker() as session:
+                    await crud.set_broadcast_job_status(session, job_id, "paused")
+                engine.halt(job_id)
+
+        bot.on_send = pause
+        engine.launch(job_id)
+        await _wait(engine)
+        async with async_session_maker() as session:
+            paused = await crud.get_broadcast_job(session, job_id)
+        delivered_before_resume = len(bot.delivered)
+
+        bot.on_send = None
+        async with async_session_maker() as session:
+            await crud.set_broadcast_job_status(session, job_id, "running")
+        engine.launch(job_id)
+        await _wait(engine)
+        async with async_session_maker() as session:
+            finished = await crud.get_broadcast_job(session, job_id)
+        return paused, delivered_before_resume, finished
+
+    paused, delivered_before_resume, finished = run(scenario())
+
+    # Прогресс сохранён по завершённым отправкам, а не по пачке
+    assert paused.status == "paused"
+    assert paused.sent == delivered_before_resume < len(RECIPIENTS)
+    assert paused.last_user_id == RECIPIENTS[delivered_before_resume - 1]
+    assert sorted(bot.delivered) == RECIPIENTS
+    assert finished.status == "done"
+    assert finished.sent == len(RECIPIENTS)
+
+
+def test_stop_keeps_progress_and_cancels_stuck_tasks(run, monkeypatch):
+    monkeypatch.setattr(config.broadcast, "stop_timeout", 0.1)
+    monkeypatch.setattr(config.broadcast, "concurrency", 1)
+    engine = BroadcastEngine()
+    bot = FakeBot(delay=0)
+
+    async def scenario():
+        job_id = await _create_job()
+        await engine.start(bot)
+        hang = asyncio.Event()
+
+        async def stall(delivered: int):
+            if delivered == 5:
+                await hang.wait()
+
+        bot.on_send = stall
+        engine.launch(job_id)
+        while len(bot.delivered) < 5:
+            await asyncio.sleep(0.01)
+        await engine.stop()
+        async with async_session_maker() as session:
+            job = await crud.get_broadcast_job(session, job_id)
+        return engine._tasks, job
+
+    tasks, job = run(scenario())
+
+    assert tasks == {}
+    # Зависшая отправка прервана, завершённые до неё сохранены
+    assert job.status == "running"
+    assert job.sent == 4
+    assert job.last_user_id == RECIPIENTS[3]
@@ -0,0 +1,57 @@
+"""Геокодинг: объединение одновременных запросов к API"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot.config import config
+from bot.services import geocoding
+from bot.services.gazetteer import settlements
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Подмена запроса к API: считает вызовы и отвечает с задержкой"""
+    api = SimpleNamespace(calls=[], fail=False)
+
+    async def request(geocode, **params):
+        api.calls.append(geocode)
+        await asyncio.sleep(0.05)
+        if api.fail:
+            raise geocoding.GeocoderError("HTTP 500")
+        return {"Point": {"pos": "37.61 55.75"}}
+
+    monkeypatch.setattr(config.geocoding, "api_key", "test")
+    monkeypatch.setattr(geocoding, "_request", request)
+    return api
+
+
+def test_concurrent_lookups_make_one_request(run, upstream):
+    # Разное написание одного адреса даёт один ключ кэша
+    addresses = ["Москва, ул. Ленина, д. 10", "  москва,  ул. ленина, д. 10 "] * 10
+
+    async def scenario():
+        return await asyncio.gather(*(geocoding.geocode_address(address) for address in addresses))
+
+    results = run(scenario())
+
+    assert len(upstream.calls) == 1
+    assert results == [(55.75, 37.61)] * len(addresses)
+
+
+def test_failed_request_is_shared_and_not_cached(run, upstream):
+    address = "Казань, ул. Баумана, д. 1"
+    upstream.fail = True
+
+    async def scenario():
+        failed = await asyncio.gather(*(geocoding.geocode_address(address) for _ in range(5)))
+        upstream.fail = False
+        return failed, await geocoding.geocode_address(address)
+
+    failed, retried = run(scenario())
+
+    # Все ожидавшие получили центр города из справочника, а ошибка не закэширована
+    assert failed == [settlements.find_in_address(address).point] * 5
+    assert retried == (55.75, 37.61)
+    assert len(upstream.calls) == 2
@@ -0,0 +1,54 @@
+"""Сверка платежей: проведение платежа, событие которого не обработалось"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import PaymentEvent
+from bot.services import payment_reconciler
+from bot.services.payment_inbox import inbox
+from bot.services.payments import PaymentType
+
+USER_ID = 3001
+YOOKASSA_ID = "pay-stuck"
+
+PAYMENT_OBJ = {
+    "id": YOOKASSA_ID,
+    "status": "succeeded",
+    "amount": {"value": "100.00", "currency": "RUB"},
+    "metadata": {"telegram_id": str(USER_ID), "payment_type": PaymentType.VACANCY_PUBLICATION},
+}
+
+
+def test_reconciler_requeues_failed_webhook_event(run, monkeypatch):
+    async def get_payment(yookassa_id):
+        return PAYMENT_OBJ
+
+    monkeypatch.setattr(payment_reconciler.client, "get_payment", get_payment)
+
+    async def scenario():
+        async with async_session_maker() as session:
+            await crud.create_user(session, USER_ID)
+            await crud.create_payment(session, USER_ID, PaymentType.VACANCY_PUBLICATION, 100, yookassa_id=YOOKASSA_ID)
+            # Webhook принят, но все попытки обработки закончились ошибкой
+            await crud.add_payment_event(session, YOOKASSA_ID, "payment.succeeded", "{}")
+            event = await session.scalar(select(PaymentEvent))
+            await crud.fail_payment_event(session, event.id, "DB unavailable")
+
+        enqueued = await payment_reconciler.reconciler.reconcile(datetime.utcnow() + timedelta(seconds=1))
+        await inbox._process_due()
+
+        async with async_session_maker() as session:
+            payment = await crud.get_payment_by_yookassa_id(session, YOOKASSA_ID)
+            user = await crud.get_user(session, USER_ID)
+            event = await session.scalar(select(PaymentEvent))
+        return enqueued, payment, user, event
+
+    enqueued, payment, user, event = run(scenario())
+
+    assert enqueued == 1
+    assert payment.status == "succeeded"
+    assert user.paid_vacancy_credits == 1
+    assert event.status == "done"
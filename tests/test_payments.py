@@ -0,0 +1,73 @@
+"""Проведение платежей ЮKassa: одновременные события одного платежа"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import Notification
+from bot.services.payments import PaymentType, handle_payment_succeeded
+
+USER_ID = 1001
+YOOKASSA_ID = "pay-1"
+
+
+async def _create_pending_payment(payment_type: str) -> dict:
+    """Пользователь с платежом в pending; возвращает объект платежа ЮKassa"""
+    async with async_session_maker() as session:
+        await crud.create_user(session, USER_ID)
+        await crud.create_payment(session, USER_ID, payment_type, 100, yookassa_id=YOOKASSA_ID)
+    return {
+        "id": YOOKASSA_ID,
+        "status": "succeeded",
+        "amount": {"value": "100.00", "currency": "RUB"},
+        "metadata": {"telegram_id": str(USER_ID), "payment_type": payment_type},
+    }
+
+
+async def _notifications_count() -> int:
+    async with async_session_maker() as session:
+        return await session.scalar(
+            select(func.count()).select_from(Notification).where(Notification.chat_id == USER_ID)
+        )
+
+
+@pytest.mark.parametrize("payment_type", [PaymentType.WORKER_SUBSCRIPTION, PaymentType.VACANCY_PUBLICATION])
+def test_concurrent_success_events_grant_once(run, payment_type):
+    async def scenario():
+        payment_obj = await _create_pending_payment(payment_type)
+        await asyncio.gather(handle_payment_succeeded(payment_obj), handle_payment_succeeded(payment_obj))
+
+        async with async_session_maker() as session:
+            user = await crud.get_user(session, USER_ID)
+            payment = await crud.get_payment_by_yookassa_id(session, YOOKASSA_ID)
+        return user, payment, await _notifications_count()
+
+    user, payment, notifications = run(scenario())
+
+    assert payment.status == "succeeded"
+    assert notifications == 1
+    if payment_type == PaymentType.WORKER_SUBSCRIPTION:
+        # Повторная выдача продлила бы подписку до 60 дней
+        assert user.subscription_until < datetime.utcnow() + timedelta(days=31)
+    else:
+        assert user.paid_vacancy_credits == 1
+
+
+def test_repeated_success_event_is_ignored(run):
+    async def scenario():
+        payment_obj = await _create_pending_payment(PaymentType.VACANCY_PUBLICATION)
+        await handle_payment_succeeded(payment_obj)
+        await handle_payment_succeeded(payment_obj)
+
+        async with async_session_maker() as session:
+            user = await crud.get_user(session, USER_ID)
+        return user, await _notifications_count()
+
+    user, notifications = run(scenario())
+
+    assert user.paid_vacancy_credits == 1
+    assert notifications == 1
@@ -0,0 +1,76 @@
+"""Многопроцессный режим: передача изменений между воркерами и замена очередей"""
+
+import threading
+import time
+
+from bot import sharding
+from bot.sharding import ShardSupervisor, _apply_event
+from bot.utils import blocklist, user_cache
+
+
+def _drain(queue_, timeout: float = 1.0):
+    items = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            items.append(queue_.get(timeout=0.05))
+        except Exception:
+            if items:
+                break
+    return items
+
+
+def test_events_are_forwarded_to_other_workers():
+    supervisor = ShardSupervisor(3)
+    forwarder = threading.Thread(target=supervisor.forward_events)
+    forwarder.start()
+    try:
+        supervisor.events[0].put(("blocked", 0, 42, True))
+        supervisor.events[2].put(("user", 2, 7))
+        received = [_drain(updates) for updates in supervisor.queues]
+    finally:
+        supervisor.stop_forwarding()
+        forwarder.join()
+
+    assert received[0] == [("user", 2, 7)]
+    assert sorted(received[1]) == [("blocked", 0, 42, True), ("user", 2, 7)]
+    assert received[2] == [("blocked", 0, 42, True)]
+
+
+def test_cache_invalidation_is_published_and_applied():
+    published = []
+    user_cache.publish = published.append
+    try:
+        user_cache.users.put(7, "profile", user_cache.users.epoch)
+        user_cache.invalidate(7)
+    finally:
+        user_cache.publish = None
+
+    assert published == [7]
+    assert user_cache.users.get(7) is None
+
+    # В другом воркере: сброс без повторной публикации
+    user_cache.users.put(7, "profile", user_cache.users.epoch)
+    _apply_event(("user", 0, 7))
+    assert user_cache.users.get(7) is None
+
+    _apply_event(("blocked", 0, 8, True))
+    assert blocklist.is_blocked(8)
+    blocklist.apply(8, False)
+
+
+def test_force_stop_terminates_and_replaces_queues():
+    supervisor = ShardSupervisor(1)
+    stale_updates, stale_events = supervisor.queues[0], supervisor.events[0]
+    for item in ({"update_id": 1}, {"update_id": 2}, None):
+        stale_updates.put(item)
+    process = sharding._mp.Process(target=time.sleep, args=(60,))
+    process.start()
+
+    supervisor._force_stop(0, process)
+
+    assert not process.is_alive()
+    assert supervisor.queues[0] is not stale_updates
+    assert supervisor.events[0] is not stale_events
+    # Непрочитанные апдейты перенесены, команда остановки старого процесса - нет
+    assert _drain(supervisor.queues[0]) == [{"update_id": 1}, {"update_id": 2}]
@@ -0,0 +1,78 @@
+"""Ограничение частоты действий пользователя"""
+
+import asyncio
+
+import pytest
+from aiogram.types import CallbackQuery, User
+
+from bot.config import ThrottleConfig
+from bot.middlewares.throttling_middleware import ThrottlingMiddleware
+from bot.utils import callback_data as cb
+from bot.utils import concurrency
+from bot.utils.concurrency import SlidingWindowLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время для скользящего окна"""
+    now = [1000.0]
+    monkeypatch.setattr(concurrency.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_limit_is_per_key(clock):
+    limiter = SlidingWindowLimiter(limit=3, window=10.0, max_keys=100)
+
+    assert [limiter.hit(1) for _ in range(4)] == [True, True, True, False]
+    assert limiter.hit(2)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_window_slides(clock):
+    limiter = SlidingWindowLimiter(limit=2, window=10.0, max_keys=100)
+    limiter.hit(1)
+    clock[0] += 5
+    limiter.hit(1)
+
+    assert not limiter.hit(1)
+    clock[0] += 5  # Первое действие вышло из окна
+    assert limiter.hit(1)
+    assert not limiter.hit(1)
+
+
+def test_idle_keys_are_evicted_first(clock):
+    limiter = SlidingWindowLimiter(limit=1, window=10.0, max_keys=2)
+    limiter.hit(1)
+    limiter.hit(2)
+    limiter.hit(1)  # Ключ 2 теперь давно неактивный
+    limiter.hit(3)
+
+    assert limiter.stats()["tracked_users"] == 2
+    assert limiter.hit(2)
+    assert not limiter.hit(3)
+
+
+def test_middleware_limits_each_action_separately(clock):
+    middleware = ThrottlingMiddleware(ThrottleConfig(feed_limit=2, payment_limit=1, default_limit=5))
+    user = User(id=1, is_bot=False, first_name="Тест")
+
+    def callback(data: str) -> CallbackQuery:
+        return CallbackQuery(id="1", from_user=user, chat_instance="1", data=data)
+
+    async def handler(event, data):
+        return True
+
+    async def press(data: str):
+        return await middleware(handler, callback(data), {"event_from_user": user})
+
+    async def scenario():
+        payments = [await press(cb.BUY_SUBSCRIPTION.pack()) for _ in range(2)]
+        feed = [await press(cb.NEXT_VACANCY.pack()) for _ in range(3)]
+        other = await press("noop")
+        return payments, feed, other
+
+    payments, feed, other = asyncio.run(scenario())
+
+    assert payments == [True, None]
+    assert feed == [True, True, None]
+    assert other is True
@@ -0,0 +1,46 @@
+"""Приоритетный семафор апдейтов: учёт обработанных апдейтов"""
+
+import asyncio
+
+from bot.utils.concurrency import Priority, UpdateLimiter
+
+
+def test_cancelled_waiter_is_not_counted_as_processed():
+    limiter = UpdateLimiter(max_in_flight=1, max_queue=10)
+
+    async def scenario():
+        await limiter.acquire(Priority.TEXT)
+        waiter = asyncio.create_task(limiter.acquire(Priority.TEXT))
+        await asyncio.sleep(0)
+        # Слот передан ожидающему, но тот отменён до начала обработки
+        limiter.release()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert limiter.stats()["processed"] == 1
+    assert limiter.idle
+
+
+def test_slot_goes_to_highest_priority_waiter():
+    limiter = UpdateLimiter(max_in_flight=1, max_queue=10)
+    order = []
+
+    async def update(priority: int):
+        await limiter.acquire(priority)
+        order.append(priority)
+        await asyncio.sleep(0)
+        limiter.release()
+
+    async def scenario():
+        await limiter.acquire(Priority.TEXT)
+        waiters = [asyncio.create_task(update(priority)) for priority in (Priority.TEXT, Priority.PAYMENT)]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(scenario())
+
+    assert order == [Priority.PAYMENT, Priority.TEXT]
+    assert limiter.stats()["processed"] == 3
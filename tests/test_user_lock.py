@@ -0,0 +1,98 @@
+"""Последовательная обработка апдейтов пользователя и отбрасывание повторных нажатий"""
+
+import asyncio
+
+from aiogram.types import CallbackQuery, Update, User
+
+from bot.middlewares.user_lock_middleware import UserLockMiddleware
+from bot.utils.concurrency import UserSerializer
+
+
+class FakeBot:
+    def __init__(self):
+        self.answered = []
+
+    async def answer_callback_query(self, callback_query_id, **kwargs):
+        self.answered.append(callback_query_id)
+
+
+def _press(update_id: int, user_id: int, data: str) -> Update:
+    user = User(id=user_id, is_bot=False, first_name="Тест")
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(id=str(update_id), from_user=user, chat_instance="1", data=data),
+    )
+
+
+class Recorder:
+    """Хендлер, записывающий начало и конец обработки"""
+
+    def __init__(self):
+        self.log = []
+
+    async def __call__(self, event, data):
+        self.log.append(("start", event.update_id))
+        await asyncio.sleep(0.02)
+        self.log.append(("end", event.update_id))
+        return event.update_id
+
+
+def _feed(middleware, handler, bot, update):
+    data = {"event_from_user": update.callback_query.from_user, "bot": bot}
+    return middleware(handler, update, data)
+
+
+def test_updates_of_one_user_run_one_after_another():
+    serializer = UserSerializer()
+    middleware = UserLockMiddleware(serializer)
+    handler, bot = Recorder(), FakeBot()
+
+    async def scenario():
+        return await asyncio.gather(
+            _feed(middleware, handler, bot, _press(1, 1, "next")),
+            _feed(middleware, handler, bot, _press(2, 1, "menu")),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert results == [1, 2]
+    assert handler.log == [("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+    assert serializer.active_users == 0
+
+
+def test_different_users_run_in_parallel():
+    middleware = UserLockMiddleware(UserSerializer())
+    handler, bot = Recorder(), FakeBot()
+
+    async def scenario():
+        await asyncio.gather(
+            _feed(middleware, handler, bot, _press(1, 1, "next")),
+            _feed(middleware, handler, bot, _press(2, 2, "next")),
+        )
+
+    asyncio.run(scenario())
+
+    assert handler.log[:2] == [("start", 1), ("start", 2)]
+
+
+def test_identical_in_flight_callback_is_dropped():
+    serializer = UserSerializer()
+    middleware = UserLockMiddleware(serializer)
+    handler, bot = Recorder(), FakeBot()
+
+    async def scenario():
+        first = await asyncio.gather(
+            _feed(middleware, handler, bot, _press(1, 1, "next")),
+            _feed(middleware, handler, bot, _press(2, 1, "next")),
+        )
+        # После обработки то же нажатие снова принимается
+        again = await _feed(middleware, handler, bot, _press(3, 1, "next"))
+        return first, again
+
+    first, again = asyncio.run(scenario())
+
+    assert first == [1, None]
+    assert again == 3
+    assert bot.answered == ["2"]
+    assert serializer.stats()["coalesced"] == 1
+    assert serializer.active_users == 0
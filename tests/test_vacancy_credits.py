@@ -0,0 +1,98 @@
+"""Списание публикаций вакансий: одновременные публикации и порядок списания"""
+
+import asyncio
+from datetime import date
+
+from sqlalchemy import func, select, update
+
+from bot.config import config
+from bot.database import crud
+from bot.database.connection import async_session_maker
+from bot.database.models import User, Vacancy
+
+EMPLOYER_ID = 2001
+
+VACANCY = {
+    "title": "Грузчик",
+    "city": "Москва",
+    "latitude": 55.75,
+    "longitude": 37.62,
+    "salary": "3000 в смену",
+    "description": "Погрузка и разгрузка",
+    "photo_id": "photo",
+}
+
+
+async def _create_employer(free: int, paid: int) -> None:
+    """Работодатель с заданным балансом публикаций текущего месяца"""
+    async with async_session_maker() as session:
+        await crud.create_user(session, EMPLOYER_ID)
+        await session.execute(
+            update(User)
+            .where(User.telegram_id == EMPLOYER_ID)
+            .values(
+                free_vacancies_left=free,
+                paid_vacancy_credits=paid,
+                vacancies_reset_date=date.today().replace(day=1),
+            )
+        )
+        await session.commit()
+
+
+async def _publish() -> bool:
+    async with async_session_maker() as session:
+        return await crud.create_vacancy_with_credit(session, EMPLOYER_ID, **VACANCY) is not None
+
+
+async def _balance():
+    async with async_session_maker() as session:
+        user = await crud.get_user(session, EMPLOYER_ID)
+        vacancies = await session.scalar(select(func.count()).select_from(Vacancy))
+    return user.free_vacancies_left, user.paid_vacancy_credits, vacancies
+
+
+def test_concurrent_publications_spend_last_credit_once(run):
+    async def scenario():
+        await _create_employer(free=0, paid=1)
+        results = await asyncio.gather(*(_publish() for _ in range(5)))
+        return results, await _balance()
+
+    results, (free, paid, vacancies) = run(scenario())
+
+    assert sum(results) == 1
+    assert vacancies == 1
+    assert (free, paid) == (0, 0)
+
+
+def test_free_credits_are_spent_before_paid(run):
+    async def scenario():
+        await _create_employer(free=1, paid=1)
+        balances = []
+        for _ in range(3):
+            published = await _publish()
+            balances.append((published, *await _balance()))
+        return balances
+
+    balances = run(scenario())
+
+    assert balances == [
+        (True, 0, 1, 1),
+        (True, 0, 0, 2),
+        (False, 0, 0, 2),
+    ]
+
+
+def test_new_month_restores_free_credits_before_paid(run):
+    async def scenario():
+        await _create_employer(free=0, paid=1)
+        async with async_session_maker() as session:
+            await session.execute(
+                update(User).where(User.telegram_id == EMPLOYER_ID).values(vacancies_reset_date=date(2000, 1, 1))
+            )
+            await session.commit()
+        await _publish()
+        return await _balance()
+
+    free, paid, vacancies = run(scenario())
+
+    assert (free, paid, vacancies) == (config.limits.free_vacancies_per_month - 1, 1, 1)
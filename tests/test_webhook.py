@@ -0,0 +1,44 @@
+"""Приём апдейтов Telegram через webhook: проверка секрета"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from bot import webhook
+from bot.config import config
+
+
+def _request(headers: dict) -> Request:
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": config.bot.webhook_path,
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+    }
+    return Request(scope)
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    """Сервер принимает апдейты Telegram с секретом"""
+    monkeypatch.setattr(config.bot, "webhook_url", "https://example.org")
+    monkeypatch.setattr(config.bot, "token", "123:test")
+    monkeypatch.setattr(config.bot, "webhook_secret", "s3cret")
+    monkeypatch.setattr(webhook, "dispatcher", object())
+
+
+def test_startup_fails_without_secret(telegram, monkeypatch):
+    monkeypatch.setattr(config.bot, "webhook_secret", "")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(webhook.start_telegram_webhook())
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Telegram-Bot-Api-Secret-Token": "wrong"}])
+def test_update_without_valid_secret_is_rejected(telegram, headers):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(webhook.telegram_webhook(_request(headers)))
+
+    assert error.value.status_code == 403